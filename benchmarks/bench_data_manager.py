@@ -0,0 +1,294 @@
+# benchmarks/bench_data_manager.py
+"""
+数据管理模块性能基准
+
+生成带有真实SM2状态的合成词库（默认1千到100万个单词），对每个规模测量
+加载、保存、今日复习、高遗忘风险、学习统计、Excel导入和各种学习顺序排序的耗时，
+并用tracemalloc记录峰值内存。结果输出为JSON，可用 --compare 与之前的结果对比，
+发现变慢的操作时以非零状态码退出。
+
+用法（在项目根目录运行）:
+    python benchmarks/bench_data_manager.py --sizes 1000 10000 --output bench.json
+    python benchmarks/bench_data_manager.py --compare bench.json --tolerance 1.5
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_manager import WordDataManager, PANDAS_AVAILABLE
+from src.sm2_algorithm import Word, NUMPY_AVAILABLE
+from src.storage import open_store, word_to_record
+from src.lazy_imports import get_pandas, is_available
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# 导入Excel的行数上限（生成和读取xlsx本身就很慢）
+DEFAULT_IMPORT_ROWS = 20_000
+# 单次保存测量的次数（取平均值）
+SAVE_ROUNDS = 200
+
+
+def make_deck(size: int, seed: int = 42, today: Optional[datetime.date] = None) -> List[Word]:
+    """生成合成词库：约30%新单词，其余单词的复习次数、易度因子、间隔和日期符合SM2规律"""
+    today = today or datetime.date.today()
+    rng = random.Random(seed)
+    words = []
+    for i in range(size):
+        word = Word(text=f"word{i:07d}", meaning=f"释义{i}；含义{i % 97}",
+                    example=f"This is example {i}." if i % 3 == 0 else "",
+                    created_at=today - datetime.timedelta(days=rng.randint(0, 365)))
+        if rng.random() >= 0.3:
+            word.repetitions = min(int(rng.expovariate(0.35)) + 1, 15)
+            word.ease_factor = round(rng.uniform(1.3, 3.0), 2)
+            if word.repetitions == 1:
+                word.interval = 1
+            elif word.repetitions == 2:
+                word.interval = 3
+            else:
+                word.interval = min(int(3 * word.ease_factor ** (word.repetitions - 2)), 365)
+            # 约三分之一的单词已经到期或逾期
+            word.last_reviewed = today - datetime.timedelta(
+                days=rng.randint(0, int(word.interval * 1.5)))
+            word.next_review = word.last_reviewed + datetime.timedelta(days=word.interval)
+            word.forget_risk = word.calculate_forget_risk(today)
+        words.append(word)
+    return words
+
+
+def write_deck(path: str, words: List[Word]):
+    """用存储后端写出词库文件（JSON快照、二进制快照或SQLite，由扩展名决定）"""
+    store = open_store(path)
+    store.put_many([word_to_record(w) for w in words])
+    store.close()
+
+
+def write_excel(path: str, words: List[Word]):
+    """生成导入用的Excel：一半是词库中已有的单词，一半是新单词"""
+    pd = get_pandas()
+    rows = []
+    for i, word in enumerate(words):
+        text = word.text if i % 2 == 0 else f"new{word.text}"
+        rows.append({"单词": text, "释义": word.meaning, "例句": word.example})
+    pd.DataFrame(rows).to_excel(path, index=False)
+
+
+def measure(fn: Callable[[], Any], repeat: int = 1, memory: bool = True,
+            setup: Optional[Callable[[], Any]] = None,
+            teardown: Optional[Callable[[Any], Any]] = None) -> Dict[str, Any]:
+    """测量函数耗时（取多次中最快的一次）和峰值内存
+    
+    setup在每次测量前调用且不计时，返回值作为参数传给fn。
+    teardown在每次测量后调用且不计时，参数是setup的返回值（没有setup时是fn的返回值），
+    用来关闭测量中打开的词库。
+    """
+    def run():
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        value = fn(arg) if setup else fn()
+        elapsed = time.perf_counter() - start
+        if teardown:
+            teardown(arg if setup else value)
+        return elapsed
+    
+    timings = [run() for _ in range(max(repeat, 1))]
+    
+    result = {"seconds": min(timings), "mean_seconds": sum(timings) / len(timings),
+              "repeat": len(timings)}
+    if memory:
+        # tracemalloc会明显拖慢执行，单独跑一次只用来取峰值
+        arg = setup() if setup else None
+        tracemalloc.start()
+        try:
+            value = fn(arg) if setup else fn()
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        if teardown:
+            teardown(arg if setup else value)
+    return result
+
+
+def bench_deck(size: int, workdir: str, backend: str, repeat: int, memory: bool,
+               import_rows: int, log: Callable[[str], None]) -> List[Dict[str, Any]]:
+    """对一个规模的词库运行全部基准，返回结果列表"""
+    extension = {"sqlite": ".db", "binary": ".deck"}.get(backend, ".json")
+    deck_path = os.path.join(workdir, f"deck_{size}{extension}")
+    words = make_deck(size)
+    write_deck(deck_path, words)
+    del words
+    
+    results = []
+    
+    def record(operation: str, measurement: Dict[str, Any], **extra):
+        entry = {"deck_size": size, "backend": backend, "operation": operation}
+        entry.update(measurement)
+        entry.update(extra)
+        results.append(entry)
+        log(f"  {operation:<40} {measurement['seconds'] * 1000:10.2f} ms")
+    
+    def fresh_manager():
+        return WordDataManager(deck_path)
+    
+    def close_manager(manager):
+        manager.close()
+    
+    def cold_load():
+        manager = WordDataManager(deck_path)
+        manager.load_words()
+        return manager
+    
+    # 冷启动：打开存储（解析词库文件）并构建全部Word对象
+    record("load_words", measure(cold_load, repeat, memory, teardown=close_manager))
+    
+    # 查询：冷（新管理器，索引/列式视图需要构建）和热（每次答题后的路径）
+    for name in ("get_today_review_words", "get_high_forget_risk_words", "get_learning_statistics"):
+        record(f"{name}[cold]",
+               measure(lambda m, name=name: getattr(m, name)(), repeat, memory,
+                       setup=fresh_manager, teardown=close_manager))
+    
+    manager = fresh_manager()
+    manager.load_words()
+    for name in ("get_today_review_words", "get_high_forget_risk_words", "get_learning_statistics"):
+        getattr(manager, name)()
+        record(f"{name}[warm]", measure(getattr(manager, name), repeat, memory))
+    
+    # 保存单个单词（答题后的写入路径），连续保存取平均，计时包含等待日志落盘
+    texts = manager.store.keys()
+    rng = random.Random(7)
+    sample = [manager.get_word(texts[rng.randrange(len(texts))]) for _ in range(SAVE_ROUNDS)]
+    
+    def save_sample():
+        for word in sample:
+            word.repetitions += 1
+            manager.save_word(word)
+        manager.store.flush()
+    
+    measurement = measure(save_sample, 1, memory)
+    measurement["seconds"] /= SAVE_ROUNDS
+    measurement["mean_seconds"] = measurement["seconds"]
+    record("save_word", measurement, rounds=SAVE_ROUNDS)
+    # 保存后统计应走增量路径
+    record("get_learning_statistics[after_save]",
+           measure(manager.get_learning_statistics, repeat, memory))
+    
+    # 各种学习顺序的排序（"随机"每次打乱同一份拷贝）
+    all_words = manager.load_words()
+    for order_mode in WordDataManager.ORDER_MODES:
+        record(f"sort_words_by_order[{order_mode}]",
+               measure(lambda: manager.sort_words_by_order(list(all_words), order_mode),
+                       repeat, memory))
+    manager.close()
+    
+    # Excel导入：每次导入到新的词库副本
+    if PANDAS_AVAILABLE and is_available("openpyxl") and import_rows > 0:
+        rows = min(size, import_rows)
+        excel_path = os.path.join(workdir, f"import_{size}.xlsx")
+        write_excel(excel_path, make_deck(rows, seed=1))
+        
+        def fresh_copy():
+            copy_path = os.path.join(tempfile.mkdtemp(dir=workdir), f"deck{extension}")
+            shutil.copyfile(deck_path, copy_path)
+            return WordDataManager(copy_path)
+        
+        def import_and_close(manager):
+            # 关闭（写完日志并压缩）也计入导入耗时
+            manager.import_from_excel(excel_path)
+            manager.close()
+        
+        record("import_from_excel",
+               measure(import_and_close, 1, memory, setup=fresh_copy),
+               rows=rows)
+    else:
+        log("  import_from_excel: 跳过（需要pandas和openpyxl，且--import-rows大于0）")
+    
+    return results
+
+
+def compare_results(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                    tolerance: float) -> List[str]:
+    """找出比基线慢超过tolerance倍的操作"""
+    def key(entry):
+        return entry["deck_size"], entry["backend"], entry["operation"]
+    
+    baseline_by_key = {key(entry): entry for entry in baseline}
+    regressions = []
+    for entry in current:
+        old = baseline_by_key.get(key(entry))
+        if old and old["seconds"] > 0 and entry["seconds"] > old["seconds"] * tolerance:
+            regressions.append(
+                f"{entry['operation']} @ {entry['deck_size']} ({entry['backend']}): "
+                f"{old['seconds'] * 1000:.2f} ms -> {entry['seconds'] * 1000:.2f} ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="单词本数据管理性能基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="词库规模（单词数）")
+    parser.add_argument("--backend", choices=["json", "binary", "sqlite"], default="json",
+                        help="存储后端")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测量的重复次数（取最快）")
+    parser.add_argument("--import-rows", type=int, default=DEFAULT_IMPORT_ROWS,
+                        help="Excel导入测试的行数上限，0表示跳过")
+    parser.add_argument("--no-memory", action="store_true", help="不测量峰值内存")
+    parser.add_argument("--output", help="结果JSON文件路径（默认输出到标准输出）")
+    parser.add_argument("--compare", help="与之前保存的结果JSON对比")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="耗时超过基线的多少倍算作变慢")
+    args = parser.parse_args(argv)
+    
+    def log(message):
+        print(message, file=sys.stderr)
+    
+    results = []
+    workdir = tempfile.mkdtemp(prefix="vocab_bench_")
+    try:
+        for size in args.sizes:
+            log(f"词库规模 {size}:")
+            results.extend(bench_deck(size, workdir, args.backend, args.repeat,
+                                      not args.no_memory, args.import_rows, log))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": NUMPY_AVAILABLE,
+            "pandas": PANDAS_AVAILABLE,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        log(f"结果已保存到 {args.output}")
+    else:
+        print(text)
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_results(results, baseline, args.tolerance)
+        for line in regressions:
+            log(f"⚠️ 变慢: {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
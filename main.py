@@ -1,10 +1,35 @@
 # main.py
 import sys
 import os
+import time
+
+# 启动计时：从这里到主窗口第一次空闲（可以响应输入）
+_START_TIME = time.perf_counter()
+
+# 启动时间预算（秒），可用环境变量 VOCAB_STARTUP_BUDGET 覆盖
+try:
+    STARTUP_BUDGET_SECONDS = float(os.environ.get("VOCAB_STARTUP_BUDGET", "1.5"))
+except ValueError:
+    STARTUP_BUDGET_SECONDS = 1.5
 
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# 带参数运行时使用无界面的命令行工具（不会导入tkinter和matplotlib）
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from src.cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
+
+
+def report_startup_time():
+    """输出启动耗时，超出预算时给出提示"""
+    elapsed = time.perf_counter() - _START_TIME
+    if elapsed <= STARTUP_BUDGET_SECONDS:
+        print(f"启动耗时: {elapsed:.2f} 秒 (预算 {STARTUP_BUDGET_SECONDS:.2f} 秒)")
+    else:
+        print(f"⚠️ 启动耗时 {elapsed:.2f} 秒，超出预算 {STARTUP_BUDGET_SECONDS:.2f} 秒")
+
+
 # 导入GUI模块
 try:
     from src.gui import VocabularyTutorGUI
@@ -13,6 +38,8 @@ try:
     if __name__ == "__main__":
         root = tk.Tk()
         app = VocabularyTutorGUI(root)
+        # 主窗口绘制完成、进入事件循环后统计启动耗时
+        root.after_idle(report_startup_time)
         root.mainloop()
 except ImportError as e:
     print(f"导入错误: {e}")
@@ -0,0 +1,219 @@
+# src/background.py
+"""
+后台任务模块
+
+Tk控件只能在主线程访问，因此后台线程只负责计算，结果放进队列，
+再由主线程通过root.after定时取出并更新界面。
+
+GroupCommitter与Tk无关，是存储后端的写入线程：把一小段时间内的写入合并成一次。
+"""
+import atexit
+import queue
+import threading
+import traceback
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class CoalescingWorker:
+    """合并请求的后台工作线程
+    
+    compute(*args)在后台线程执行，apply(result)在Tk主线程执行。
+    计算进行中收到的多次请求只保留最后一次的参数，因此连续请求最终只会多算一次。
+    """
+    
+    def __init__(self, root, compute: Callable[..., Any], apply: Callable[[Any], None],
+                 poll_ms: int = 50, name: str = "background-worker"):
+        self.root = root
+        self.compute = compute
+        self.apply = apply
+        self.poll_ms = poll_ms
+        self._pending: Optional[Tuple] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._results: "queue.Queue[Any]" = queue.Queue()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_ms, self._poll)
+    
+    def request(self, *args):
+        """请求一次后台计算（可在任意线程调用）"""
+        with self._lock:
+            self._pending = args
+        self._wakeup.set()
+    
+    def stop(self):
+        """停止后台线程，未完成的结果会被丢弃"""
+        self._stopped = True
+        self._wakeup.set()
+    
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._stopped:
+                return
+            
+            with self._lock:
+                args, self._pending = self._pending, None
+            if args is None:
+                continue
+            
+            try:
+                self._results.put(self.compute(*args))
+            except Exception:
+                traceback.print_exc()
+    
+    def _poll(self):
+        """主线程：取出最新的计算结果并应用到界面"""
+        if self._stopped:
+            return
+        
+        result = None
+        has_result = False
+        while True:
+            try:
+                result = self._results.get_nowait()
+                has_result = True
+            except queue.Empty:
+                break
+        
+        if has_result:
+            try:
+                self.apply(result)
+            except Exception:
+                traceback.print_exc()
+        self.root.after(self.poll_ms, self._poll)
+
+
+class GroupCommitter:
+    """组提交写入线程
+    
+    submit(items)只把数据放进待写队列就返回；线程等待window秒，把这段时间内的
+    所有提交合并成一批调用commit(batch)。commit返回False或抛出异常时，这批数据
+    留在队列中下一轮重试。flush()等待此前提交的数据全部写完，close()写完后停止线程。
+    进程正常退出时（atexit）会自动close。
+    """
+    
+    # 写入失败后重试前的等待时间（秒）
+    RETRY_DELAY = 1.0
+    
+    def __init__(self, commit: Callable[[List[Any]], bool], window: float = 0.05,
+                 name: str = "group-commit"):
+        self.commit = commit
+        self.window = window
+        self._condition = threading.Condition()
+        self._pending: List[Any] = []
+        self._submitted = 0  # 累计提交的条数
+        self._committed = 0  # 累计写完的条数
+        self._attempts = 0  # 累计写入次数（含失败）
+        self._failed = False  # 最近一次写入是否失败
+        self._urgent = False  # 有flush在等待，不再等满窗口
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def submit(self, items: List[Any]):
+        """提交一批待写数据（可在任意线程调用，不等待写入）"""
+        if not items:
+            return
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("写入线程已停止")
+            self._pending.extend(items)
+            self._submitted += len(items)
+            self._condition.notify_all()
+    
+    def pending_count(self) -> int:
+        """已提交但尚未写完的条数"""
+        with self._condition:
+            return self._submitted - self._committed
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前提交的数据全部写完；期间写入失败或超时返回False"""
+        with self._condition:
+            target = self._submitted
+            attempts = self._attempts
+            if self._committed >= target:
+                return True
+            self._urgent = True
+            self._condition.notify_all()
+            self._condition.wait_for(
+                lambda: self._committed >= target or (self._failed and self._attempts > attempts)
+                or not self._thread.is_alive(), timeout)
+            return self._committed >= target
+    
+    def close(self) -> bool:
+        """写完待写数据并停止线程"""
+        flushed = self.flush()
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        atexit.unregister(self.close)
+        return flushed
+    
+    def _run(self):
+        condition = self._condition
+        while True:
+            with condition:
+                condition.wait_for(lambda: self._pending or self._stopped)
+                if not self._pending:
+                    return
+                # 等一个窗口收集后续的提交，有flush在等待或正在停止时立即写入
+                condition.wait_for(lambda: self._urgent or self._stopped, self.window)
+                batch, self._pending = self._pending, []
+                target = self._submitted
+            
+            try:
+                committed = self.commit(batch) is not False
+            except Exception:
+                traceback.print_exc()
+                committed = False
+            
+            with condition:
+                self._attempts += 1
+                self._failed = not committed
+                if committed:
+                    self._committed = target
+                    self._urgent = self._committed < self._submitted and self._urgent
+                else:
+                    # 放回队首，保持写入顺序
+                    self._pending[:0] = batch
+                    self._urgent = False
+                condition.notify_all()
+                if not committed and not self._stopped:
+                    condition.wait_for(lambda: self._stopped, self.RETRY_DELAY)
+                elif not committed:
+                    return
+
+
+def run_in_background(root, compute: Callable[[], Any], apply: Callable[[Any], None],
+                      poll_ms: int = 50, name: str = "background-task") -> threading.Thread:
+    """在后台线程执行一次compute()，完成后在Tk主线程调用apply(result)
+    
+    compute抛出异常时，apply收到的是该异常对象。
+    """
+    results: "queue.Queue[Any]" = queue.Queue(maxsize=1)
+    
+    def run():
+        try:
+            results.put(compute())
+        except Exception as e:
+            traceback.print_exc()
+            results.put(e)
+    
+    def poll():
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            root.after(poll_ms, poll)
+            return
+        apply(result)
+    
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    root.after(poll_ms, poll)
+    return thread
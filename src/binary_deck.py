@@ -0,0 +1,340 @@
+# src/binary_deck.py
+"""
+二进制词库快照格式
+
+与word_data.json保存相同的数据，但加载时不需要解析JSON文本和日期字符串。
+文件结构（小端）：
+- 文件头：魔数、格式版本、单词数、字符串区的位置和长度
+- 记录区：每个单词一条定长记录，SM2数值字段直接存储，日期存为日序号，
+  文本/释义/例句等字符串存为字符串区中的(偏移, 长度)
+- 字符串区：所有字符串的UTF-8字节依次拼接（相同的字符串只存一份），
+  开头是词库的其他元数据（如version）的紧凑JSON
+- 单词索引：按单词UTF-8字节排序的记录序号数组，不加载全部单词也能二分查找
+
+记录中不符合定长字段类型的值（如手工编辑成字符串的数字、无法解析的日期）
+和未知字段会原样存入每条记录的"附加字段"JSON，因此与JSON格式可以无损互转。
+"""
+import datetime
+import json
+import os
+import struct
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+MAGIC = b"VOCB"
+FORMAT_VERSION = 1
+
+# 魔数, 格式版本, 文件标志, 单词数, 元数据长度, 字符串区偏移, 字符串区长度
+HEADER = struct.Struct("<4sHHIIQQ")
+# 文件标志：字符串区之后有单词索引
+HEADER_KEY_INDEX = 1 << 0
+# 单词索引中的一个记录序号
+INDEX_ENTRY = struct.Struct("<I")
+# 易度因子, 遗忘风险, 复习次数, 间隔, 下次复习日, 上次复习日, 创建日, 字段标志,
+# 然后是 单词/释义/例句/附加字段 四个字符串的(偏移, 长度)
+RECORD = struct.Struct("<ddiiiiiI8I")
+
+# 字段标志：记录中存在该字段（last_reviewed还需区分值是否为null）
+FLAG_TEXT = 1 << 0
+FLAG_MEANING = 1 << 1
+FLAG_EXAMPLE = 1 << 2
+FLAG_REPETITIONS = 1 << 3
+FLAG_INTERVAL = 1 << 4
+FLAG_EASE_FACTOR = 1 << 5
+FLAG_NEXT_REVIEW = 1 << 6
+FLAG_LAST_REVIEWED = 1 << 7
+FLAG_CREATED_AT = 1 << 8
+FLAG_FORGET_RISK = 1 << 9
+
+# word_to_record生成的记录包含全部字段
+ALL_FIELDS = (FLAG_TEXT | FLAG_MEANING | FLAG_EXAMPLE | FLAG_REPETITIONS | FLAG_INTERVAL |
+              FLAG_EASE_FACTOR | FLAG_NEXT_REVIEW | FLAG_LAST_REVIEWED | FLAG_CREATED_AT |
+              FLAG_FORGET_RISK)
+
+INT32_RANGE = (-2 ** 31, 2 ** 31 - 1)
+UINT32_MAX = 2 ** 32 - 1
+
+
+def is_binary_deck(file_path: str) -> bool:
+    """文件是否为二进制词库（检查魔数）"""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _date_ordinal(value: Any) -> Optional[int]:
+    """能无损还原的ISO日期字符串 -> 日序号，否则返回None"""
+    if not isinstance(value, str):
+        return None
+    try:
+        day = datetime.date.fromisoformat(value)
+    except ValueError:
+        return None
+    return day.toordinal() if day.isoformat() == value else None
+
+
+class DateStrings(dict):
+    """日序号 -> ISO日期字符串的缓存（大量单词共享相同的日期）"""
+    
+    def __missing__(self, ordinal: int) -> str:
+        value = self[ordinal] = datetime.date.fromordinal(ordinal).isoformat()
+        return value
+
+
+def _fits_int(value: Any) -> bool:
+    return type(value) is int and INT32_RANGE[0] <= value <= INT32_RANGE[1]
+
+
+class _StringTable:
+    """字符串区的构建器，相同的字符串只写一次"""
+    
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.offsets: Dict[str, Tuple[int, int]] = {}
+    
+    def add(self, value: str) -> Tuple[int, int]:
+        location = self.offsets.get(value)
+        if location is None:
+            data = value.encode('utf-8')
+            if self.size + len(data) > UINT32_MAX:
+                raise ValueError("词库字符串总长度超过4GB，无法保存为二进制格式")
+            location = self.offsets[value] = (self.size, len(data))
+            self.chunks.append(data)
+            self.size += len(data)
+        return location
+
+
+def encode_record(text: str, record: Dict[str, Any], strings: _StringTable) -> bytes:
+    """把一条记录编码为定长记录，字符串写入strings"""
+    extra = dict(record)
+    flags = 0
+    
+    def take_string(key: str, flag: int) -> str:
+        nonlocal flags
+        value = extra.get(key)
+        if isinstance(value, str):
+            del extra[key]
+            flags |= flag
+            return value
+        return ""
+    
+    def take_int(key: str, flag: int) -> int:
+        nonlocal flags
+        value = extra.get(key)
+        if _fits_int(value):
+            del extra[key]
+            flags |= flag
+            return value
+        return 0
+    
+    def take_float(key: str, flag: int) -> float:
+        nonlocal flags
+        value = extra.get(key)
+        if type(value) is float:
+            del extra[key]
+            flags |= flag
+            return value
+        return 0.0
+    
+    def take_date(key: str, flag: int) -> int:
+        nonlocal flags
+        ordinal = _date_ordinal(extra.get(key))
+        if ordinal is None:
+            return 0
+        del extra[key]
+        flags |= flag
+        return ordinal
+    
+    if extra.get("text") == text:
+        del extra["text"]
+        flags |= FLAG_TEXT
+    meaning = take_string("meaning", FLAG_MEANING)
+    example = take_string("example", FLAG_EXAMPLE)
+    repetitions = take_int("repetitions", FLAG_REPETITIONS)
+    interval = take_int("interval", FLAG_INTERVAL)
+    ease_factor = take_float("ease_factor", FLAG_EASE_FACTOR)
+    forget_risk = take_float("forget_risk", FLAG_FORGET_RISK)
+    next_review = take_date("next_review", FLAG_NEXT_REVIEW)
+    created_at = take_date("created_at", FLAG_CREATED_AT)
+    # 上次复习日期：日序号0表示null（有效日期的日序号从1开始）
+    if "last_reviewed" in extra and extra["last_reviewed"] is None:
+        del extra["last_reviewed"]
+        flags |= FLAG_LAST_REVIEWED
+        last_reviewed = 0
+    else:
+        last_reviewed = take_date("last_reviewed", FLAG_LAST_REVIEWED)
+    
+    extra_json = json.dumps(extra, ensure_ascii=False, separators=(',', ':')) if extra else ""
+    return RECORD.pack(
+        ease_factor, forget_risk, repetitions, interval, next_review, last_reviewed, created_at, flags,
+        *strings.add(text), *strings.add(meaning), *strings.add(example), *strings.add(extra_json))
+
+
+def encode_deck(data: Dict[str, Any]) -> bytes:
+    """把与word_data.json结构相同的数据编码为二进制快照"""
+    words = data.get("words", {})
+    # 元数据中words的值置为null，只用来记住它在原数据中的位置
+    metadata = dict(data, words=None)
+    strings = _StringTable()
+    # 元数据放在字符串区开头
+    meta_length = strings.add(json.dumps(metadata, ensure_ascii=False, separators=(',', ':')))[1]
+    texts = []
+    records = []
+    for text, record in words.items():
+        texts.append(text.encode('utf-8'))
+        records.append(encode_record(text, record, strings))
+    order = sorted(range(len(texts)), key=texts.__getitem__)
+    index = struct.pack(f"<{len(order)}I", *order)
+    
+    strings_offset = HEADER.size + RECORD.size * len(records)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, HEADER_KEY_INDEX, len(records), meta_length,
+                         strings_offset, strings.size)
+    return b"".join([header] + records + strings.chunks + [index])
+
+
+class DeckHeader(NamedTuple):
+    """文件头中的各区域位置"""
+    count: int           # 单词数
+    meta_length: int     # 元数据JSON的字节数
+    strings_offset: int  # 字符串区偏移
+    strings_length: int  # 字符串区长度
+    index_offset: Optional[int]  # 单词索引偏移，没有索引时为None
+
+
+def read_header(buffer) -> DeckHeader:
+    """校验文件头并返回各区域的位置"""
+    if len(buffer) < HEADER.size:
+        raise ValueError("二进制词库文件不完整")
+    magic, version, flags, count, meta_length, strings_offset, strings_length = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("不是二进制词库文件")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"不支持的二进制词库版本: {version}")
+    index_offset = strings_offset + strings_length if flags & HEADER_KEY_INDEX else None
+    end = strings_offset + strings_length + (INDEX_ENTRY.size * count if index_offset is not None else 0)
+    if strings_offset != HEADER.size + RECORD.size * count or end > len(buffer):
+        raise ValueError("二进制词库文件不完整")
+    return DeckHeader(count, meta_length, strings_offset, strings_length, index_offset)
+
+
+def read_metadata(buffer, header: DeckHeader) -> Dict[str, Any]:
+    """词库元数据（words为占位的null）"""
+    start = header.strings_offset
+    return json.loads(str(buffer[start:start + header.meta_length], 'utf-8'))
+
+
+def decode_record(values: Tuple, buffer, strings_offset: int,
+                  dates: DateStrings) -> Tuple[str, Dict[str, Any]]:
+    """RECORD.unpack得到的元组 -> (单词文本, 记录字典)，字段顺序与word_to_record一致"""
+    (ease_factor, forget_risk, repetitions, interval, next_review, last_reviewed, created_at, flags,
+     text_offset, text_length, meaning_offset, meaning_length,
+     example_offset, example_length, extra_offset, extra_length) = values
+    
+    def string(offset: int, length: int) -> str:
+        start = strings_offset + offset
+        return str(buffer[start:start + length], 'utf-8')
+    
+    text = string(text_offset, text_length)
+    record: Dict[str, Any] = {}
+    if flags & FLAG_TEXT:
+        record["text"] = text
+    if flags & FLAG_MEANING:
+        record["meaning"] = string(meaning_offset, meaning_length)
+    if flags & FLAG_EXAMPLE:
+        record["example"] = string(example_offset, example_length)
+    if flags & FLAG_REPETITIONS:
+        record["repetitions"] = repetitions
+    if flags & FLAG_INTERVAL:
+        record["interval"] = interval
+    if flags & FLAG_EASE_FACTOR:
+        record["ease_factor"] = ease_factor
+    if flags & FLAG_NEXT_REVIEW:
+        record["next_review"] = dates[next_review]
+    if flags & FLAG_LAST_REVIEWED:
+        record["last_reviewed"] = dates[last_reviewed] if last_reviewed else None
+    if flags & FLAG_CREATED_AT:
+        record["created_at"] = dates[created_at]
+    if flags & FLAG_FORGET_RISK:
+        record["forget_risk"] = forget_risk
+    if extra_length:
+        record.update(json.loads(string(extra_offset, extra_length)))
+    return text, record
+
+
+def decode_deck(buffer) -> Dict[str, Any]:
+    """解码二进制快照，返回与word_data.json结构相同的数据"""
+    header = read_header(buffer)
+    strings_offset, strings_length = header.strings_offset, header.strings_length
+    data = read_metadata(buffer, header)
+    words: Dict[str, Any] = {}
+    dates = DateStrings()
+    strings = bytes(buffer[strings_offset:strings_offset + strings_length])
+    records = memoryview(buffer)[HEADER.size:strings_offset]
+    for values in RECORD.iter_unpack(records):
+        (ease_factor, forget_risk, repetitions, interval, next_review, last_reviewed, created_at, flags,
+         text_offset, text_length, meaning_offset, meaning_length,
+         example_offset, example_length, _, extra_length) = values
+        if flags != ALL_FIELDS or extra_length:
+            text, record = decode_record(values, buffer, strings_offset, dates)
+            words[text] = record
+            continue
+        # 常见情况：字段齐全且没有附加字段，直接构建字典
+        text = strings[text_offset:text_offset + text_length].decode('utf-8')
+        words[text] = {
+            "text": text,
+            "meaning": strings[meaning_offset:meaning_offset + meaning_length].decode('utf-8'),
+            "example": strings[example_offset:example_offset + example_length].decode('utf-8'),
+            "repetitions": repetitions,
+            "interval": interval,
+            "ease_factor": ease_factor,
+            "next_review": dates[next_review],
+            "last_reviewed": dates[last_reviewed] if last_reviewed else None,
+            "created_at": dates[created_at],
+            "forget_risk": forget_risk
+        }
+    data["words"] = words  # 替换占位的null，保持原来的键顺序
+    return data
+
+
+def write_deck(file_path: str, data: Dict[str, Any]) -> int:
+    """写入二进制快照（先写临时文件并fsync，再替换），返回写入的字节数；失败时删除临时文件"""
+    payload = encode_deck(data)
+    tmp_path = file_path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(payload)
+
+
+def read_deck(file_path: str) -> Dict[str, Any]:
+    """读取二进制快照"""
+    with open(file_path, 'rb') as f:
+        return decode_deck(f.read())
+
+
+def json_to_binary(json_path: str, binary_path: str) -> int:
+    """把JSON快照转换为二进制快照，返回单词数"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data.setdefault("words", {})
+    write_deck(binary_path, data)
+    return len(data["words"])
+
+
+def binary_to_json(binary_path: str, json_path: str) -> int:
+    """把二进制快照转换回JSON快照（格式与word_data.json相同），返回单词数"""
+    data = read_deck(binary_path)
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, json_path)
+    return len(data["words"])
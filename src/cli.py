@@ -0,0 +1,204 @@
+# src/cli.py
+"""
+无界面命令行工具
+
+用于定时任务和脚本：导入Excel、列出今日复习单词、输出学习统计、导出词库、
+模拟未来的复习量。
+所有结果以JSON输出到标准输出。本模块不导入tkinter和matplotlib，
+没有图形环境也能运行。
+
+用法:
+    python main.py import words.xlsx
+    python main.py due --limit 20 --order 按遗忘风险
+    python main.py stats --data data/word_data.db --indent 0
+    python main.py export --format csv --output words.csv
+    python main.py simulate --days 90 --add 30
+    python main.py convert data/word_data.deck
+"""
+import argparse
+import contextlib
+import csv
+import datetime
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+from . import binary_deck
+from .data_manager import WordDataManager
+from .sm2_algorithm import Word
+from .simulator import simulate_deck
+from .storage import BINARY_EXTENSIONS, RECORD_DEFAULTS, RECORD_FIELDS, word_to_record
+
+DEFAULT_DATA_FILE = "data/word_data.json"
+
+
+def _print_json(data: Any, indent: Optional[int]):
+    json.dump(data, sys.stdout, ensure_ascii=False, indent=indent, default=str)
+    sys.stdout.write("\n")
+
+
+def _word_summaries(words: List[Word]) -> List[Dict[str, Any]]:
+    return [word_to_record(word) for word in words]
+
+
+def cmd_import(manager: WordDataManager, args) -> Dict[str, Any]:
+    """从Excel导入单词"""
+    return manager.import_from_excel(args.file)
+
+
+def cmd_due(manager: WordDataManager, args) -> Dict[str, Any]:
+    """列出今日需要复习的单词（可附带今日新单词）"""
+    review_words = manager.sort_words_by_order(manager.get_today_review_words(), args.order)
+    result = {
+        "success": True,
+        "date": datetime.date.today().isoformat(),
+        "review_count": len(review_words),
+        "review_words": _word_summaries(review_words[:args.limit] if args.limit else review_words),
+    }
+    if args.new:
+        new_words = manager.sort_words_by_order(manager.get_today_new_words(), args.order)
+        result["new_count"] = len(new_words)
+        result["new_words"] = _word_summaries(new_words[:args.new])
+    return result
+
+
+def cmd_stats(manager: WordDataManager, args) -> Dict[str, Any]:
+    """输出学习统计"""
+    stats = manager.get_learning_statistics()
+    return {"success": True, "date": datetime.date.today().isoformat(), "statistics": stats}
+
+
+def cmd_export(manager: WordDataManager, args) -> Optional[Dict[str, Any]]:
+    """导出整个词库（直接读取存储记录，不构建Word对象）"""
+    manager.flush()
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else args.stdout
+    count = 0
+    try:
+        if args.format == "csv":
+            writer = csv.writer(out)
+            writer.writerow(RECORD_FIELDS)
+            for text, record in manager.store.items():
+                writer.writerow([text if name == "text" else record.get(name, RECORD_DEFAULTS.get(name))
+                                 for name in RECORD_FIELDS])
+                count += 1
+        else:
+            # 逐条写出，大词库也不需要先拼出完整的JSON字符串
+            out.write("[")
+            for text, record in manager.store.items():
+                out.write(",\n" if count else "\n")
+                out.write(json.dumps(dict(record, text=text), ensure_ascii=False))
+                count += 1
+            out.write("\n]\n")
+    finally:
+        if args.output:
+            out.close()
+    
+    if not args.output:
+        # 数据已写到标准输出，不再输出结果摘要
+        return None
+    return {"success": True, "format": args.format, "output": args.output, "count": count}
+
+
+def cmd_simulate(manager: WordDataManager, args) -> Dict[str, Any]:
+    """模拟未来若干天的复习负荷"""
+    start_date = datetime.date.fromisoformat(args.start) if args.start else None
+    days = simulate_deck(manager, days=args.days, added_per_day=args.add,
+                         daily_new=args.daily_new, daily_review=args.daily_review,
+                         start_date=start_date, seed=args.seed, level_load=args.level)
+    return {
+        "success": True,
+        "days": len(days),
+        "total_reviews": sum(day["reviews"] for day in days),
+        "peak_reviews": max((day["reviews"] for day in days), default=0),
+        "daily": days,
+    }
+
+
+def cmd_convert(manager: WordDataManager, args) -> Dict[str, Any]:
+    """把词库转换为JSON快照或二进制快照（由输出文件扩展名决定）"""
+    manager.flush()
+    words = {text: record for text, record in manager.store.items()}
+    data = dict(getattr(manager.store, "data", {"version": "3.1"}), words=words)
+    if os.path.splitext(args.output)[1].lower() in BINARY_EXTENSIONS:
+        size = binary_deck.write_deck(args.output, data)
+        output_format = "binary"
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        size = os.path.getsize(args.output)
+        output_format = "json"
+    return {"success": True, "format": output_format, "output": args.output,
+            "count": len(words), "bytes": size}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # 各子命令共用的选项
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data", default=DEFAULT_DATA_FILE,
+                        help=f"词库文件（.json 或 .db，默认 {DEFAULT_DATA_FILE}）")
+    common.add_argument("--indent", type=int, default=2, help="JSON缩进，0表示紧凑输出")
+    
+    parser = argparse.ArgumentParser(prog="main.py", description="艾宾浩斯AI单词本 - 命令行工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    import_parser = subparsers.add_parser("import", parents=[common], help="从Excel导入单词")
+    import_parser.add_argument("file", help="Excel文件路径")
+    import_parser.set_defaults(handler=cmd_import)
+    
+    due_parser = subparsers.add_parser("due", parents=[common], help="列出今日需要复习的单词")
+    due_parser.add_argument("--limit", type=int, default=0, help="最多列出的复习单词数，0表示全部")
+    due_parser.add_argument("--new", type=int, default=0, help="同时列出的今日新单词数")
+    due_parser.add_argument("--order", choices=WordDataManager.ORDER_MODES,
+                            default=WordDataManager.ORDER_MODES[0], help="排序方式")
+    due_parser.set_defaults(handler=cmd_due)
+    
+    stats_parser = subparsers.add_parser("stats", parents=[common], help="输出学习统计")
+    stats_parser.set_defaults(handler=cmd_stats)
+    
+    export_parser = subparsers.add_parser("export", parents=[common], help="导出词库")
+    export_parser.add_argument("--format", choices=["json", "csv"], default="json", help="导出格式")
+    export_parser.add_argument("--output", help="输出文件（默认输出到标准输出）")
+    export_parser.set_defaults(handler=cmd_export)
+    
+    simulate_parser = subparsers.add_parser("simulate", parents=[common], help="模拟未来的每日复习量")
+    simulate_parser.add_argument("--days", type=int, default=90, help="模拟天数")
+    simulate_parser.add_argument("--add", type=int, default=0, help="每天新加入词库的单词数")
+    simulate_parser.add_argument("--daily-new", type=int, help="每日新单词上限（默认取学习设置）")
+    simulate_parser.add_argument("--daily-review", type=int, help="每日复习上限（默认取学习设置）")
+    simulate_parser.add_argument("--start", help="模拟开始日期 YYYY-MM-DD（默认今天）")
+    simulate_parser.add_argument("--seed", type=int, help="随机种子")
+    simulate_parser.add_argument("--level", action="store_true", help="启用复习负荷均衡")
+    simulate_parser.set_defaults(handler=cmd_simulate)
+    
+    convert_parser = subparsers.add_parser("convert", parents=[common],
+                                           help="在JSON和二进制词库格式之间转换")
+    convert_parser.add_argument("output", help="输出文件（扩展名为 .deck/.bin 时写二进制快照，否则写JSON）")
+    convert_parser.set_defaults(handler=cmd_convert)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口，返回进程退出码"""
+    args = build_parser().parse_args(argv)
+    indent = args.indent or None
+    # 标准输出只留给JSON结果，数据模块打印的提示信息改到标准错误
+    args.stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        manager = WordDataManager(args.data)
+        try:
+            result = args.handler(manager, args)
+        except Exception as e:
+            result = {"success": False, "message": f"{args.command} 执行失败: {e}"}
+        finally:
+            manager.close()
+    
+    if result is not None:
+        _print_json(result, indent)
+        if not result.get("success", False):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
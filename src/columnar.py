@@ -0,0 +1,168 @@
+# src/columnar.py
+"""
+列式单词视图模块
+
+把词库的复习字段存成NumPy数组（每个字段一列），遗忘风险、到期掩码、
+掌握统计和报告直方图都可以用数组表达式一次算完。numpy为可选依赖。
+"""
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .sm2_algorithm import Word, np, forget_risk_array
+
+
+def _date_ordinal(value: Optional[str], default: int) -> int:
+    """ISO日期字符串转为日序号，缺失或格式错误时返回默认值"""
+    if not value:
+        return default
+    try:
+        return datetime.date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return default
+
+
+class WordColumns:
+    """词库的列式（struct-of-arrays）视图
+    
+    日期以日序号(date.toordinal())保存，last_reviewed为0表示从未复习。
+    通过set_word原地更新单行，容量不足时按倍数扩容。
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        capacity = max(capacity, 16)
+        self.texts: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._repetitions = np.zeros(capacity, np.int32)
+        self._interval = np.zeros(capacity, np.int32)
+        self._ease_factor = np.zeros(capacity, np.float64)
+        self._next_review = np.zeros(capacity, np.int32)
+        self._last_reviewed = np.zeros(capacity, np.int32)
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    @property
+    def repetitions(self):
+        return self._repetitions[:len(self.texts)]
+    
+    @property
+    def interval(self):
+        return self._interval[:len(self.texts)]
+    
+    @property
+    def ease_factor(self):
+        return self._ease_factor[:len(self.texts)]
+    
+    @property
+    def next_review(self):
+        return self._next_review[:len(self.texts)]
+    
+    @property
+    def last_reviewed(self):
+        return self._last_reviewed[:len(self.texts)]
+    
+    @classmethod
+    def from_records(cls, items: Iterable[Tuple[str, Dict[str, Any]]]) -> "WordColumns":
+        """从存储记录 (单词文本, 记录) 构建"""
+        items = list(items)
+        columns = cls(len(items))
+        tomorrow = (datetime.date.today() + datetime.timedelta(days=1)).toordinal()
+        count = len(items)
+        columns.texts = [text for text, _ in items]
+        columns._rows = {text: i for i, text in enumerate(columns.texts)}
+        columns._repetitions[:count] = [r.get("repetitions", 0) for _, r in items]
+        columns._interval[:count] = [r.get("interval", 1) for _, r in items]
+        columns._ease_factor[:count] = [r.get("ease_factor", 2.5) for _, r in items]
+        columns._next_review[:count] = [_date_ordinal(r.get("next_review"), tomorrow) for _, r in items]
+        columns._last_reviewed[:count] = [_date_ordinal(r.get("last_reviewed"), 0) for _, r in items]
+        return columns
+    
+    @classmethod
+    def from_arrays(cls, texts, rows, arrays: Dict[str, Any]) -> "WordColumns":
+        """
+        直接用各字段的数组构建
+        texts/rows: 单词列和 单词 -> 行号 的映射，可以是按需解码的对象（见mapped_deck.ColumnKeys）
+        """
+        count = len(texts)
+        columns = cls(count)
+        columns.texts = texts
+        columns._rows = rows
+        for name in ("repetitions", "interval", "ease_factor", "next_review", "last_reviewed"):
+            getattr(columns, "_" + name)[:count] = arrays[name]
+        return columns
+    
+    @classmethod
+    def from_words(cls, words: List[Word]) -> "WordColumns":
+        """从Word对象列表构建"""
+        columns = cls(len(words))
+        for word in words:
+            columns.set_word(word)
+        return columns
+    
+    def _grow(self):
+        """容量翻倍"""
+        for name in ("_repetitions", "_interval", "_ease_factor", "_next_review", "_last_reviewed"):
+            old = getattr(self, name)
+            new = np.zeros(len(old) * 2, old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+    
+    def set_word(self, word: Word):
+        """写入或更新一个单词所在的行"""
+        row = self._rows.get(word.text)
+        if row is None:
+            row = len(self.texts)
+            if row >= len(self._repetitions):
+                self._grow()
+            self.texts.append(word.text)
+            self._rows[word.text] = row
+        
+        self._repetitions[row] = word.repetitions
+        self._interval[row] = word.interval
+        self._ease_factor[row] = word.ease_factor
+        self._next_review[row] = word.next_review.toordinal()
+        self._last_reviewed[row] = word.last_reviewed.toordinal() if word.last_reviewed else 0
+    
+    def select(self, mask) -> List[str]:
+        """取出掩码为真的单词文本"""
+        texts = self.texts
+        return [texts[i] for i in np.flatnonzero(mask).tolist()]
+    
+    def forget_risk(self, today: datetime.date):
+        """所有单词的遗忘风险（与Word.calculate_forget_risk一致）"""
+        last_reviewed = self.last_reviewed
+        return forget_risk_array(self.repetitions, self.interval,
+                                 today.toordinal() - last_reviewed, last_reviewed > 0)
+    
+    def learned_mask(self):
+        """已学习过的单词"""
+        return self.repetitions > 0
+    
+    def due_mask(self, today: datetime.date):
+        """今日需要复习的单词（含逾期）"""
+        return self.learned_mask() & (self.next_review <= today.toordinal())
+    
+    def mastered_mask(self):
+        """已掌握的单词"""
+        return (self.repetitions >= 3) & (self.ease_factor >= 2.5)
+    
+    def high_risk_mask(self, today: datetime.date, threshold: float):
+        """遗忘风险不低于阈值且尚未到复习日期的已学习单词"""
+        return (self.learned_mask() & (self.next_review > today.toordinal()) &
+                (self.forget_risk(today) >= threshold))
+    
+    def summary(self, today: datetime.date, risk_threshold: float) -> Dict[str, Any]:
+        """计算LearningStatsAggregate所需的全部计数"""
+        learned = self.learned_mask()
+        reviewed = int(learned.sum())
+        return {
+            "total": len(self),
+            "new": len(self) - reviewed,
+            "reviewed": reviewed,
+            "mastered": int((learned & self.mastered_mask()).sum()),
+            "learning": int((learned & ~self.mastered_mask()).sum()),
+            "ease_sum": float(self.ease_factor[learned].sum()),
+            "total_reviews": int(self.repetitions.sum(dtype=np.int64)),
+            "today_learned": int((learned & (self.last_reviewed == today.toordinal())).sum()),
+            "forget_risk_words": int(self.high_risk_mask(today, risk_threshold).sum()),
+        }
@@ -3,147 +3,333 @@
 数据管理模块 - 修复版
 修复所有语法错误
 """
-import json
 import os
 import datetime
-from typing import List, Dict, Any, Optional
+import functools
+import random
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import traceback
 
-from .sm2_algorithm import Word, SM2Scheduler
+from .sm2_algorithm import Word, SM2Scheduler, NUMPY_AVAILABLE
+from .columnar import WordColumns
+from .indexes import LearningStatsAggregate
+from .load_leveler import LoadLeveler
+from .review_log import ReviewLog, log_path_for
+from .search import WordSearchIndex, scan_search
+from .storage import WordStore, open_store, record_to_word, word_to_record
+from .lazy_imports import get_pandas, is_available
+from .metrics import timed
 
-# 尝试导入pandas
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-    pd = None
+# pandas只在导入Excel时才真正导入
+PANDAS_AVAILABLE = is_available("pandas")
+
+
+def synchronized(method):
+    """在管理器的锁内执行方法（界面线程和后台刷新线程共用同一个管理器）"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class WordDataManager:
-    """单词数据管理器 - 修复版"""
+    """单词数据管理器 - 修复版
+    
+    持久化由存储后端(WordStore)负责，默认是JSON快照+日志，
+    文件扩展名为 .db/.sqlite 时使用SQLite。
+    """
     
-    def __init__(self, file_path: str = "data/word_data.json"):
+    # 学习顺序（界面下拉框的选项）
+    ORDER_MODES = ("顺序", "随机", "按记忆强度", "按复习次数", "按遗忘风险")
+    
+    def __init__(self, file_path: str = "data/word_data.json", store: Optional[WordStore] = None):
         self.file_path = file_path
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        self.data = self._load_data()
+        self.store = store if store is not None else open_store(file_path)
+        self._lock = threading.RLock()
+        # 身份映射：单词文本 -> Word对象，所有调用方共享同一个对象
+        self._words: Dict[str, Word] = {}
+        self._fully_loaded = False
+        # 列式视图（需要numpy），首次使用时构建
+        self._columns: Optional[WordColumns] = None
+        # 已修改但尚未写回的单词（按标记顺序写回，批量导入时保持原有顺序）
+        self._dirty: Dict[str, None] = {}
+        # 搜索索引，由build_search_index在后台构建，之后随保存增量更新
+        self._search_index: Optional[WordSearchIndex] = None
+        # 索引构建期间保存的 单词 -> 释义，装入索引时补上
+        self._search_index_pending: Optional[Dict[str, str]] = None
+        # 词库版本号：每次写回存储后加一，供报告等缓存判断数据是否变化
+        self.revision = 0
         self.scheduler = SM2Scheduler()
+        # 复习事件日志（词库文件旁的 .reviews 文件），首次使用时打开
+        self._review_log: Optional[ReviewLog] = None
+        
+        # 学习统计：首次查询时全量计算，之后随保存增量更新，跨天时重算
+        self._stats = LearningStatsAggregate()
     
-    def _load_data(self) -> Dict[str, Any]:
-        """从JSON文件加载数据"""
-        if os.path.exists(self.file_path):
-            try:
-                with open(self.file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                print(f"警告: {self.file_path} 格式错误，将使用空数据")
-                return {"words": {}, "version": "3.1"}
-            except Exception as e:
-                print(f"加载数据文件时出错: {e}")
-                return {"words": {}, "version": "3.1"}
-        return {"words": {}, "version": "3.1"}
+    @synchronized
+    def close(self):
+        """写回未保存的修改并关闭存储"""
+        self.flush()
+        self.store.close()
+        if self._review_log is not None:
+            self._review_log.close()
+    
+    @synchronized
+    def get_word(self, word_text: str) -> Optional[Word]:
+        """按单词文本获取Word对象（同一单词始终返回同一个对象）"""
+        word = self._words.get(word_text)
+        if word is not None:
+            return word
+        
+        word_dict = self.store.get(word_text)
+        if word_dict is None:
+            return None
+        try:
+            word = record_to_word(word_text, word_dict)
+        except Exception as e:
+            print(f"加载单词 '{word_text}' 时出错: {e}")
+            return None
+        self._words[word_text] = word
+        return word
+    
+    @synchronized
+    def mark_dirty(self, word: Word):
+        """标记单词已修改，等待下次flush写回"""
+        self._words[word.text] = word
+        self._dirty[word.text] = None
+    
+    @timed()
+    @synchronized
+    def flush(self) -> bool:
+        """把所有标记为已修改的单词写回存储"""
+        if not self._dirty:
+            return True
+        
+        stats_current = self._stats.day == datetime.date.today()
+        words = [self._words[text] for text in self._dirty]
+        # 旧记录要在写入前取出，用来撤销统计贡献（内存中的Word对象可能已被调度器原地修改）
+        old_words = []
+        if stats_current:
+            for word in words:
+                old_dict = self.store.get(word.text)
+                old_words.append(record_to_word(word.text, old_dict) if old_dict is not None else None)
+        
+        if not self.store.put_many([word_to_record(word) for word in words]):
+            # 写入失败：单词保持待写回状态，统计和索引都不变，下次flush重新计算
+            return False
+        
+        for i, word in enumerate(words):
+            if stats_current:
+                if old_words[i] is not None:
+                    self._stats.add(old_words[i], -1)
+                self._stats.add(word)
+            if self._columns is not None:
+                self._columns.set_word(word)
+            if self._search_index is not None:
+                self._search_index.update(word.text, word.meaning)
+            elif self._search_index_pending is not None:
+                self._search_index_pending[word.text] = word.meaning
+        
+        self._dirty.clear()
+        self.revision += 1
+        return True
     
+    @timed()
+    @synchronized
     def save_word(self, word: Word) -> bool:
         """保存或更新一个单词的数据"""
         try:
-            word_dict = {
-                "text": word.text,
-                "meaning": word.meaning,
-                "example": word.example,
-                "repetitions": word.repetitions,
-                "interval": word.interval,
-                "ease_factor": word.ease_factor,
-                "next_review": word.next_review.isoformat(),
-                "last_reviewed": word.last_reviewed.isoformat() if word.last_reviewed else None,
-                "created_at": word.created_at.isoformat(),
-                "forget_risk": word.forget_risk
-            }
-            self.data["words"][word.text] = word_dict
-            self._save_to_file()
-            return True
+            self.mark_dirty(word)
+            return self.flush()
         except Exception as e:
             print(f"保存单词时出错: {e}")
             return False
     
+    @timed()
+    @synchronized
+    def save_words(self, words: List[Word]) -> bool:
+        """批量保存单词，只写一次"""
+        try:
+            for word in words:
+                self.mark_dirty(word)
+            return self.flush()
+        except Exception as e:
+            print(f"批量保存单词时出错: {e}")
+            return False
+    
+    @timed()
+    @synchronized
+    def review_word(self, word: Word, quality: int) -> bool:
+        """按复习质量更新单词的复习计划并保存
+        
+        Word对象由所有调用方共享，后台刷新线程会同时读取，因此修改也在管理器的锁内进行。
+        """
+        self.scheduler.update_review_schedule(word, quality)
+        return self.save_word(word)
+    
+    @synchronized
+    def apply_reviews(self, reviews: List[Tuple[Word, int]],
+                      today: Optional[datetime.date] = None) -> bool:
+        """批量应用一组复习结果 [(单词, 质量)] 并一次性保存"""
+        return self.save_words(self.scheduler.update_many(reviews, today))
+    
+    @property
+    @synchronized
+    def review_log(self) -> ReviewLog:
+        """本词库的复习事件日志"""
+        if self._review_log is None:
+            self._review_log = ReviewLog(log_path_for(self.file_path))
+        return self._review_log
+    
+    def record_review(self, word: Word, mode: str, quality: int, attempt: int = 1,
+                      response_time: float = 0.0, answer: str = "") -> bool:
+        """记录一次答题（每次尝试都记录，包括之后重试的错误答案）"""
+        return self.review_log.append(word.text, mode, quality, attempt, response_time, answer)
+    
+    @timed()
+    @synchronized
     def load_words(self) -> List[Word]:
-        """加载所有单词为Word对象列表"""
-        word_objects = []
-        for word_text, word_dict in self.data.get("words", {}).items():
-            try:
-                # 处理日期字段
-                try:
-                    next_review = datetime.date.fromisoformat(word_dict.get("next_review", 
-                        (datetime.date.today() + datetime.timedelta(days=1)).isoformat()))
-                except (KeyError, ValueError):
-                    next_review = datetime.date.today() + datetime.timedelta(days=1)
-                
-                # 处理上次复习时间
-                last_reviewed = None
-                if word_dict.get("last_reviewed"):
+        """加载所有单词为Word对象列表（对象只构建一次，之后复用）"""
+        if not self._fully_loaded:
+            # 按存储顺序重建身份映射，已经构建过的对象原样保留
+            words = {}
+            for word_text, word_dict in self.store.items():
+                word = self._words.get(word_text)
+                if word is None:
                     try:
-                        last_reviewed = datetime.date.fromisoformat(word_dict["last_reviewed"])
-                    except (KeyError, ValueError):
-                        pass
-                
-                # 处理创建时间
-                try:
-                    created_at = datetime.date.fromisoformat(word_dict.get("created_at", 
-                        datetime.date.today().isoformat()))
-                except (KeyError, ValueError):
-                    created_at = datetime.date.today()
-                
-                # 创建Word对象
-                word = Word(
-                    text=word_dict.get("text", word_text),
-                    meaning=word_dict.get("meaning", ""),
-                    example=word_dict.get("example", ""),
-                    repetitions=word_dict.get("repetitions", 0),
-                    interval=word_dict.get("interval", 1),
-                    ease_factor=word_dict.get("ease_factor", 2.5),
-                    next_review=next_review,
-                    last_reviewed=last_reviewed,
-                    created_at=created_at,
-                    forget_risk=word_dict.get("forget_risk", 0.0)
-                )
-                word_objects.append(word)
-            except Exception as e:
-                print(f"加载单词 '{word_text}' 时出错: {e}")
-                continue
+                        word = record_to_word(word_text, word_dict)
+                    except Exception as e:
+                        print(f"加载单词 '{word_text}' 时出错: {e}")
+                        continue
+                words[word_text] = word
+            self._words = words
+            self._fully_loaded = True
         
-        return word_objects
+        return list(self._words.values())
     
-    def _save_to_file(self) -> bool:
-        """保存数据到文件"""
-        try:
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"保存数据时出错: {e}")
-            return False
+    @timed()
+    @synchronized
+    def columns(self) -> Optional[WordColumns]:
+        """词库的列式视图，numpy不可用时返回None"""
+        if not NUMPY_AVAILABLE:
+            return None
+        if self._columns is None:
+            self.flush()
+            self._columns = self.store.columns()
+        return self._columns
+    
+    @timed()
+    def search_index(self) -> WordSearchIndex:
+        """
+        单词和释义的搜索索引，还没有时构建（大词库需要几秒，界面在后台线程调用）
+        只在取出单词和装入索引时持有锁，构建期间的保存在装入时补进索引
+        """
+        with self._lock:
+            if self._search_index is not None:
+                return self._search_index
+            self.flush()
+            entries = [(text, record.get("meaning", "")) for text, record in self.store.items()]
+            if self._search_index_pending is None:
+                self._search_index_pending = {}
+        
+        index = WordSearchIndex.build(entries)
+        with self._lock:
+            if self._search_index is None:
+                for text, meaning in self._search_index_pending.items():
+                    index.update(text, meaning)
+                self._search_index = index
+                self._search_index_pending = None
+            return self._search_index
     
+    @timed()
+    @synchronized
+    def search_words(self, query: str, limit: int = 50,
+                     within: Optional[Iterable[str]] = None) -> List[Word]:
+        """
+        按单词（精确/前缀/拼写容错）或释义搜索单词
+        within: 只在这些单词中搜索（例如当前显示的分类），None表示整个词库
+        """
+        allowed = None if within is None else set(within)
+        if self._search_index is not None:
+            return self._get_words(self._search_index.search(query, limit, allowed))
+        
+        # 索引还没建好（在后台构建中），逐个扫描，结果与索引相同
+        if allowed is None:
+            entries = ((text, record.get("meaning", "")) for text, record in self.store.items())
+        else:
+            entries = ((text, record.get("meaning", "")) for text, record in
+                       ((text, self.store.get(text)) for text in allowed) if record is not None)
+        return self._get_words(scan_search(entries, query, limit, allowed))
+    
+    def _get_words(self, word_texts: List[str]) -> List[Word]:
+        """按单词文本列表取Word对象，跳过无法加载的"""
+        words = []
+        for word_text in word_texts:
+            word = self.get_word(word_text)
+            if word is not None:
+                words.append(word)
+        return words
+    
+    @timed()
+    @synchronized
     def get_today_new_words(self) -> List[Word]:
         """获取今日新单词（从未复习过的）"""
-        all_words = self.load_words()
-        new_words = [w for w in all_words if w.repetitions == 0]
-        return new_words
+        return self._get_words(self.store.new_keys())
     
+    @timed()
+    @synchronized
     def get_today_review_words(self) -> List[Word]:
-        """获取今日需要复习的单词"""
+        """获取今日需要复习的单词（包括逾期未复习的）"""
         today = datetime.date.today()
-        all_words = self.load_words()
-        
-        today_words = []
-        for word in all_words:
-            if word.next_review <= today and word.repetitions > 0:
-                today_words.append(word)
-        
-        return today_words
+        return self._get_words(self.store.due_keys(today))
     
+    @timed()
+    @synchronized
     def get_high_forget_risk_words(self, threshold: float = 0.6) -> List[Word]:
         """获取遗忘风险高的单词"""
-        all_words = self.load_words()
-        return self.scheduler.get_forgetting_curve_words(all_words, threshold)
+        # 先用索引或列式视图筛出候选，再由调度器计算风险并排序
+        today = datetime.date.today()
+        columns = None if self.store.indexed_risk_query else self.columns()
+        if columns is not None:
+            candidate_keys = columns.select(columns.high_risk_mask(today, threshold))
+        else:
+            candidate_keys = self.store.high_risk_keys(today, threshold)
+        candidates = self._get_words(candidate_keys)
+        return self.scheduler.get_forgetting_curve_words(candidates, threshold)
+    
+    @timed()
+    @synchronized
+    def sort_words_by_order(self, words: List[Word], order_mode: str) -> List[Word]:
+        """按照指定的顺序对单词列表进行排序（"随机"会原地打乱传入的列表）"""
+        if order_mode == "顺序":
+            return sorted(words, key=lambda w: w.text.lower())
+        elif order_mode == "随机":
+            random.shuffle(words)
+            return words
+        elif order_mode == "按记忆强度":
+            return sorted(words, key=lambda w: w.ease_factor, reverse=True)
+        elif order_mode == "按复习次数":
+            return sorted(words, key=lambda w: w.repetitions, reverse=True)
+        elif order_mode == "按遗忘风险":
+            risks = self.scheduler.forget_risks(words)
+            return [words[i] for i in sorted(range(len(words)), key=risks.__getitem__, reverse=True)]
+        else:
+            return words
+    
+    @synchronized
+    def set_load_leveling(self, enabled: bool):
+        """开启或关闭复习负荷均衡，开启时用词库当前的到期分布初始化均衡器"""
+        if not enabled:
+            self.scheduler.load_leveler = None
+            return
+        if self.scheduler.load_leveler is None:
+            self.flush()
+            leveler = LoadLeveler()
+            leveler.seed(self.store.due_histogram())
+            self.scheduler.load_leveler = leveler
     
     def format_time_since_last_review(self, word: Word) -> str:
         """格式化距上次复习时间"""
@@ -170,66 +356,45 @@ class WordDataManager:
         
         return " ".join(parts) if parts else "1天"
     
+    @timed()
+    @synchronized
     def get_learning_statistics(self) -> Dict[str, Any]:
         """获取学习统计数据"""
-        all_words = self.load_words()
-        total = len(all_words)
-        
-        if total == 0:
-            return {
-                "total_words": 0,
-                "mastered": 0,
-                "learning": 0,
-                "new": 0,
-                "due_today": 0,
-                "avg_ease_factor": 0.0,
-                "total_reviews": 0,
-                "reviewed_words": 0,
-                "forget_risk_words": 0
-            }
-        
         today = datetime.date.today()
-        mastered = 0
-        learning = 0
-        new_words = 0
-        due_today = 0
-        ease_sum = 0.0
-        reviewed_count = 0
-        total_reviews = 0
-        
-        for word in all_words:
-            total_reviews += word.repetitions
-            
-            if word.repetitions == 0:
-                new_words += 1
+        if self._stats.day != today:
+            columns = self.columns()
+            if columns is not None:
+                self._stats.load_summary(
+                    today, columns.summary(today, LearningStatsAggregate.RISK_THRESHOLD))
             else:
-                reviewed_count += 1
-                
-                if word.repetitions >= 3 and word.ease_factor >= 2.5:
-                    mastered += 1
-                else:
-                    learning += 1
-                
-                ease_sum += word.ease_factor
-            
-            if word.next_review <= today and word.repetitions > 0:
-                due_today += 1
-        
-        avg_ease = ease_sum / reviewed_count if reviewed_count > 0 else 0.0
+                self._stats.reset(today)
+                for word in self.load_words():
+                    self._stats.add(word)
         
-        # 计算遗忘风险单词数量
-        forget_risk_words = len(self.get_high_forget_risk_words(0.6))
+        return self._stats.to_dict(self.store.count_due(today))
+    
+    @timed()
+    @synchronized
+    def get_report_data(self) -> Dict[str, Any]:
+        """汇总学习报告需要的数据：统计信息和两个直方图的输入"""
+        self.flush()
+        stats = self.get_learning_statistics()
+        columns = self.columns()
+        if columns is not None:
+            # 复制一份，渲染线程读取时列式视图可能正在被原地更新
+            ease_factors = columns.ease_factor[columns.learned_mask()]
+            repetitions_counts = columns.repetitions.copy()
+        else:
+            words = self.load_words()
+            ease_factors = [w.ease_factor for w in words if w.repetitions > 0]
+            repetitions_counts = [w.repetitions for w in words]
         
         return {
-            "total_words": total,
-            "mastered": mastered,
-            "learning": learning,
-            "new": new_words,
-            "due_today": due_today,
-            "avg_ease_factor": round(avg_ease, 2),
-            "total_reviews": total_reviews,
-            "reviewed_words": reviewed_count,
-            "forget_risk_words": forget_risk_words
+            "revision": self.revision,
+            "date": datetime.date.today(),
+            "stats": stats,
+            "ease_factors": ease_factors,
+            "repetitions_counts": repetitions_counts,
         }
     
     def _normalize_column_name(self, col_name: str) -> Optional[str]:
@@ -263,9 +428,11 @@ class WordDataManager:
         
         return detected_columns
     
+    @timed()
     def import_from_excel(self, file_path: str) -> Dict[str, Any]:
         """从Excel文件批量导入单词"""
-        if not PANDAS_AVAILABLE or pd is None:
+        pd = get_pandas() if PANDAS_AVAILABLE else None
+        if pd is None:
             return {
                 "success": False,
                 "message": "pandas库未安装，无法导入Excel文件",
@@ -315,58 +482,49 @@ class WordDataManager:
                     "total_count": 0
                 }
             
-            imported_words = []
-            skipped_words = []
-            error_words = []
+            # 整列清洗：空值(NaN)视为空字符串，去除首尾空白
+            def clean_column(col_name):
+                col = df[col_name]
+                return col.where(col.notna(), "").astype(str).str.strip()
             
-            for i, (_, row) in enumerate(df.iterrows(), start=0):
-                try:
-                    # 获取行号（从2开始，因为Excel第一行是标题）
-                    row_num = i + 2
-                    
-                    # 获取数据
-                    word_text = str(row[column_mapping['word']]).strip()
-                    meaning_text = str(row[column_mapping['meaning']]).strip()
-                    
-                    if not word_text or not meaning_text:
-                        skipped_words.append(f"第{row_num}行: 单词或释义为空")
-                        continue
-                    
-                    # 获取例句
-                    example_text = ""
-                    if 'example' in column_mapping:
-                        example_val = row[column_mapping['example']]
-                        example_text = str(example_val).strip() if pd.notna(example_val) else ""
-                    
-                    # 检查单词是否已存在
-                    if word_text in self.data["words"]:
-                        skipped_words.append(f"第{row_num}行: '{word_text}' 已存在")
-                        continue
-                    
-                    # 创建新单词
-                    new_word = Word(
-                        text=word_text,
-                        meaning=meaning_text,
-                        example=example_text
-                    )
-                    new_word.next_review = datetime.date.today() + datetime.timedelta(days=1)
-                    
-                    if self.save_word(new_word):
-                        imported_words.append(word_text)
-                    else:
-                        error_words.append(f"第{row_num}行: '{word_text}' 保存失败")
-                        
-                except Exception as e:
-                    error_words.append(f"第{i+2}行: 处理失败 - {str(e)}")
+            word_col = clean_column(column_mapping['word'])
+            meaning_col = clean_column(column_mapping['meaning'])
+            if 'example' in column_mapping:
+                example_col = clean_column(column_mapping['example'])
+            else:
+                example_col = pd.Series("", index=df.index)
+            
+            # 跳过：单词或释义为空、已存在、或在本文件中重复出现
+            empty_mask = (word_col == "") | (meaning_col == "")
+            existing_mask = word_col.isin(self.store.keys())
+            valid_mask = ~(empty_mask | existing_mask)
+            duplicate_mask = valid_mask & word_col.where(valid_mask).duplicated(keep='first')
+            new_mask = valid_mask & ~duplicate_mask
+            
+            next_review = datetime.date.today() + datetime.timedelta(days=1)
+            new_words = [
+                Word(text=word_text, meaning=meaning_text, example=example_text,
+                     next_review=next_review)
+                for word_text, meaning_text, example_text in zip(
+                    word_col[new_mask], meaning_col[new_mask], example_col[new_mask])
+            ]
+            
+            # 所有新单词一次性写入
+            imported_words = [w.text for w in new_words]
+            error_count = 0
+            if new_words and not self.save_words(new_words):
+                imported_words = []
+                error_count = len(new_words)
+            skipped_count = int((~new_mask).sum())
             
             result = {
                 "success": True,
-                "message": f"导入完成。成功: {len(imported_words)}, 跳过: {len(skipped_words)}, 失败: {len(error_words)}",
+                "message": f"导入完成。成功: {len(imported_words)}, 跳过: {skipped_count}, 失败: {error_count}",
                 "new_count": len(imported_words),
                 "total_count": len(df),
                 "imported_words": imported_words[:10],
-                "skipped_count": len(skipped_words),
-                "error_count": len(error_words)
+                "skipped_count": skipped_count,
+                "error_count": error_count
             }
             
             return result
@@ -423,9 +581,29 @@ def test_data_manager():
     print(f"   已掌握: {stats['mastered']}")
     print(f"   遗忘风险单词: {stats['forget_risk_words']} 个")
     
+    # 测试日志重放
+    reloaded = WordDataManager("data/test_data.json")
+    assert reloaded.load_words()[0].repetitions == 3
+    print("✅ 日志重放测试通过")
+    
+    # 测试日志压缩
+    manager.close()
+    assert not os.path.exists(manager.store.journal_path)
+    assert len(WordDataManager("data/test_data.json").load_words()) == 1
+    print("✅ 日志压缩测试通过")
+    
+    # 测试SQLite后端（首次打开时自动从同名JSON迁移）
+    sqlite_manager = WordDataManager("data/test_data.db")
+    assert sqlite_manager.get_word("test").repetitions == 3
+    assert len(sqlite_manager.get_today_new_words()) == 0
+    sqlite_manager.close()
+    print("✅ SQLite后端测试通过")
+    
     # 清理测试文件
-    if os.path.exists("data/test_data.json"):
-        os.remove("data/test_data.json")
+    for path in ("data/test_data.json", manager.store.journal_path, "data/test_data.db",
+                 "data/test_data.db-wal", "data/test_data.db-shm"):
+        if os.path.exists(path):
+            os.remove(path)
     
     print("\n" + "=" * 60)
     print("数据管理模块测试完成")
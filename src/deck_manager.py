@@ -0,0 +1,335 @@
+# src/deck_manager.py
+"""
+多词库管理模块
+
+每个词库是一个独立的词库文件（JSON/二进制/SQLite均可），由自己的
+WordDataManager读写。DeckManager负责：
+- 登记词库（data/decks.json），并自动发现 data/decks/ 目录下的词库文件
+- 打开词库时才加载数据和索引，按最近使用顺序(LRU)在内存预算内关闭冷门词库
+- 为每个词库保存一份小的摘要（统计数据和到期日期直方图），
+  跨词库的到期数和统计直接用摘要回答，不需要加载每个词库
+"""
+import datetime
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .data_manager import WordDataManager, synchronized
+from .storage import BINARY_EXTENSIONS, MappedWordStore, SQLiteWordStore, SQLITE_EXTENSIONS
+
+DEFAULT_DECK_NAME = "默认词库"
+DEFAULT_DECK_FILE = "data/word_data.json"
+DECKS_DIR = "data/decks"
+REGISTRY_FILE = "data/decks.json"
+
+DECK_EXTENSIONS = (".json",) + BINARY_EXTENSIONS + SQLITE_EXTENSIONS
+
+# 摘要中可以跨天沿用的统计字段（其余字段与当天日期有关）
+STABLE_STAT_FIELDS = ("total_words", "mastered", "learning", "new", "avg_ease_factor",
+                      "total_reviews", "reviewed_words")
+
+
+def _file_signature(file_path: str) -> List[List[Any]]:
+    """词库文件及其日志的 (文件名, 大小, 修改时间)，用于判断摘要是否过期"""
+    candidates = (file_path, os.path.splitext(file_path)[0] + ".journal",
+                  file_path + ".journal", file_path + "-wal")
+    signature = []
+    for path in candidates:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+class DeckManager:
+    """管理多个词库，打开的词库按LRU在内存预算内保留
+    
+    内存占用按单词数粗略估算（见estimate_memory），当前词库不会被关闭。
+    重建摘要（可能要临时打开词库）时不持有锁，期间该词库不会被打开或关闭，
+    其他词库的列表、切换和新建不受影响。
+    """
+    
+    # 估算的每个单词常驻内存（字节）：记录字典、Word对象和索引
+    MEMORY_PER_WORD = 2048
+    MAPPED_MEMORY_PER_WORD = 256
+    SQLITE_MEMORY_PER_WORD = 512
+    
+    def __init__(self, registry_file: str = REGISTRY_FILE, decks_dir: str = DECKS_DIR,
+                 memory_budget: int = 256 * 1024 * 1024):
+        self.registry_file = registry_file
+        self.decks_dir = decks_dir
+        self.memory_budget = memory_budget
+        self._lock = threading.RLock()
+        # 正在锁外重建摘要的词库，重建完成时通知等待打开/关闭它的线程
+        self._summarizing: Set[str] = set()
+        self._summary_done = threading.Condition(self._lock)
+        self._paths: Dict[str, str] = {}  # 词库名 -> 文件路径
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+        self._open: "OrderedDict[str, WordDataManager]" = OrderedDict()  # 最近使用的在最后
+        self._summary_revisions: Dict[str, int] = {}  # 已打开词库的摘要对应的revision
+        self.current = DEFAULT_DECK_NAME
+        self._load_registry()
+        self._discover()
+    
+    def _load_registry(self):
+        """读取词库登记文件"""
+        if os.path.exists(self.registry_file):
+            try:
+                with open(self.registry_file, 'r', encoding='utf-8') as f:
+                    registry = json.load(f)
+                self._paths = dict(registry.get("decks", {}))
+                self._summaries = dict(registry.get("summaries", {}))
+                self.current = registry.get("current", self.current)
+            except Exception as e:
+                print(f"读取词库列表失败: {e}")
+        self._paths.setdefault(DEFAULT_DECK_NAME, DEFAULT_DECK_FILE)
+        if self.current not in self._paths:
+            self.current = DEFAULT_DECK_NAME
+    
+    def _discover(self):
+        """把词库目录下尚未登记的词库文件登记进来（以文件名为词库名）"""
+        if not os.path.isdir(self.decks_dir):
+            return
+        registered = {os.path.normpath(path) for path in self._paths.values()}
+        for file_name in sorted(os.listdir(self.decks_dir)):
+            name, extension = os.path.splitext(file_name)
+            path = os.path.join(self.decks_dir, file_name)
+            if extension.lower() in DECK_EXTENSIONS and os.path.normpath(path) not in registered:
+                self._paths.setdefault(name, path)
+    
+    @synchronized
+    def save_registry(self) -> bool:
+        """保存词库列表、当前词库和各词库摘要（先写临时文件再替换）"""
+        for name in self._open:
+            self._refresh_summary(name)
+        registry = {"current": self.current, "decks": self._paths, "summaries": self._summaries}
+        try:
+            os.makedirs(os.path.dirname(self.registry_file) or ".", exist_ok=True)
+            tmp_path = self.registry_file + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(registry, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.registry_file)
+            return True
+        except Exception as e:
+            print(f"保存词库列表失败: {e}")
+            return False
+    
+    # ---- 词库列表 ----
+    
+    @synchronized
+    def deck_names(self) -> List[str]:
+        """所有词库名，默认词库在最前"""
+        return sorted(self._paths, key=lambda name: (name != DEFAULT_DECK_NAME, name))
+    
+    @synchronized
+    def deck_path(self, name: str) -> str:
+        return self._paths[name]
+    
+    @synchronized
+    def add_deck(self, name: str, file_path: Optional[str] = None) -> str:
+        """登记一个词库（文件不存在时在第一次保存时创建），返回文件路径"""
+        name = name.strip()
+        if not name:
+            raise ValueError("词库名不能为空")
+        if name in self._paths:
+            raise ValueError(f"词库 '{name}' 已存在")
+        self._paths[name] = file_path or os.path.join(self.decks_dir, name + ".json")
+        self.save_registry()
+        return self._paths[name]
+    
+    @synchronized
+    def is_open(self, name: str) -> bool:
+        return name in self._open
+    
+    # ---- 打开与LRU淘汰 ----
+    
+    @synchronized
+    def open_deck(self, name: str) -> WordDataManager:
+        """打开词库（已打开时直接返回），并设为最近使用"""
+        if name not in self._paths:
+            raise KeyError(f"词库 '{name}' 不存在")
+        self._wait_for_summary(name)
+        manager = self._open.get(name)
+        if manager is None:
+            manager = WordDataManager(self._paths[name])
+            self._open[name] = manager
+        self._open.move_to_end(name)
+        self._evict()
+        return manager
+    
+    @synchronized
+    def switch_to(self, name: str) -> WordDataManager:
+        """打开词库并设为当前词库"""
+        manager = self.open_deck(name)
+        self.current = name
+        return manager
+    
+    @synchronized
+    def current_manager(self) -> WordDataManager:
+        return self.open_deck(self.current)
+    
+    def estimate_memory(self, manager: WordDataManager) -> int:
+        """已打开词库的粗略内存占用（字节）"""
+        store = manager.store
+        if isinstance(store, MappedWordStore):
+            per_word = self.MAPPED_MEMORY_PER_WORD
+        elif isinstance(store, SQLiteWordStore):
+            per_word = self.SQLITE_MEMORY_PER_WORD
+        else:
+            per_word = self.MEMORY_PER_WORD
+        return len(store) * per_word
+    
+    @synchronized
+    def memory_usage(self) -> int:
+        """所有已打开词库的估算内存占用"""
+        return sum(self.estimate_memory(manager) for manager in self._open.values())
+    
+    def _evict(self):
+        """超出内存预算时从最久未使用的词库开始关闭（当前词库和最近打开的词库除外）"""
+        usage = {name: self.estimate_memory(manager) for name, manager in self._open.items()}
+        total = sum(usage.values())
+        for name in list(self._open)[:-1]:
+            if total <= self.memory_budget:
+                break
+            if name == self.current:
+                continue
+            self.close_deck(name)
+            total -= usage[name]
+    
+    @synchronized
+    def close_deck(self, name: str):
+        """写回并关闭一个已打开的词库，保留它的摘要"""
+        self._wait_for_summary(name)
+        manager = self._open.pop(name, None)
+        if manager is None:
+            return
+        summary = self._build_summary(manager)
+        manager.close()
+        # 关闭（JSON词库会压缩日志）之后文件才定型，这时记录签名
+        summary["signature"] = _file_signature(self._paths[name])
+        self._summaries[name] = summary
+        self._summary_revisions.pop(name, None)
+    
+    @synchronized
+    def close(self):
+        """关闭所有词库并保存词库列表"""
+        for name in list(self._open):
+            self.close_deck(name)
+        self.save_registry()
+    
+    # ---- 摘要 ----
+    
+    @staticmethod
+    def _build_summary(manager: WordDataManager) -> Dict[str, Any]:
+        manager.flush()
+        stats = manager.get_learning_statistics()
+        histogram = manager.store.due_histogram()
+        return {
+            "date": datetime.date.today().isoformat(),
+            "statistics": stats,
+            "due_histogram": {day.isoformat(): count for day, count in sorted(histogram.items())},
+        }
+    
+    def _refresh_summary(self, name: str):
+        """已打开词库的摘要只在词库有变化（revision改变）或跨天时重算"""
+        manager = self._open[name]
+        summary = self._summaries.get(name)
+        revision = manager.revision
+        if (summary is None or summary.get("date") != datetime.date.today().isoformat() or
+                self._summary_revisions.get(name) != revision):
+            summary = self._build_summary(manager)
+            self._summaries[name] = summary
+            self._summary_revisions[name] = revision
+    
+    def _wait_for_summary(self, name: str):
+        """等待该词库在其他线程中的摘要重建完成（调用方持有锁）"""
+        self._summary_done.wait_for(lambda: name not in self._summarizing)
+    
+    def summary(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        词库摘要：已打开的词库按需重算；未打开的词库使用保存的摘要，
+        文件在外部被修改过（签名不一致）或从未打开过时临时打开一次重建
+        需要重建时只在锁内判断和保存结果，计算本身不持有锁
+        """
+        with self._lock:
+            self._wait_for_summary(name)
+            path = self._paths[name]
+            manager = self._open.get(name)
+            summary = self._summaries.get(name)
+            if manager is not None:
+                revision = manager.revision
+                if (summary is not None and summary.get("date") == datetime.date.today().isoformat()
+                        and self._summary_revisions.get(name) == revision):
+                    return summary
+            elif summary is not None and summary.get("signature") == _file_signature(path):
+                return summary
+            elif not os.path.exists(path):
+                return None
+            self._summarizing.add(name)
+        
+        summary = None
+        try:
+            if manager is not None:
+                summary = self._build_summary(manager)
+            else:
+                # 临时打开重建摘要，不挤占LRU中的词库
+                temporary = WordDataManager(path)
+                try:
+                    summary = self._build_summary(temporary)
+                finally:
+                    temporary.close()
+                summary["signature"] = _file_signature(path)
+        finally:
+            with self._lock:
+                self._summarizing.discard(name)
+                if summary is not None:
+                    self._summaries[name] = summary
+                    if manager is not None:
+                        self._summary_revisions[name] = revision
+                self._summary_done.notify_all()
+        return summary
+    
+    @staticmethod
+    def _due_count(summary: Dict[str, Any], day: datetime.date) -> int:
+        """按到期日期直方图计算某天（含逾期）待复习的单词数"""
+        day = day.isoformat()
+        return sum(count for due, count in summary.get("due_histogram", {}).items() if due <= day)
+    
+    def due_counts(self, day: Optional[datetime.date] = None) -> Dict[str, int]:
+        """各词库在day（默认今天）待复习的单词数"""
+        day = day or datetime.date.today()
+        counts = {}
+        for name in self.deck_names():
+            summary = self.summary(name)
+            counts[name] = self._due_count(summary, day) if summary else 0
+        return counts
+    
+    def deck_statistics(self, name: str) -> Dict[str, Any]:
+        """
+        单个词库的统计（与WordDataManager.get_learning_statistics字段相同）
+        摘要不是今天的时，与日期有关的字段（今日已学、高遗忘风险）为None
+        """
+        summary = self.summary(name)
+        if summary is None:
+            return {field: 0 for field in STABLE_STAT_FIELDS + ("due_today", "today_learned")}
+        stats = dict(summary["statistics"])
+        if summary.get("date") != datetime.date.today().isoformat():
+            stats["today_learned"] = 0
+            stats["forget_risk_words"] = None
+        stats["due_today"] = self._due_count(summary, datetime.date.today())
+        return stats
+    
+    def total_statistics(self) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """所有词库的合计统计，以及各词库的统计（词库列表取快照，各摘要在锁外重建）"""
+        per_deck = {name: self.deck_statistics(name) for name in self.deck_names()}
+        totals: Dict[str, Any] = {}
+        for field in ("total_words", "mastered", "learning", "new", "total_reviews",
+                      "reviewed_words", "due_today", "today_learned", "forget_risk_words"):
+            totals[field] = sum(stats.get(field) or 0 for stats in per_deck.values())
+        reviewed = totals["reviewed_words"]
+        ease_sum = sum((stats.get("avg_ease_factor") or 0) * (stats.get("reviewed_words") or 0)
+                       for stats in per_deck.values())
+        totals["avg_ease_factor"] = round(ease_sum / reviewed, 2) if reviewed else 0
+        return totals, per_deck
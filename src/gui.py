@@ -4,37 +4,44 @@
 完整修复版：解决所有问题
 """
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import base64
 import datetime
 import json
 import os
 import sys
-import random
+import time
 
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-
-from .data_manager import WordDataManager, SM2Scheduler
+# matplotlib在第一次打开学习报告时才导入（见lazy_imports）
+from .lazy_imports import is_available, warm_up_in_background
+from .data_manager import WordDataManager
+from .deck_manager import DeckManager
 from .sm2_algorithm import Word, AIEvaluator
+from .word_list import VirtualWordList
+from .background import CoalescingWorker, run_in_background
+from .report import ReportRenderer, SCREEN_DPI, EXPORT_DPI
+from . import metrics
+from .metrics import timed
 class VocabularyTutorGUI:
     """AI单词辅导系统图形界面"""
     
+    # 搜索框停止输入多久后开始搜索（毫秒），以及最多显示的搜索结果数
+    SEARCH_DEBOUNCE_MS = 200
+    SEARCH_LIMIT = 500
+    
     def __init__(self, root):
         self.root = root
         self.root.title("艾宾浩斯AI单词本 - 智能测验系统")
         self.root.geometry("1200x800")
         self.root.configure(bg="#f5f5f5")
         
-        # 核心组件
-        self.data_manager = WordDataManager()
-        self.scheduler = SM2Scheduler()
+        # 核心组件：多个词库由DeckManager管理，data_manager始终是当前词库
+        self.deck_manager = DeckManager()
+        self.data_manager = self.deck_manager.current_manager()
+        # 与数据管理器共用调度器，负荷均衡设置对答题和批量复习同时生效
+        self.scheduler = self.data_manager.scheduler
         self.ai_evaluator = AIEvaluator()
+        self.report_renderer = ReportRenderer(self.data_manager)
         
         # 学习状态
         self.learning_mode = False
@@ -48,6 +55,8 @@ class VocabularyTutorGUI:
         self.allow_retry = False
         self.current_attempt = 0
         self.max_attempts = 2
+        # 本次作答的开始时间（显示单词或重试提示时），用于记录作答用时
+        self.answer_started_at = time.perf_counter()
         self.wrong_words_this_round = []
         self.is_review_phase = False
         
@@ -73,6 +82,23 @@ class VocabularyTutorGUI:
         self.refresh_word_categories()
         self.refresh_display()
         self.update_statistics()
+        self.warm_search_index()
+        
+        # 答题后的统计和列表刷新在后台线程计算
+        self.refresh_worker = CoalescingWorker(
+            self.root, self._compute_refresh, self._apply_refresh, name="refresh-worker")
+        
+        # 关闭窗口时压缩数据日志
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # 窗口显示后再在后台预加载matplotlib/pandas
+        self.root.after(1000, warm_up_in_background)
+    
+    def on_close(self):
+        """关闭程序前保存数据"""
+        self.refresh_worker.stop()
+        self.deck_manager.close()
+        self.root.destroy()
     
     def setup_ui(self):
         """设置用户界面"""
@@ -118,13 +144,31 @@ class VocabularyTutorGUI:
         ttk.Label(plan_frame, text="学习顺序:", font=("微软雅黑", 10)).grid(row=0, column=4, sticky="w", padx=5, pady=5)
         self.order_var = tk.StringVar(value="顺序")
         order_combo = ttk.Combobox(plan_frame, textvariable=self.order_var, 
-                                  values=["顺序", "随机", "按记忆强度", "按复习次数", "按遗忘风险"], 
+                                  values=list(WordDataManager.ORDER_MODES), 
                                   width=12, state="readonly")
         order_combo.grid(row=0, column=5, padx=5, pady=5)
         
+        # 复习负荷均衡：在目标日期附近挑选到期单词较少的一天
+        self.level_load_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(plan_frame, text="均衡每日复习量", 
+                        variable=self.level_load_var).grid(row=0, column=6, padx=5, pady=5)
+        
         # 保存设置按钮
         ttk.Button(plan_frame, text="保存设置", 
-                  command=self.save_study_settings, width=10).grid(row=0, column=6, padx=5, pady=5)
+                  command=self.save_study_settings, width=10).grid(row=0, column=7, padx=5, pady=5)
+        
+        # 词库选择
+        ttk.Label(plan_frame, text="当前词库:", font=("微软雅黑", 10)).grid(row=1, column=0, sticky="w", padx=5, pady=5)
+        self.deck_var = tk.StringVar(value=self.deck_manager.current)
+        self.deck_combo = ttk.Combobox(plan_frame, textvariable=self.deck_var,
+                                       values=self.deck_manager.deck_names(),
+                                       width=12, state="readonly")
+        self.deck_combo.grid(row=1, column=1, padx=5, pady=5)
+        self.deck_combo.bind("<<ComboboxSelected>>", self.switch_deck)
+        ttk.Button(plan_frame, text="新建词库", 
+                  command=self.create_deck, width=10).grid(row=1, column=2, padx=5, pady=5)
+        self.deck_summary_label = ttk.Label(plan_frame, text="", font=("微软雅黑", 9), foreground="#7f8c8d")
+        self.deck_summary_label.grid(row=1, column=3, columnspan=5, sticky="w", padx=5, pady=5)
         
         # 3. 功能按钮栏
         self.button_frame = ttk.Frame(self.root, padding="10")
@@ -141,6 +185,8 @@ class VocabularyTutorGUI:
                   command=self.show_progress_report, width=15).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.button_frame, text="🔄 刷新列表", 
                   command=self.refresh_display, width=15).pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.button_frame, text="🩺 性能诊断", 
+                  command=self.show_diagnostics, width=15).pack(side=tk.LEFT, padx=5)
         
         # 单词列表显示控制
         control_frame = ttk.Frame(self.button_frame)
@@ -172,6 +218,16 @@ class VocabularyTutorGUI:
         self.list_frame = ttk.LabelFrame(self.main_frame, text="📖 单词列表", padding="10")
         self.list_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
         
+        # 搜索框：输入停顿后再通过搜索索引过滤列表
+        search_frame = ttk.Frame(self.list_frame)
+        search_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="🔍 搜索:", font=("微软雅黑", 9)).pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        search_entry.bind("<KeyRelease>", self.on_search_changed)
+        self._search_after_id = None
+        
         # 单词列表表格
         columns = ('单词', '释义', '状态', '复习情况')
         self.word_tree = ttk.Treeview(self.list_frame, columns=columns, show='headings', height=25)
@@ -187,9 +243,9 @@ class VocabularyTutorGUI:
         self.word_tree.column('状态', width=80)
         self.word_tree.column('复习情况', width=200)
         
-        # 滚动条
-        tree_scroll = ttk.Scrollbar(self.list_frame, orient=tk.VERTICAL, command=self.word_tree.yview)
-        self.word_tree.configure(yscrollcommand=tree_scroll.set)
+        # 滚动条（由虚拟列表接管，只渲染可见的行）
+        tree_scroll = ttk.Scrollbar(self.list_frame, orient=tk.VERTICAL)
+        self.word_list = VirtualWordList(self.word_tree, tree_scroll)
         
         self.word_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
@@ -281,11 +337,16 @@ class VocabularyTutorGUI:
             self.show_list_btn.config(text="显示列表")
             self.list_frame.pack_forget()
     
+    def collect_word_categories(self, manager):
+        """获取词库的 (今日新单词, 今日复习单词, 高遗忘风险单词)"""
+        return (manager.get_today_new_words(),
+                manager.get_today_review_words(),
+                manager.get_high_forget_risk_words(0.6))
+    
     def refresh_word_categories(self):
         """刷新单词分类数据"""
-        self.today_new_words = self.data_manager.get_today_new_words()
-        self.today_review_words = self.data_manager.get_today_review_words()
-        self.high_forget_words = self.data_manager.get_high_forget_risk_words(0.6)
+        self.today_new_words, self.today_review_words, self.high_forget_words = \
+            self.collect_word_categories(self.data_manager)
     
     def load_study_settings(self):
         """加载学习设置"""
@@ -298,6 +359,8 @@ class VocabularyTutorGUI:
                 self.new_words_var.set(settings.get("每日新单词数", 20))
                 self.review_words_var.set(settings.get("每日复习单词数", 50))
                 self.order_var.set(settings.get("学习顺序", "顺序"))
+                self.level_load_var.set(settings.get("复习负荷均衡", False))
+                self.data_manager.set_load_leveling(self.level_load_var.get())
             except Exception as e:
                 print(f"加载设置失败: {e}")
     
@@ -306,8 +369,10 @@ class VocabularyTutorGUI:
         settings = {
             "每日新单词数": self.new_words_var.get(),
             "每日复习单词数": self.review_words_var.get(),
-            "学习顺序": self.order_var.get()
+            "学习顺序": self.order_var.get(),
+            "复习负荷均衡": self.level_load_var.get()
         }
+        self.data_manager.set_load_leveling(self.level_load_var.get())
         
         settings_file = "data/study_settings.json"
         os.makedirs(os.path.dirname(settings_file), exist_ok=True)
@@ -317,114 +382,214 @@ class VocabularyTutorGUI:
         messagebox.showinfo("设置保存", "学习设置已保存！")
         self.update_status("学习设置已更新")
     
-    def sort_words_by_order(self, words, order_mode):
-        """按照指定的顺序对单词列表进行排序"""
-        if order_mode == "顺序":
-            return sorted(words, key=lambda w: w.text.lower())
-        elif order_mode == "随机":
-            random.shuffle(words)
-            return words
-        elif order_mode == "按记忆强度":
-            return sorted(words, key=lambda w: w.ease_factor, reverse=True)
-        elif order_mode == "按复习次数":
-            return sorted(words, key=lambda w: w.repetitions, reverse=True)
-        elif order_mode == "按遗忘风险":
-            return sorted(words, key=lambda w: w.forget_risk, reverse=True)
+    def format_word_row(self, word):
+        """单词列表中一行的显示内容"""
+        # 确定状态
+        if word.repetitions == 0:
+            status = "新单词"
+        elif word.repetitions >= 3 and word.ease_factor >= 2.5:
+            status = "已掌握"
         else:
-            return words
-    
-    def refresh_display(self):
-        """刷新单词列表显示"""
-        # 清空现有项
-        for item in self.word_tree.get_children():
-            self.word_tree.delete(item)
+            status = "学习中"
         
-        # 根据显示模式获取单词
-        display_mode = self.display_mode_var.get()
+        # 获取复习情况
+        if word.repetitions == 0:
+            review_info = "未学习"
+        else:
+            time_since = self.data_manager.format_time_since_last_review(word)
+            if time_since == "未复习":
+                # 如果已经复习过但显示未复习，显示复习次数
+                review_info = f"复习{word.repetitions}次"
+            else:
+                review_info = f"复习{word.repetitions}次 | 距上次: {time_since}"
+        
+        return (
+            word.text,
+            word.meaning[:20] + "..." if len(word.meaning) > 20 else word.meaning,
+            status,
+            review_info
+        )
+    
+    @timed()
+    def collect_display_words(self, manager, display_mode, order_mode, fixed_new_words,
+                              fixed_review_words, search_query=""):
+        """
+        按显示模式从词库manager取出并排序要显示的单词，有搜索词时只在该模式的单词中搜索
+        不访问任何界面控件，可以在后台线程调用
+        返回 (单词列表, 显示说明, 重新获取的单词分类或None)
+        """
+        categories = None
         
         if display_mode == "所有单词":
-            words = self.data_manager.load_words()
+            words = manager.load_words()
             display_text = "所有单词"
             
         elif display_mode == "今日新单词":
             # 如果今日新单词已固定，显示固定列表
-            if hasattr(self, 'fixed_new_words') and self.fixed_new_words:
-                words = self.fixed_new_words
+            if fixed_new_words:
+                words = fixed_new_words
                 display_text = "今日新单词 (已固定)"
             else:
                 # 否则显示当前的新单词
-                self.refresh_word_categories()
-                words = self.today_new_words
+                categories = self.collect_word_categories(manager)
+                words = categories[0]
                 display_text = "今日新单词"
             
         elif display_mode == "今日复习单词":
             # 如果今日复习单词已固定，显示固定列表
-            if hasattr(self, 'fixed_review_words') and self.fixed_review_words:
-                words = self.fixed_review_words
+            if fixed_review_words:
+                words = fixed_review_words
                 display_text = "今日复习单词 (已固定)"
             else:
                 # 否则显示当前的复习单词
-                self.refresh_word_categories()
-                words = self.today_review_words
+                categories = self.collect_word_categories(manager)
+                words = categories[1]
                 display_text = "今日复习单词"
             
         else:  # 高遗忘风险
-            self.refresh_word_categories()
-            words = self.high_forget_words
+            categories = self.collect_word_categories(manager)
+            words = categories[2]
             display_text = "高遗忘风险单词"
         
-        # 对单词进行排序
-        order_mode = self.order_var.get()
-        words = self.sort_words_by_order(words, order_mode)
-        
-        # 显示单词列表
-        for word in words:
-            # 确定状态
-            if word.repetitions == 0:
-                status = "新单词"
-            elif word.repetitions >= 3 and word.ease_factor >= 2.5:
-                status = "已掌握"
-            else:
-                status = "学习中"
-            
-            # 获取复习情况
-            if word.repetitions == 0:
-                review_info = "未学习"
-            else:
-                time_since = self.data_manager.format_time_since_last_review(word)
-                if time_since == "未复习":
-                    # 如果已经复习过但显示未复习，显示复习次数
-                    review_info = f"复习{word.repetitions}次"
-                else:
-                    review_info = f"复习{word.repetitions}次 | 距上次: {time_since}"
-            
-            self.word_tree.insert('', tk.END, values=(
-                word.text,
-                word.meaning[:20] + "..." if len(word.meaning) > 20 else word.meaning,
-                status,
-                review_info
-            ))
+        search_query = search_query.strip()
+        if search_query:
+            # 先限定在当前模式的单词中再取前SEARCH_LIMIT个，整个词库时不需要限定
+            within = None if display_mode == "所有单词" else {word.text for word in words}
+            words = manager.search_words(search_query, self.SEARCH_LIMIT, within)
+            display_text = f"{display_text}，搜索“{search_query}”"
+        # 对单词进行排序（复制一份，避免打乱固定列表）
+        words = manager.sort_words_by_order(list(words), order_mode)
+        return words, display_text, categories
+    
+    @timed()
+    def show_display_words(self, words, display_text, categories=None):
+        """把单词列表显示到界面上"""
+        if categories is not None:
+            self.today_new_words, self.today_review_words, self.high_forget_words = categories
+        
+        # 显示单词列表（只渲染可见的行，行内容按需生成）
+        words_by_text = {word.text: word for word in words}
+        self.word_list.set_items([word.text for word in words],
+                                 lambda text: self.format_word_row(words_by_text[text]))
         
         self.update_status(f"已加载 {len(words)} 个单词 ({display_text})")
     
+    @timed()
+    def refresh_display(self):
+        """刷新单词列表显示"""
+        self.show_display_words(*self.collect_display_words(
+            self.data_manager, self.display_mode_var.get(), self.order_var.get(),
+            self.fixed_new_words, self.fixed_review_words, self.search_var.get()))
+    
+    def warm_search_index(self):
+        """在后台构建当前词库的搜索索引，建好之前搜索逐个扫描单词"""
+        def done(result):
+            if isinstance(result, Exception):
+                print(f"构建搜索索引失败: {result}")
+        
+        run_in_background(self.root, self.data_manager.search_index, done, name="search-index")
+    
+    def on_search_changed(self, event=None):
+        """搜索框内容变化：停止输入SEARCH_DEBOUNCE_MS毫秒后再刷新列表"""
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(self.SEARCH_DEBOUNCE_MS, self._apply_search)
+    
+    def _apply_search(self):
+        self._search_after_id = None
+        self.refresh_display()
+    
+    @timed()
     def update_statistics(self):
         """更新学习统计信息 - 修复版"""
         try:
             stats = self.data_manager.get_learning_statistics()
+        except Exception as e:
+            print(f"更新统计失败: {e}")
+            stats = None
+        self.show_statistics(stats)
+        self.update_deck_summary()
+    
+    def update_deck_summary(self):
+        """在后台汇总所有词库的统计（来自各词库的摘要），显示在词库选择旁边"""
+        def show(result):
+            if isinstance(result, Exception):
+                print(f"汇总词库统计失败: {result}")
+                return
+            totals, per_deck = result
+            due = "，".join(f"{name} {stats['due_today']}" for name, stats in per_deck.items()
+                           if stats['due_today'])
+            self.deck_summary_label.config(
+                text=f"全部{len(per_deck)}个词库: 共{totals['total_words']}词，"
+                     f"今日待复习{totals['due_today']}个" + (f"（{due}）" if due else ""))
+        
+        run_in_background(self.root, self.deck_manager.total_statistics, show, name="deck-summary")
+    
+    def switch_deck(self, event=None):
+        """切换当前词库（正在学习时需要确认，切换后结束本轮学习）"""
+        name = self.deck_var.get()
+        if name == self.deck_manager.current:
+            return
+        if self.learning_mode and not messagebox.askyesno("切换词库", "切换词库将结束当前的学习，确定切换吗？"):
+            self.deck_var.set(self.deck_manager.current)
+            return
+        
+        try:
+            self.data_manager.flush()
+            self.data_manager = self.deck_manager.switch_to(name)
+        except Exception as e:
+            messagebox.showerror("切换词库失败", f"无法打开词库 '{name}': {e}")
+            self.deck_var.set(self.deck_manager.current)
+            return
+        self.scheduler = self.data_manager.scheduler
+        self.report_renderer = ReportRenderer(self.data_manager)
+        self.data_manager.set_load_leveling(self.level_load_var.get())
+        
+        # 结束当前学习，清空上一个词库的固定单词列表
+        self.learning_mode = False
+        self.current_learning_words = []
+        self.current_index = 0
+        self.wrong_words_this_round = []
+        self.fixed_new_words = []
+        self.fixed_review_words = []
+        self.current_word_label.config(text="点击'开始今日学习'按钮开始")
+        self.feedback_label.config(text="")
+        self.answer_entry.config(state=tk.NORMAL)
+        self.answer_entry.delete(0, tk.END)
+        
+        self.refresh_word_categories()
+        self.refresh_display()
+        self.update_statistics()
+        self.warm_search_index()
+        self.update_status(f"已切换到词库: {name}")
+    
+    def create_deck(self):
+        """新建一个空词库并切换过去"""
+        name = simpledialog.askstring("新建词库", "词库名称:", parent=self.root)
+        if not name:
+            return
+        try:
+            path = self.deck_manager.add_deck(name)
+        except ValueError as e:
+            messagebox.showerror("新建词库失败", str(e))
+            return
+        self.deck_combo.config(values=self.deck_manager.deck_names())
+        self.deck_var.set(name.strip())
+        self.switch_deck()
+        self.update_status(f"已新建词库: {name.strip()}（{path}）")
+    
+    @timed()
+    def show_statistics(self, stats):
+        """把统计数据显示到统计面板，stats为None表示获取失败"""
+        try:
+            if stats is None:
+                raise ValueError("没有统计数据")
             
             # 累计学习单词 = 已学习单词数（复习次数>0）
             learned_words = stats.get('reviewed_words', 0)
             
-            # 计算今日已学习的单词
-            today_learned = 0
-            all_words = self.data_manager.load_words()
-            for word in all_words:
-                if word.repetitions > 0 and word.last_reviewed and word.last_reviewed == datetime.date.today():
-                    today_learned += 1
-            
-            # 确保今日已学习单词不会超过总学习单词
-            if today_learned > learned_words:
-                today_learned = learned_words
+            # 今日已学习的单词
+            today_learned = stats.get('today_learned', 0)
             
             # 创建统计显示文本
             stats_display = f"""📊 学习统计概览
@@ -461,6 +626,41 @@ class VocabularyTutorGUI:
             self.stats_text.insert(1.0, "📊 学习统计\n暂时无法获取统计数据，请稍后再试。")
             self.stats_text.config(state=tk.DISABLED)
     
+    def request_refresh(self):
+        """请求在后台刷新统计和单词列表，连续多次请求会合并为一次"""
+        self.refresh_worker.request(self.data_manager, self.display_mode_var.get(),
+                                    self.order_var.get(), self.fixed_new_words,
+                                    self.fixed_review_words, self.search_var.get())
+    
+    @timed()
+    def _compute_refresh(self, manager, display_mode, order_mode, fixed_new_words,
+                         fixed_review_words, search_query):
+        """后台线程：计算统计数据和要显示的单词，结果附带词库和开始计算时的revision"""
+        revision = manager.revision
+        stats = manager.get_learning_statistics()
+        display = self.collect_display_words(manager, display_mode, order_mode,
+                                             fixed_new_words, fixed_review_words, search_query)
+        return manager, revision, stats, display
+    
+    @timed()
+    def _apply_refresh(self, result):
+        """主线程：显示后台计算的结果，过期的结果直接丢弃"""
+        manager, revision, stats, display = result
+        if manager is not self.data_manager:
+            # 切换词库之前开始的计算，切换时已经同步刷新过
+            return
+        if revision != manager.revision:
+            # 计算期间词库又有写入，结果可能只包含一部分修改，重新计算
+            self.request_refresh()
+            return
+        self.show_statistics(stats)
+        self.show_display_words(*display)
+    
+    def save_review(self, word: Word, quality: int):
+        """按复习质量更新并保存单词；写入失败时单词保持待保存状态，在状态栏提示（下次保存时会重试）"""
+        if not self.data_manager.review_word(word, quality):
+            self.update_status(f"⚠️ 单词 '{word.text}' 的复习记录未能写入词库文件，将在下次保存时重试")
+    
     def update_status(self, message):
         """更新状态栏"""
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
@@ -534,7 +734,9 @@ class VocabularyTutorGUI:
                 return
             
             new_word = Word(text=word_text, meaning=meaning_text, example=example_text)
-            self.data_manager.save_word(new_word)
+            if not self.data_manager.save_word(new_word):
+                messagebox.showerror("保存失败", f"单词 '{word_text}' 未能写入词库文件，请检查磁盘空间和文件权限。")
+                return
             
             messagebox.showinfo("添加成功", f"单词 '{word_text}' 已添加到学习系统！")
             self.refresh_word_categories()
@@ -560,7 +762,7 @@ class VocabularyTutorGUI:
         
         # 1. 确定今日新单词（固定不变）
         all_new_words = self.data_manager.get_today_new_words()
-        new_words = self.sort_words_by_order(all_new_words, order_mode)
+        new_words = self.data_manager.sort_words_by_order(all_new_words, order_mode)
         
         if len(new_words) > daily_new:
             new_words = new_words[:daily_new]
@@ -584,7 +786,7 @@ class VocabularyTutorGUI:
         
         # 转换为列表并按遗忘风险排序
         all_review_words = list(review_words_dict.values())
-        all_review_words = sorted(all_review_words, key=lambda w: w.forget_risk, reverse=True)
+        all_review_words = self.data_manager.sort_words_by_order(all_review_words, "按遗忘风险")
         
         # 限制数量
         if len(all_review_words) > daily_review:
@@ -699,6 +901,7 @@ class VocabularyTutorGUI:
         # 重置重试状态
         self.current_attempt = 0
         self.allow_retry = False
+        self.answer_started_at = time.perf_counter()
         
         # 聚焦到输入框
         self.answer_entry.focus()
@@ -708,6 +911,7 @@ class VocabularyTutorGUI:
         word_type = "复习" if current_word in self.fixed_review_words else "新学"
         self.update_status(f"正在{word_type}单词 ({progress})")
     
+    @timed()
     def submit_answer(self):
         """提交用户输入的答案 - 修复清空输入和错误处理逻辑"""
         if not self.learning_mode or self.current_index >= len(self.current_learning_words):
@@ -723,13 +927,17 @@ class VocabularyTutorGUI:
         
         # 评估答案
         if mode == "meaning":
-            quality = self.ai_evaluator.evaluate_meaning(user_input, current_word.meaning, current_word.text)
+            quality = self.ai_evaluator.evaluate_meaning(user_input, current_word.senses, current_word.text)
         else:
             quality = self.ai_evaluator.evaluate_spelling(user_input, current_word.text, current_word.meaning)
         
         # 增加尝试次数
         self.current_attempt += 1
         
+        # 记录本次答题（每次尝试都记录）
+        self.data_manager.record_review(current_word, mode, quality, self.current_attempt,
+                                        time.perf_counter() - self.answer_started_at, user_input)
+        
         # 清空输入框 - 无论对错都清空
         self.answer_entry.delete(0, tk.END)
         
@@ -741,12 +949,10 @@ class VocabularyTutorGUI:
             self.correct_count += 1
             
             # 更新记忆状态
-            updated_word = self.scheduler.update_review_schedule(current_word, quality)
-            self.data_manager.save_word(updated_word)
+            self.save_review(current_word, quality)
             
-            # 实时更新统计和显示
-            self.update_statistics()
-            self.refresh_display()
+            # 在后台更新统计和显示
+            self.request_refresh()
             
             # 延迟后显示下一个单词
             self.answer_entry.config(state=tk.DISABLED)
@@ -765,6 +971,7 @@ class VocabularyTutorGUI:
             # 重新激活输入框，让用户重新输入
             self.answer_entry.config(state=tk.NORMAL)
             self.answer_entry.focus()
+            self.answer_started_at = time.perf_counter()
             
         else:
             # 第二次错误或质量太低
@@ -779,12 +986,10 @@ class VocabularyTutorGUI:
                 self.wrong_words_this_round.append(current_word)
             
             # 更新记忆状态（即使错误也要记录，但质量较低）
-            updated_word = self.scheduler.update_review_schedule(current_word, max(0, quality-1))
-            self.data_manager.save_word(updated_word)
+            self.save_review(current_word, max(0, quality-1))
             
-            # 实时更新统计和显示
-            self.update_statistics()
-            self.refresh_display()
+            # 在后台更新统计和显示
+            self.request_refresh()
             
             # 延迟后显示下一个单词
             self.answer_entry.config(state=tk.DISABLED)
@@ -796,111 +1001,40 @@ class VocabularyTutorGUI:
         self.current_index += 1
         self.show_current_word()
     
+    @timed()
     def show_progress_report(self):
-        """显示学习进度报告"""
+        """显示学习进度报告（后台渲染，词库未变化时直接使用缓存）"""
+        if not is_available("matplotlib"):
+            messagebox.showerror("无法生成报告", "matplotlib库未安装，无法显示学习报告")
+            return
+        
         report_window = tk.Toplevel(self.root)
         report_window.title("学习进度报告")
-        report_window.geometry("900x700")
+        report_window.geometry("900x760")
         report_window.transient(self.root)
         
-        # 获取数据
-        words = self.data_manager.load_words()
-        stats = self.data_manager.get_learning_statistics()
-        
-        if not words:
-            ttk.Label(report_window, text="暂无学习数据", font=("微软雅黑", 14)).pack(pady=50)
-            return
-        
-        # 创建Matplotlib图表
-        fig = Figure(figsize=(10, 8), dpi=100)
-        
-        # 创建4个子图
-        ax1 = fig.add_subplot(2, 2, 1)
-        ax2 = fig.add_subplot(2, 2, 2)
-        ax3 = fig.add_subplot(2, 2, 3)
-        ax4 = fig.add_subplot(2, 2, 4)
+        image_label = ttk.Label(report_window, text="正在生成报告...", font=("微软雅黑", 14),
+                                anchor=tk.CENTER)
+        image_label.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        fig.suptitle(f"学习报告 - {datetime.date.today()}", fontsize=16, fontweight='bold')
+        def show_png(png):
+            if not report_window.winfo_exists():
+                return
+            if isinstance(png, Exception):
+                image_label.config(text=f"生成报告失败: {png}")
+            elif png is None:
+                image_label.config(text="暂无学习数据")
+            else:
+                photo = tk.PhotoImage(data=base64.b64encode(png))
+                image_label.config(image=photo, text="")
+                image_label.image = photo  # 保持引用，防止图片被回收
         
-        # 1. 掌握情况饼图
-        if stats['total_words'] > 0:
-            labels = ['已掌握', '学习中', '新单词']
-            sizes = [stats['mastered'], stats['learning'], stats['new']]
-            colors = ['#4CAF50', '#FFC107', '#2196F3']
-            
-            # 过滤掉大小为0的部分
-            filtered_data = [(label, size, color) for label, size, color in zip(labels, sizes, colors) if size > 0]
-            
-            if filtered_data:
-                filtered_labels, filtered_sizes, filtered_colors = zip(*filtered_data)
-                ax1.pie(filtered_sizes, labels=filtered_labels, colors=filtered_colors, 
-                       autopct='%1.1f%%', startangle=90)
+        png = self.report_renderer.cached(SCREEN_DPI)
+        if png is not None:
+            show_png(png)
         else:
-            ax1.text(0.5, 0.5, '暂无学习数据', ha='center', va='center', fontsize=12)
-        
-        ax1.set_title('单词掌握情况分布')
-        
-        # 2. 记忆强度分布
-        ease_factors = [w.ease_factor for w in words if w.repetitions > 0]
-        if ease_factors:
-            ax2.hist(ease_factors, bins=10, color='skyblue', edgecolor='black', alpha=0.7)
-            ax2.set_xlabel('记忆强度 (易度因子)')
-            ax2.set_ylabel('单词数量')
-            ax2.set_title('记忆强度分布')
-            ax2.axvline(x=2.5, color='red', linestyle='--', label='默认强度 (2.5)')
-            ax2.legend()
-        else:
-            ax2.text(0.5, 0.5, '暂无记忆强度数据', ha='center', va='center', fontsize=12)
-            ax2.set_title('记忆强度分布')
-        
-        # 3. 复习次数分布
-        if words:
-            repetitions_counts = [w.repetitions for w in words]
-            max_rep = max(repetitions_counts) if repetitions_counts else 5
-            ax3.hist(repetitions_counts, bins=range(0, min(max_rep, 20)+2), 
-                    color='lightgreen', edgecolor='black', alpha=0.7)
-            ax3.set_xlabel('复习次数')
-            ax3.set_ylabel('单词数量')
-            ax3.set_title('复习次数分布')
-        
-        # 4. 文本统计信息
-        learned_words = stats.get('reviewed_words', 0)
-        
-        # 计算今日已学习的单词
-        today_learned = 0
-        for word in words:
-            if word.repetitions > 0 and word.last_reviewed and word.last_reviewed == datetime.date.today():
-                today_learned += 1
-        
-        stats_text = f"""
-学习统计摘要
-{'='*40}
-📊 累计学习单词: {learned_words} 个
-📅 今日已学习: {today_learned} 个
-📅 今日待复习: {stats['due_today']} 个
-⚠️  高遗忘风险: {stats['forget_risk_words']} 个
-
-掌握情况:
-  ✅ 已掌握: {stats['mastered']} 个
-  📖 学习中: {stats['learning']} 个
-  🆕 新单词: {stats['new']} 个
-
-📈 平均记忆强度: {stats['avg_ease_factor']}
-🔄 累计复习次数: {stats['total_reviews']} 次
-{'='*40}
-📅 报告生成时间: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-"""
-        
-        ax4.axis('off')
-        ax4.text(0, 0.95, stats_text, fontsize=10, fontfamily='Microsoft YaHei',
-                verticalalignment='top', linespacing=1.8)
-        
-        fig.tight_layout()
-        
-        # 嵌入到Tkinter窗口
-        canvas = FigureCanvasTkAgg(fig, master=report_window)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            run_in_background(self.root, lambda: self.report_renderer.render(SCREEN_DPI),
+                              show_png, name="report-render")
         
         # 添加导出按钮
         button_frame = ttk.Frame(report_window)
@@ -912,28 +1046,101 @@ class VocabularyTutorGUI:
                 filetypes=[("PNG图片", "*.png"), ("所有文件", "*.*")],
                 initialfile=f"学习报告_{datetime.date.today()}.png"
             )
+            if not file_path:
+                return
+            
+            def write_png():
+                # 复用窗口显示时排好版的图表，只在后台按导出分辨率重新输出
+                png = self.report_renderer.render(EXPORT_DPI)
+                if png is None:
+                    raise ValueError("暂无学习数据")
+                with open(file_path, 'wb') as f:
+                    f.write(png)
+            
+            def done(error):
+                if isinstance(error, Exception):
+                    messagebox.showerror("导出失败", f"保存失败:\n{str(error)}")
+                else:
+                    messagebox.showinfo("导出成功", f"报告已保存到:\n{file_path}")
+            
+            self.update_status("正在导出报告...")
+            run_in_background(self.root, write_png, done, name="report-export")
+        
+        ttk.Button(button_frame, text="📤 导出报告", command=export_report).pack(side=tk.LEFT)
+    
+    def show_diagnostics(self):
+        """显示性能诊断窗口：各操作的调用次数、耗时分位数和写入字节数"""
+        window = tk.Toplevel(self.root)
+        window.title("性能诊断")
+        window.geometry("900x500")
+        window.transient(self.root)
+        
+        top_frame = ttk.Frame(window, padding="10")
+        top_frame.pack(fill=tk.X)
+        enabled_var = tk.BooleanVar(value=metrics.is_enabled())
+        
+        def toggle_enabled():
+            if enabled_var.get():
+                metrics.enable()
+            else:
+                metrics.disable()
+        
+        ttk.Checkbutton(top_frame, text="记录性能数据", variable=enabled_var,
+                        command=toggle_enabled).pack(side=tk.LEFT)
+        
+        columns = ("操作", "次数", "累计(ms)", "平均(ms)", "p50(ms)", "p95(ms)", "p99(ms)", "最大(ms)")
+        tree = ttk.Treeview(window, columns=columns, show='headings', height=15)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=280 if col == "操作" else 80,
+                        anchor=tk.W if col == "操作" else tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10)
+        
+        bytes_label = ttk.Label(window, font=("微软雅黑", 10))
+        bytes_label.pack(fill=tk.X, padx=10, pady=5)
+        
+        def refresh():
+            data = metrics.snapshot()
+            tree.delete(*tree.get_children())
+            for name, stats in data["timings"].items():
+                tree.insert('', tk.END, values=(
+                    name, stats["count"],
+                    *(f"{stats[key]:.2f}" for key in
+                      ("total_ms", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"))))
+            written = "，".join(f"{name}: {count / 1024:.1f} KB"
+                               for name, count in data["bytes_written"].items())
+            bytes_label.config(text=f"写入字节: {written or '无'}")
+        
+        def dump():
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                filetypes=[("JSON文件", "*.json"), ("所有文件", "*.*")],
+                initialfile=f"性能数据_{datetime.date.today()}.json"
+            )
             if file_path:
                 try:
-                    fig.savefig(file_path, dpi=300, bbox_inches='tight')
-                    messagebox.showinfo("导出成功", f"报告已保存到:\n{file_path}")
+                    metrics.dump_json(file_path)
+                    messagebox.showinfo("导出成功", f"性能数据已保存到:\n{file_path}")
                 except Exception as e:
                     messagebox.showerror("导出失败", f"保存失败:\n{str(e)}")
         
-        ttk.Button(button_frame, text="📤 导出报告", command=export_report).pack(side=tk.LEFT)
+        def clear():
+            metrics.reset()
+            refresh()
+        
+        ttk.Button(top_frame, text="刷新", command=refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="清空", command=clear).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="导出JSON", command=dump).pack(side=tk.LEFT, padx=5)
+        refresh()
     
     def on_word_double_click(self, event):
         """双击单词显示详细信息"""
-        selection = self.word_tree.selection()
-        if selection:
-            item = self.word_tree.item(selection[0])
-            values = item['values']
-            word_text = values[0]
-            
-            words = self.data_manager.load_words()
-            for word in words:
-                if word.text == word_text:
-                    time_since = self.data_manager.format_time_since_last_review(word)
-                    details = f"""
+        word_text = self.word_list.selected_key()
+        if word_text:
+            word = self.data_manager.get_word(word_text)
+            if word is not None:
+                time_since = self.data_manager.format_time_since_last_review(word)
+                details = f"""
 单词详细信息
 {'='*30}
 英文: {word.text}
@@ -946,11 +1153,10 @@ class VocabularyTutorGUI:
   记忆强度: {word.ease_factor:.2f}
   下次复习: {word.next_review}
   距上次复习: {time_since}
-  遗忘风险: {word.forget_risk:.1%}
+  遗忘风险: {word.calculate_forget_risk():.1%}
   创建时间: {word.created_at}
 """
-                    messagebox.showinfo(f"单词详情 - {word.text}", details)
-                    break
+                messagebox.showinfo(f"单词详情 - {word.text}", details)
 
 
 def main():
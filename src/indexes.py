@@ -0,0 +1,147 @@
+# src/indexes.py
+"""
+单词数据索引模块
+"""
+import bisect
+import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from .sm2_algorithm import Word
+
+
+class DueDateIndex:
+    """按复习日期分桶的索引
+    
+    每个日期对应一个单词集合，日期本身保存在有序列表中，
+    因此取出到期单词的开销只与到期单词数量（和不同日期数）有关，与词库大小无关。
+    """
+    
+    def __init__(self):
+        self._buckets: Dict[datetime.date, Set[str]] = {}
+        self._dates: List[datetime.date] = []  # 有序的非空桶日期
+        self._date_of: Dict[str, datetime.date] = {}  # 单词 -> 所在桶日期
+    
+    def __len__(self) -> int:
+        return len(self._date_of)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._date_of
+    
+    def date_of(self, key: str) -> Optional[datetime.date]:
+        """获取单词当前被索引的复习日期"""
+        return self._date_of.get(key)
+    
+    def update(self, key: str, due: Optional[datetime.date]):
+        """设置单词的复习日期，due为None时从索引中移除"""
+        old = self._date_of.get(key)
+        if old == due:
+            return
+        if old is not None:
+            self.remove(key)
+        if due is None:
+            return
+        
+        bucket = self._buckets.get(due)
+        if bucket is None:
+            bucket = self._buckets[due] = set()
+            bisect.insort(self._dates, due)
+        bucket.add(key)
+        self._date_of[key] = due
+    
+    def remove(self, key: str):
+        """从索引中移除单词"""
+        old = self._date_of.pop(key, None)
+        if old is None:
+            return
+        bucket = self._buckets[old]
+        bucket.discard(key)
+        if not bucket:
+            del self._buckets[old]
+            del self._dates[bisect.bisect_left(self._dates, old)]
+    
+    def due_on_or_before(self, day: datetime.date) -> List[str]:
+        """获取复习日期不晚于day的所有单词"""
+        keys = []
+        for due in self._dates[:bisect.bisect_right(self._dates, day)]:
+            keys.extend(self._buckets[due])
+        return keys
+    
+    def count_on_or_before(self, day: datetime.date) -> int:
+        """统计复习日期不晚于day的单词数量"""
+        return sum(len(self._buckets[due])
+                   for due in self._dates[:bisect.bisect_right(self._dates, day)])
+    
+    def histogram(self) -> Dict[datetime.date, int]:
+        """每天的待复习单词数量"""
+        return {due: len(self._buckets[due]) for due in self._dates}
+
+
+class LearningStatsAggregate:
+    """增量维护的学习统计
+    
+    每次保存单词时减去旧状态的贡献、加上新状态的贡献，
+    只有跨天（遗忘风险和"今日"相关计数随日期变化）时才需要全量重算。
+    """
+    
+    RISK_THRESHOLD = 0.6  # 与统计面板的"高遗忘风险"阈值一致
+    
+    def __init__(self):
+        self.day: Optional[datetime.date] = None
+        self.reset(None)
+    
+    def reset(self, day: Optional[datetime.date]):
+        """清空计数，day为统计所对应的日期"""
+        self.day = day
+        self.total = 0
+        self.mastered = 0
+        self.learning = 0
+        self.new = 0
+        self.reviewed = 0
+        self.ease_sum = 0.0
+        self.total_reviews = 0
+        self.today_learned = 0
+        self.forget_risk_words = 0
+    
+    def load_summary(self, day: datetime.date, summary: Dict[str, Any]):
+        """直接载入整体计算好的计数（见WordColumns.summary）"""
+        self.reset(day)
+        for name, value in summary.items():
+            setattr(self, name, value)
+    
+    def add(self, word: Word, sign: int = 1):
+        """累加一个单词状态的贡献，sign=-1时撤销"""
+        self.total += sign
+        self.total_reviews += sign * word.repetitions
+        
+        if word.repetitions == 0:
+            self.new += sign
+            return
+        
+        self.reviewed += sign
+        self.ease_sum += sign * word.ease_factor
+        if word.repetitions >= 3 and word.ease_factor >= 2.5:
+            self.mastered += sign
+        else:
+            self.learning += sign
+        
+        if word.last_reviewed == self.day:
+            self.today_learned += sign
+        if (word.next_review > self.day and
+                word.calculate_forget_risk() >= self.RISK_THRESHOLD):
+            self.forget_risk_words += sign
+    
+    def to_dict(self, due_today: int) -> Dict[str, Any]:
+        """导出为get_learning_statistics的返回格式"""
+        avg_ease = self.ease_sum / self.reviewed if self.reviewed > 0 else 0.0
+        return {
+            "total_words": self.total,
+            "mastered": self.mastered,
+            "learning": self.learning,
+            "new": self.new,
+            "due_today": due_today,
+            "avg_ease_factor": round(avg_ease, 2),
+            "total_reviews": self.total_reviews,
+            "reviewed_words": self.reviewed,
+            "today_learned": self.today_learned,
+            "forget_risk_words": self.forget_risk_words
+        }
@@ -0,0 +1,74 @@
+# src/lazy_imports.py
+"""
+重量级依赖的延迟加载模块
+
+pandas只在导入Excel时需要，matplotlib只在学习报告中需要，
+两者都推迟到第一次使用时才导入，避免拖慢程序启动。
+"""
+import importlib.util
+import threading
+import types
+from typing import Optional
+
+_lock = threading.RLock()
+_pandas = None
+_matplotlib: Optional[types.SimpleNamespace] = None
+
+
+def is_available(module_name: str) -> bool:
+    """检查模块是否已安装（不会真正导入）"""
+    return importlib.util.find_spec(module_name) is not None
+
+
+def get_pandas():
+    """导入并返回pandas模块，未安装时返回None"""
+    global _pandas
+    with _lock:
+        if _pandas is None:
+            try:
+                import pandas
+            except ImportError:
+                return None
+            _pandas = pandas
+        return _pandas
+
+
+def get_matplotlib() -> Optional[types.SimpleNamespace]:
+    """
+    导入并配置matplotlib，未安装时返回None
+    返回的对象包含 Figure / FigureCanvasAgg / FigureCanvasTkAgg
+    """
+    global _matplotlib
+    with _lock:
+        if _matplotlib is None:
+            try:
+                import matplotlib
+                matplotlib.use('Agg')
+                import matplotlib.pyplot as plt
+                from matplotlib.backends.backend_agg import FigureCanvasAgg
+                from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+                from matplotlib.figure import Figure
+            except ImportError:
+                return None
+            
+            # 设置中文字体
+            plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'DejaVu Sans']
+            plt.rcParams['axes.unicode_minus'] = False
+            
+            _matplotlib = types.SimpleNamespace(
+                Figure=Figure,
+                FigureCanvasAgg=FigureCanvasAgg,
+                FigureCanvasTkAgg=FigureCanvasTkAgg,
+            )
+        return _matplotlib
+
+
+def warm_up_in_background():
+    """在后台线程预先导入重量级依赖，让第一次打开报告/导入Excel时不用等待"""
+    def warm_up():
+        get_matplotlib()
+        get_pandas()
+    
+    thread = threading.Thread(target=warm_up, name="import-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,63 @@
+# src/load_leveler.py
+"""
+复习负荷均衡模块
+
+SM2把下次复习日期定为 今天+间隔，同一天学习的单词会在同一天一起到期。
+均衡器维护每天的到期单词数直方图，安排复习时在SM2目标日期附近的小窗口内
+选择到期单词最少的一天。窗口大小有上限，每次安排的开销是常数。
+"""
+import datetime
+from typing import Dict, Optional
+
+
+class LoadLeveler:
+    """按每日到期数量在目标日期附近挑选复习日期
+    
+    fuzz_ratio: 窗口半径占间隔的比例
+    max_fuzz: 窗口半径上限（天）
+    min_interval: 间隔小于该值时不做调整（短间隔的偏差影响太大）
+    """
+    
+    def __init__(self, fuzz_ratio: float = 0.1, max_fuzz: int = 7, min_interval: int = 3):
+        self.fuzz_ratio = fuzz_ratio
+        self.max_fuzz = max_fuzz
+        self.min_interval = min_interval
+        self._counts: Dict[int, int] = {}  # 日序号 -> 当天到期的已学单词数
+    
+    def seed(self, histogram: Dict[datetime.date, int]):
+        """用现有的到期直方图（如DueDateIndex.histogram()）初始化"""
+        self._counts = {day.toordinal(): count for day, count in histogram.items() if count > 0}
+    
+    def count_on(self, day: datetime.date) -> int:
+        """某天已安排的到期单词数"""
+        return self._counts.get(day.toordinal(), 0)
+    
+    def release(self, due: Optional[datetime.date]):
+        """单词离开原到期日（重新安排或答错重置时调用）"""
+        if due is None:
+            return
+        key = due.toordinal()
+        count = self._counts.get(key, 0)
+        if count <= 1:
+            self._counts.pop(key, None)
+        else:
+            self._counts[key] = count - 1
+    
+    def fuzz_window(self, interval: int) -> int:
+        """间隔对应的窗口半径（天）"""
+        if interval < self.min_interval:
+            return 0
+        return min(self.max_fuzz, max(1, int(round(interval * self.fuzz_ratio))))
+    
+    def place(self, today: datetime.date, interval: int) -> datetime.date:
+        """在 today+interval 附近选择到期单词最少的一天并登记，返回选中的日期
+        
+        数量相同时选离目标日期最近的一天，仍相同时选较早的一天。
+        """
+        target = today.toordinal() + interval
+        fuzz = self.fuzz_window(interval)
+        counts = self._counts
+        best = min(range(target - fuzz, target + fuzz + 1),
+                   key=lambda day: (counts.get(day, 0), abs(day - target), day))
+        counts[best] = counts.get(best, 0) + 1
+        return datetime.date.fromordinal(best)
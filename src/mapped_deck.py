@@ -0,0 +1,282 @@
+# src/mapped_deck.py
+"""
+内存映射的二进制词库
+
+用mmap打开binary_deck格式的文件，不把整个词库解码到内存：
+- 定长记录区本身就是偏移索引：第i个单词的记录在 文件头 + i * 记录长度
+- 按单词查找走文件中的单词索引（二分查找），只解码被访问的记录
+- 按复习字段筛选（到期、新单词、高遗忘风险）只读取记录中的数值字段，
+  不解码单词、释义和例句
+打开后的修改保存在内存中的覆盖层里（由存储后端同时写入日志）。
+常驻内存随访问和修改过的单词增长，与词库大小基本无关。
+"""
+import datetime
+import mmap
+import os
+import struct
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .binary_deck import (
+    HEADER, INDEX_ENTRY, RECORD, DateStrings, FLAG_EASE_FACTOR, FLAG_INTERVAL,
+    FLAG_LAST_REVIEWED, FLAG_NEXT_REVIEW, FLAG_REPETITIONS, decode_record, read_header, read_metadata
+)
+from .sm2_algorithm import NUMPY_AVAILABLE, np
+
+# 数值字段齐全的记录可以直接从定长字段读取，否则需要解码整条记录
+NUMERIC_FLAGS = FLAG_REPETITIONS | FLAG_INTERVAL | FLAG_EASE_FACTOR | FLAG_NEXT_REVIEW | FLAG_LAST_REVIEWED
+
+# 记录中单词字符串的(偏移, 长度)：位于记录末尾的四对字符串引用之首
+TEXT_REF = struct.Struct("<II")
+TEXT_REF_OFFSET = RECORD.size - 8 * 4
+
+# 与binary_deck.RECORD对应的numpy结构化类型（只在numpy可用时使用）
+RECORD_DTYPE = np.dtype([
+    ("ease_factor", "<f8"), ("forget_risk", "<f8"), ("repetitions", "<i4"), ("interval", "<i4"),
+    ("next_review", "<i4"), ("last_reviewed", "<i4"), ("created_at", "<i4"), ("flags", "<u4"),
+    ("strings", "<u4", (8,)),
+]) if NUMPY_AVAILABLE else None
+
+
+def _ordinal(value: Optional[str], default: int) -> int:
+    """ISO日期字符串转为日序号，缺失或格式错误时返回默认值"""
+    if not value:
+        return default
+    try:
+        return datetime.date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return default
+
+
+class MappedRecords(MutableMapping):
+    """单词文本 -> 记录字典 的映射，底层是内存映射的二进制快照加上内存中的覆盖层"""
+    
+    def __init__(self, file_path: Optional[str]):
+        self._file = None
+        self._map = None
+        self._count = 0
+        self._strings_offset = 0
+        self._index_offset: Optional[int] = None
+        self._slots: Optional[Dict[str, int]] = None  # 文件没有单词索引时的 单词 -> 记录序号
+        self._dates = DateStrings()
+        self.metadata: Dict[str, Any] = {"words": None, "version": "3.1"}
+        # 覆盖层：打开后写入的记录；_overridden是被覆盖的记录序号，_appended是文件中没有的新单词
+        self._overlay: Dict[str, Dict[str, Any]] = {}
+        self._overridden: set = set()
+        self._appended: List[str] = []
+        if file_path and os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+            self._open(file_path)
+    
+    def _open(self, file_path: str):
+        self._file = open(file_path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            header = read_header(self._map)
+            self.metadata = read_metadata(self._map, header)
+        except Exception:
+            self.close()
+            raise
+        self._count = header.count
+        self._strings_offset = header.strings_offset
+        self._index_offset = header.index_offset
+    
+    def close(self):
+        """释放内存映射（覆盖层中的数据保留）"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._count = 0
+    
+    def reload(self, file_path: str, keep_changes: bool):
+        """重新映射文件（压缩写出新文件之后调用），keep_changes为False时清空覆盖层"""
+        changes = list(self._overlay.items()) if keep_changes else []
+        self.close()
+        self._slots = None
+        self._overlay = {}
+        self._overridden = set()
+        self._appended = []
+        self._open(file_path)
+        for text, record in changes:
+            self[text] = record
+    
+    def changes(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """打开之后写入的全部记录"""
+        return list(self._overlay.items())
+    
+    @property
+    def base_count(self) -> int:
+        """文件中的单词数"""
+        return self._count
+    
+    # ---- 按记录序号访问文件 ----
+    
+    def _values(self, slot: int) -> Tuple:
+        return RECORD.unpack_from(self._map, HEADER.size + slot * RECORD.size)
+    
+    def text_at(self, slot: int) -> str:
+        """第slot条记录的单词（只解码单词本身）"""
+        offset, length = TEXT_REF.unpack_from(self._map, HEADER.size + slot * RECORD.size + TEXT_REF_OFFSET)
+        start = self._strings_offset + offset
+        return str(self._map[start:start + length], 'utf-8')
+    
+    def record_at(self, slot: int) -> Tuple[str, Dict[str, Any]]:
+        """解码第slot条记录"""
+        return decode_record(self._values(slot), self._map, self._strings_offset, self._dates)
+    
+    def slot_of(self, text: str) -> Optional[int]:
+        """单词在文件中的记录序号，不存在时返回None"""
+        if not self._count:
+            return None
+        if self._index_offset is None:
+            # 旧文件没有单词索引，第一次查找时建立 单词 -> 序号 的字典
+            if self._slots is None:
+                self._slots = {self.text_at(slot): slot for slot in range(self._count)}
+            return self._slots.get(text)
+        
+        key = text.encode('utf-8')
+        buffer = self._map
+        index_offset = self._index_offset
+        strings_offset = self._strings_offset
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            slot = INDEX_ENTRY.unpack_from(buffer, index_offset + middle * INDEX_ENTRY.size)[0]
+            offset, length = TEXT_REF.unpack_from(buffer, HEADER.size + slot * RECORD.size + TEXT_REF_OFFSET)
+            start = strings_offset + offset
+            candidate = buffer[start:start + length]
+            if candidate == key:
+                return slot
+            if candidate < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+    
+    # ---- 映射接口 ----
+    
+    def __len__(self) -> int:
+        return self._count + len(self._appended)
+    
+    def __contains__(self, text) -> bool:
+        return text in self._overlay or self.slot_of(text) is not None
+    
+    def __getitem__(self, text: str) -> Dict[str, Any]:
+        record = self._overlay.get(text)
+        if record is not None:
+            return record
+        slot = self.slot_of(text)
+        if slot is None:
+            raise KeyError(text)
+        return self.record_at(slot)[1]
+    
+    def __setitem__(self, text: str, record: Dict[str, Any]):
+        if text not in self._overlay:
+            slot = self.slot_of(text)
+            if slot is None:
+                self._appended.append(text)
+            else:
+                self._overridden.add(slot)
+        self._overlay[text] = record
+    
+    def __delitem__(self, text: str):
+        raise TypeError("内存映射词库不支持删除单词")
+    
+    def __iter__(self) -> Iterator[str]:
+        for slot in range(self._count):
+            yield self.text_at(slot)
+        yield from self._appended[:]
+    
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """按存储顺序逐条解码（不会一次性解码整个词库）"""
+        overlay = self._overlay
+        for slot in range(self._count):
+            if slot in self._overridden:
+                text = self.text_at(slot)
+                yield text, overlay[text]
+            else:
+                yield self.record_at(slot)
+        for text in self._appended[:]:
+            yield text, overlay[text]
+    
+    # ---- 只读数值字段的扫描 ----
+    
+    def scan(self) -> Iterator[Tuple[int, Optional[str], int, int, float, int, int]]:
+        """
+        逐条给出 (记录序号, 单词, 复习次数, 间隔, 易度因子, 下次复习日序号, 上次复习日序号)
+        文件中的记录只读数值字段，单词为None（需要时用text_at(序号)取）；
+        覆盖层中的记录序号为-1。上次复习日序号为0表示从未复习。
+        """
+        tomorrow = (datetime.date.today() + datetime.timedelta(days=1)).toordinal()
+        if self._count:
+            records = memoryview(self._map)[HEADER.size:HEADER.size + self._count * RECORD.size]
+            try:
+                for slot, values in enumerate(RECORD.iter_unpack(records)):
+                    if slot in self._overridden:
+                        continue
+                    if values[7] & NUMERIC_FLAGS != NUMERIC_FLAGS:
+                        # 手工编辑过的不规整记录：按完整记录取值
+                        yield (slot, None) + self._numeric(self.record_at(slot)[1], tomorrow)
+                        continue
+                    yield slot, None, values[2], values[3], values[0], values[4], values[5]
+            finally:
+                records.release()
+        for text, record in list(self._overlay.items()):
+            yield (-1, text) + self._numeric(record, tomorrow)
+    
+    @staticmethod
+    def _numeric(record: Dict[str, Any], tomorrow: int) -> Tuple[int, int, float, int, int]:
+        return (record.get("repetitions", 0), record.get("interval", 1), record.get("ease_factor", 2.5),
+                _ordinal(record.get("next_review"), tomorrow), _ordinal(record.get("last_reviewed"), 0))
+    
+    def numeric_arrays(self) -> Optional[Dict[str, Any]]:
+        """
+        文件中所有记录的数值字段（numpy数组，复制出来的，不含覆盖层），
+        numpy不可用或没有文件时返回None。不规整记录的值不可靠，需按irregular修正
+        """
+        if not NUMPY_AVAILABLE or not self._count:
+            return None
+        view = np.frombuffer(self._map, RECORD_DTYPE, self._count, HEADER.size)
+        arrays = {name: view[name].copy() for name in
+                  ("repetitions", "interval", "ease_factor", "next_review", "last_reviewed")}
+        arrays["irregular"] = np.flatnonzero((view["flags"] & NUMERIC_FLAGS) != NUMERIC_FLAGS)
+        del view
+        return arrays
+
+
+class ColumnKeys:
+    """WordColumns的单词列：文件中的单词按需从映射解码，之后新增的单词保存在列表中
+    
+    同时充当 单词 -> 行号 的映射（WordColumns.texts 和 WordColumns._rows）。
+    """
+    
+    def __init__(self, records: MappedRecords):
+        self._records = records
+        self._base = records.base_count
+        self._extra: List[str] = []
+        self._extra_rows: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return self._base + len(self._extra)
+    
+    def __getitem__(self, row: int) -> str:
+        if row < self._base:
+            return self._records.text_at(row)
+        return self._extra[row - self._base]
+    
+    def append(self, text: str):
+        self._extra_rows[text] = self._base + len(self._extra)
+        self._extra.append(text)
+    
+    def get(self, text: str, default=None) -> Optional[int]:
+        row = self._extra_rows.get(text)
+        if row is not None:
+            return row
+        slot = self._records.slot_of(text)
+        return default if slot is None or slot >= self._base else slot
+    
+    def __setitem__(self, text: str, row: int):
+        # append时已经登记过
+        pass
@@ -0,0 +1,142 @@
+# src/metrics.py
+"""
+性能统计模块（默认关闭）
+
+用 @timed 标记热点方法后，启用时记录每个操作的调用次数、累计耗时和
+延迟分位数，存储层还会记录写入的字节数。关闭时被标记的方法只多一次
+全局变量判断，几乎没有额外开销。
+
+启用方式：设置环境变量 VOCAB_METRICS=1，或在运行时调用 enable()。
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+# 每个操作保留的最近耗时样本数（用于计算分位数）
+MAX_SAMPLES = 2048
+
+_enabled = os.environ.get("VOCAB_METRICS", "").lower() in ("1", "true", "yes", "on")
+_lock = threading.Lock()
+_timings: Dict[str, "TimingStats"] = {}
+_bytes_written: Dict[str, int] = {}
+
+
+class TimingStats:
+    """单个操作的耗时统计"""
+    
+    __slots__ = ("count", "total", "max", "samples")
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: deque = deque(maxlen=MAX_SAMPLES)
+    
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """统计结果，耗时单位为毫秒；分位数取自最近的样本（最近邻取值）"""
+        ordered = sorted(self.samples)
+        
+        def percentile(fraction: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] * 1000
+        
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": self.max * 1000,
+        }
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable():
+    """开始记录性能统计"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """停止记录（已有数据保留）"""
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """清空所有统计数据"""
+    with _lock:
+        _timings.clear()
+        _bytes_written.clear()
+
+
+def record_time(name: str, seconds: float):
+    """记录一次操作耗时"""
+    with _lock:
+        stats = _timings.get(name)
+        if stats is None:
+            stats = _timings[name] = TimingStats()
+        stats.add(seconds)
+
+
+def add_bytes(name: str, count: int):
+    """记录写入的字节数（未启用时直接返回）"""
+    if not _enabled:
+        return
+    with _lock:
+        _bytes_written[name] = _bytes_written.get(name, 0) + count
+
+
+def timed(name: Optional[str] = None):
+    """装饰器：启用统计时记录被装饰函数的耗时，name默认为函数的限定名"""
+    def decorator(fn: Callable) -> Callable:
+        label = name or fn.__qualname__
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record_time(label, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def snapshot() -> Dict[str, Any]:
+    """当前统计数据的快照（按累计耗时从高到低排列）"""
+    with _lock:
+        timings = {name: stats.to_dict() for name, stats in _timings.items()}
+        bytes_written = dict(_bytes_written)
+    return {
+        "enabled": _enabled,
+        "timings": dict(sorted(timings.items(), key=lambda item: item[1]["total_ms"], reverse=True)),
+        "bytes_written": bytes_written,
+    }
+
+
+def dump_json(file_path: str) -> Dict[str, Any]:
+    """把统计快照写入JSON文件，并返回该快照"""
+    data = snapshot()
+    data["generated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return data
@@ -0,0 +1,177 @@
+# src/report.py
+"""
+学习报告模块
+
+报告数据的汇总和图表绘制都在后台线程完成：图表在Agg画布上渲染成PNG字节，
+主线程只负责显示图片。排好版的图表按词库版本号缓存，词库没有变化时
+重新打开报告直接复用已有的PNG，导出图片只需把同一个图表按导出分辨率再输出一次。
+"""
+import datetime
+import io
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .lazy_imports import get_matplotlib
+from .metrics import timed
+
+# 窗口内显示用的分辨率（10x8英寸的图约850x680像素）和导出图片的分辨率
+SCREEN_DPI = 85
+EXPORT_DPI = 300
+
+
+def build_report_figure(mpl, data: Dict[str, Any]):
+    """根据报告数据构建2x2的报告图表（不依赖Tk，可在任意线程调用）"""
+    stats = data["stats"]
+    ease_factors = data["ease_factors"]
+    repetitions_counts = data["repetitions_counts"]
+    
+    fig = mpl.Figure(figsize=(10, 8), dpi=100)
+    mpl.FigureCanvasAgg(fig)
+    
+    # 创建4个子图
+    ax1 = fig.add_subplot(2, 2, 1)
+    ax2 = fig.add_subplot(2, 2, 2)
+    ax3 = fig.add_subplot(2, 2, 3)
+    ax4 = fig.add_subplot(2, 2, 4)
+    
+    fig.suptitle(f"学习报告 - {data['date']}", fontsize=16, fontweight='bold')
+    
+    # 1. 掌握情况饼图
+    if stats['total_words'] > 0:
+        labels = ['已掌握', '学习中', '新单词']
+        sizes = [stats['mastered'], stats['learning'], stats['new']]
+        colors = ['#4CAF50', '#FFC107', '#2196F3']
+        
+        # 过滤掉大小为0的部分
+        filtered_data = [(label, size, color) for label, size, color in zip(labels, sizes, colors) if size > 0]
+        
+        if filtered_data:
+            filtered_labels, filtered_sizes, filtered_colors = zip(*filtered_data)
+            ax1.pie(filtered_sizes, labels=filtered_labels, colors=filtered_colors,
+                   autopct='%1.1f%%', startangle=90)
+    else:
+        ax1.text(0.5, 0.5, '暂无学习数据', ha='center', va='center', fontsize=12)
+    
+    ax1.set_title('单词掌握情况分布')
+    
+    # 2. 记忆强度分布
+    if len(ease_factors) > 0:
+        ax2.hist(ease_factors, bins=10, color='skyblue', edgecolor='black', alpha=0.7)
+        ax2.set_xlabel('记忆强度 (易度因子)')
+        ax2.set_ylabel('单词数量')
+        ax2.set_title('记忆强度分布')
+        ax2.axvline(x=2.5, color='red', linestyle='--', label='默认强度 (2.5)')
+        ax2.legend()
+    else:
+        ax2.text(0.5, 0.5, '暂无记忆强度数据', ha='center', va='center', fontsize=12)
+        ax2.set_title('记忆强度分布')
+    
+    # 3. 复习次数分布
+    if len(repetitions_counts) > 0:
+        max_rep = int(max(repetitions_counts))
+        ax3.hist(repetitions_counts, bins=range(0, min(max_rep, 20)+2),
+                color='lightgreen', edgecolor='black', alpha=0.7)
+        ax3.set_xlabel('复习次数')
+        ax3.set_ylabel('单词数量')
+        ax3.set_title('复习次数分布')
+    
+    # 4. 文本统计信息
+    learned_words = stats.get('reviewed_words', 0)
+    today_learned = stats.get('today_learned', 0)
+    
+    stats_text = f"""
+学习统计摘要
+{'='*40}
+📊 累计学习单词: {learned_words} 个
+📅 今日已学习: {today_learned} 个
+📅 今日待复习: {stats['due_today']} 个
+⚠️  高遗忘风险: {stats['forget_risk_words']} 个
+
+掌握情况:
+  ✅ 已掌握: {stats['mastered']} 个
+  📖 学习中: {stats['learning']} 个
+  🆕 新单词: {stats['new']} 个
+
+📈 平均记忆强度: {stats['avg_ease_factor']}
+🔄 累计复习次数: {stats['total_reviews']} 次
+{'='*40}
+📅 报告生成时间: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+"""
+    
+    ax4.axis('off')
+    ax4.text(0, 0.95, stats_text, fontsize=10, fontfamily='Microsoft YaHei',
+            verticalalignment='top', linespacing=1.8)
+    
+    fig.tight_layout()
+    return fig
+
+
+@timed()
+def figure_to_png(fig, dpi: int) -> bytes:
+    """把已构建的报告图表按指定分辨率输出为PNG字节"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+@timed()
+def render_report_png(data: Dict[str, Any], dpi: int) -> Optional[bytes]:
+    """把报告渲染为PNG字节，matplotlib未安装时返回None"""
+    mpl = get_matplotlib()
+    if mpl is None:
+        return None
+    return figure_to_png(build_report_figure(mpl, data), dpi)
+
+
+class ReportRenderer:
+    """带缓存的报告渲染器
+    
+    缓存键为(词库版本号, 日期)：保存过单词或跨天之后缓存自动失效。
+    每个键只构建一次排好版的图表，各分辨率的PNG都从这个图表输出并缓存，
+    因此窗口显示之后再导出不会重新汇总数据和排版。render可以在后台线程调用。
+    """
+    
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        # _lock保护缓存字典，_figure_lock保证同一时刻只有一个线程使用图表（输出PNG较慢，
+        # 不持有_lock，主线程调用cached不会被阻塞）
+        self._lock = threading.Lock()
+        self._figure_lock = threading.Lock()
+        self._key: Optional[Tuple[int, datetime.date]] = None
+        self._figure = None
+        self._pngs: Dict[int, bytes] = {}
+    
+    def _current_key(self) -> Tuple[int, datetime.date]:
+        return self.data_manager.revision, datetime.date.today()
+    
+    def cached(self, dpi: int) -> Optional[bytes]:
+        """当前词库版本已渲染过的PNG，没有时返回None（不会触发渲染）"""
+        with self._lock:
+            if self._key == self._current_key():
+                return self._pngs.get(dpi)
+        return None
+    
+    @timed()
+    def render(self, dpi: int) -> Optional[bytes]:
+        """返回当前词库的报告PNG，优先使用缓存；词库为空或matplotlib不可用时返回None"""
+        with self._figure_lock:
+            with self._lock:
+                key, figure = self._key, self._figure
+                if key == self._current_key() and dpi in self._pngs:
+                    return self._pngs[dpi]
+            
+            if key != self._current_key():
+                data = self.data_manager.get_report_data()
+                if data["stats"]["total_words"] == 0:
+                    return None
+                mpl = get_matplotlib()
+                if mpl is None:
+                    return None
+                key, figure = (data["revision"], data["date"]), build_report_figure(mpl, data)
+                with self._lock:
+                    self._key, self._figure, self._pngs = key, figure, {}
+            
+            png = figure_to_png(figure, dpi)
+            with self._lock:
+                self._pngs[dpi] = png
+            return png
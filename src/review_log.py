@@ -0,0 +1,258 @@
+# src/review_log.py
+"""
+复习事件日志模块
+
+每次答题（包括重试）记录一条事件：单词、时间、模式、评分、第几次尝试、
+作答用时和原始答案。日志保存在词库文件旁边的 词库文件名.reviews 中，与词库文件分开，
+分析、回放和参数拟合都不需要读取词库。
+
+文件是只追加的二进制流，由两种条目组成：
+- 单词定义 b"W" + 单词编号(u32) + 长度(u16) + UTF-8单词：第一次出现时写一次
+- 复习事件 b"E" + EVENT定长字段 + UTF-8答案
+崩溃时最后一条可能只写了一半，加载时会被忽略。
+内存中每个字段是一个array数组，按时间的范围查询用二分查找，
+按单词的查询用 单词编号 -> 事件下标数组 的索引。
+"""
+import bisect
+import datetime
+import os
+import struct
+import threading
+import time
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Union
+
+from . import metrics
+
+# 答题模式（与界面的mode_var取值一致），文件中保存下标
+MODES = ("meaning", "spelling")
+
+# 单词编号, 单词长度
+WORD_ENTRY = struct.Struct("<IH")
+# 时间戳(毫秒), 单词编号, 模式, 评分, 第几次尝试, 作答用时(毫秒), 答案长度
+EVENT = struct.Struct("<qIBBBIH")
+
+MAX_WORD_BYTES = 0xFFFF
+MAX_ANSWER_BYTES = 0xFFFF
+
+DateLike = Union[datetime.date, datetime.datetime]
+
+
+class ReviewEvent(NamedTuple):
+    """一次答题记录"""
+    timestamp: datetime.datetime
+    word: str
+    mode: str
+    quality: int
+    attempt: int
+    response_time: float  # 秒
+    answer: str
+
+
+def _to_millis(value: DateLike) -> int:
+    """日期（当天0点）或时间 -> 本地时间的毫秒时间戳"""
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    return int(value.timestamp() * 1000)
+
+
+def log_path_for(deck_path: str) -> str:
+    """词库文件对应的复习日志文件（按完整文件名，同名的JSON/二进制/SQLite词库各有各的日志）"""
+    return deck_path + ".reviews"
+
+
+class ReviewLog:
+    """追加写的复习事件日志，支持按时间和按单词的范围查询"""
+    
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._words: List[str] = []  # 单词编号 -> 单词
+        self._word_ids: Dict[str, int] = {}
+        self._timestamps = array('q')
+        self._word_column = array('I')
+        self._modes = array('B')
+        self._qualities = array('B')
+        self._attempts = array('B')
+        self._response_ms = array('I')
+        self._answers: List[str] = []
+        self._by_word: Dict[int, array] = {}  # 单词编号 -> 事件下标
+        self._sorted = True  # 时间戳是否非递减（系统时间被调回时可能不是）
+        self._file = None
+        self._load()
+    
+    def __len__(self) -> int:
+        return len(self._timestamps)
+    
+    def _load(self):
+        """读取已有的日志，忽略末尾不完整的条目"""
+        if not os.path.exists(self.file_path):
+            return
+        with open(self.file_path, 'rb') as f:
+            data = f.read()
+        position = 0
+        valid_end = 0
+        try:
+            while position < len(data):
+                kind = data[position:position + 1]
+                position += 1
+                if kind == b"W":
+                    if position + WORD_ENTRY.size > len(data):
+                        break
+                    word_id, length = WORD_ENTRY.unpack_from(data, position)
+                    position += WORD_ENTRY.size
+                    if position + length > len(data):
+                        break
+                    text = data[position:position + length].decode('utf-8')
+                    position += length
+                    if word_id != len(self._words):
+                        raise ValueError(f"单词编号不连续: {word_id}")
+                    self._words.append(text)
+                    self._word_ids[text] = word_id
+                elif kind == b"E":
+                    if position + EVENT.size > len(data):
+                        break
+                    fields = EVENT.unpack_from(data, position)
+                    position += EVENT.size
+                    length = fields[-1]
+                    if position + length > len(data):
+                        break
+                    answer = data[position:position + length].decode('utf-8')
+                    position += length
+                    self._add(*fields[:-1], answer)
+                else:
+                    raise ValueError(f"未知的条目类型: {kind!r}")
+                valid_end = position
+        except (UnicodeDecodeError, ValueError) as e:
+            print(f"警告: 复习日志 {self.file_path} 在第{valid_end}字节处损坏（{e}），之后的记录被忽略")
+        if valid_end < len(data):
+            # 截掉不完整的尾部，之后的追加才能被正确读取
+            with open(self.file_path, 'r+b') as f:
+                f.truncate(valid_end)
+    
+    def _add(self, timestamp: int, word_id: int, mode: int, quality: int, attempt: int,
+             response_ms: int, answer: str):
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            self._sorted = False
+        index = len(self._timestamps)
+        self._timestamps.append(timestamp)
+        self._word_column.append(word_id)
+        self._modes.append(mode)
+        self._qualities.append(quality)
+        self._attempts.append(attempt)
+        self._response_ms.append(response_ms)
+        self._answers.append(answer)
+        positions = self._by_word.get(word_id)
+        if positions is None:
+            positions = self._by_word[word_id] = array('I')
+        positions.append(index)
+    
+    @metrics.timed()
+    def append(self, word: str, mode: str, quality: int, attempt: int = 1,
+               response_time: float = 0.0, answer: str = "",
+               timestamp: Optional[datetime.datetime] = None) -> bool:
+        """记录一次答题并立即写入文件，单词过长、模式未知或写入失败时返回False"""
+        text = word.encode('utf-8')
+        if len(text) > MAX_WORD_BYTES:
+            print(f"写入复习日志时出错: 单词过长（{len(text)}字节）")
+            return False
+        if mode not in MODES:
+            print(f"写入复习日志时出错: 未知的答题模式 {mode!r}")
+            return False
+        millis = _to_millis(timestamp) if timestamp else int(time.time() * 1000)
+        mode_index = MODES.index(mode)
+        quality = min(max(int(quality), 0), 255)
+        attempt = min(max(int(attempt), 0), 255)
+        response_ms = min(max(int(response_time * 1000), 0), 0xFFFFFFFF)
+        encoded = answer.encode('utf-8')[:MAX_ANSWER_BYTES]
+        # 截断可能切开多字节字符，按截断后的字节重新解码
+        answer = encoded.decode('utf-8', errors='ignore')
+        encoded = answer.encode('utf-8')
+        
+        with self._lock:
+            chunks = []
+            word_id = self._word_ids.get(word)
+            if word_id is None:
+                word_id = len(self._words)
+                chunks.append(b"W" + WORD_ENTRY.pack(word_id, len(text)) + text)
+            chunks.append(b"E" + EVENT.pack(millis, word_id, mode_index, quality, attempt,
+                                            response_ms, len(encoded)) + encoded)
+            payload = b"".join(chunks)
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+                    self._file = open(self.file_path, 'ab')
+                self._file.write(payload)
+                self._file.flush()
+            except Exception as e:
+                print(f"写入复习日志时出错: {e}")
+                return False
+            if word_id == len(self._words):
+                self._words.append(word)
+                self._word_ids[word] = word_id
+            self._add(millis, word_id, mode_index, quality, attempt, response_ms, answer)
+        if metrics.is_enabled():
+            metrics.add_bytes("review_log", len(payload))
+        return True
+    
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+    
+    def _event(self, index: int) -> ReviewEvent:
+        return ReviewEvent(
+            timestamp=datetime.datetime.fromtimestamp(self._timestamps[index] / 1000),
+            word=self._words[self._word_column[index]],
+            mode=MODES[self._modes[index]],
+            quality=self._qualities[index],
+            attempt=self._attempts[index],
+            response_time=self._response_ms[index] / 1000,
+            answer=self._answers[index],
+        )
+    
+    def _range(self, start: Optional[DateLike], end: Optional[DateLike]) -> Iterator[int]:
+        """时间在 [start, end) 内的事件下标（按记录顺序）"""
+        low = _to_millis(start) if start is not None else None
+        high = _to_millis(end) if end is not None else None
+        timestamps = self._timestamps
+        if self._sorted:
+            first = bisect.bisect_left(timestamps, low) if low is not None else 0
+            last = bisect.bisect_left(timestamps, high) if high is not None else len(timestamps)
+            return iter(range(first, last))
+        return (i for i, stamp in enumerate(timestamps)
+                if (low is None or stamp >= low) and (high is None or stamp < high))
+    
+    def between(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> List[ReviewEvent]:
+        """时间在 [start, end) 内的事件；参数为date时表示当天0点"""
+        with self._lock:
+            return [self._event(i) for i in self._range(start, end)]
+    
+    def on_date(self, day: datetime.date) -> List[ReviewEvent]:
+        """某一天的事件"""
+        return self.between(day, day + datetime.timedelta(days=1))
+    
+    def count_between(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> int:
+        """时间在 [start, end) 内的事件数（不构造事件对象）"""
+        with self._lock:
+            return sum(1 for _ in self._range(start, end))
+    
+    def for_word(self, word: str, start: Optional[DateLike] = None,
+                 end: Optional[DateLike] = None) -> List[ReviewEvent]:
+        """某个单词的事件（可限定时间范围），按记录顺序"""
+        with self._lock:
+            word_id = self._word_ids.get(word)
+            if word_id is None:
+                return []
+            positions = self._by_word[word_id]
+            low = _to_millis(start) if start is not None else None
+            high = _to_millis(end) if end is not None else None
+            timestamps = self._timestamps
+            return [self._event(i) for i in positions
+                    if (low is None or timestamps[i] >= low) and (high is None or timestamps[i] < high)]
+    
+    def words(self) -> List[str]:
+        """日志中出现过的单词（按第一次出现的顺序）"""
+        with self._lock:
+            return list(self._words)
@@ -0,0 +1,262 @@
+# src/search.py
+"""
+单词搜索索引模块
+
+- 精确匹配：小写单词 -> 单词文本 的字典
+- 前缀匹配：按长度分组的有序单词列表，二分查找前缀范围
+- 释义匹配：释义的字符二元组(bigram)倒排索引，单字查询使用单字索引
+- 拼写容错：编辑距离为1的单词必有一半原样保留（鸽巢原理），
+  按前一半查前缀、按后一半查反转单词的前缀，候选再用编辑距离确认
+
+大词库构建索引需要几秒，索引建好之前可以用scan_search逐个扫描，结果与索引搜索相同。
+"""
+import bisect
+import heapq
+from typing import AbstractSet, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """a和b的Damerau-Levenshtein距离是否不超过1（线性时间，比完整动态规划快得多）"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    # 跳过公共前缀，第一个不同的位置之后必须能对齐
+    i = 0
+    shorter = min(len(a), len(b))
+    while i < shorter and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return (a[i + 1:] == b[i + 1:] or
+                (i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]))
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i:]
+
+
+def _prefix_range(sorted_keys: List[str], prefix: str) -> Tuple[int, int]:
+    """有序列表中以prefix开头的元素下标范围"""
+    start = bisect.bisect_left(sorted_keys, prefix)
+    end = bisect.bisect_left(sorted_keys, prefix + "\uffff", start)
+    return start, end
+
+
+class WordSearchIndex:
+    """单词和释义的搜索索引，支持增量更新"""
+    
+    # 拼写容错只对不短于该长度的查询启用（太短的查询候选过多且没有意义）
+    MIN_FUZZY_LENGTH = 4
+    
+    def __init__(self):
+        self._meanings: Dict[str, str] = {}  # 单词文本 -> 小写释义
+        self._exact: Dict[str, Set[str]] = {}  # 小写单词 -> 单词文本（大小写不同的单词可能有多个）
+        self._by_length: Dict[int, List[str]] = {}  # 长度 -> 有序的小写单词
+        self._reversed_by_length: Dict[int, List[str]] = {}  # 长度 -> 有序的反转小写单词
+        self._grams: Dict[str, Set[str]] = {}  # 释义中的单字和二元组 -> 单词文本
+    
+    def __len__(self) -> int:
+        return len(self._meanings)
+    
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[str, str]]) -> "WordSearchIndex":
+        """从 (单词文本, 释义) 批量构建（有序列表最后统一排序）"""
+        index = cls()
+        for text, meaning in entries:
+            index._add(text, meaning, keep_sorted=False)
+        for keys in index._by_length.values():
+            keys.sort()
+        for keys in index._reversed_by_length.values():
+            keys.sort()
+        return index
+    
+    @staticmethod
+    def _meaning_grams(meaning: str) -> Set[str]:
+        chars = [c for c in meaning if not c.isspace()]
+        grams = set(chars)
+        grams.update(a + b for a, b in zip(chars, chars[1:]))
+        return grams
+    
+    def _add(self, text: str, meaning: str, keep_sorted: bool = True):
+        key = text.lower()
+        meaning = (meaning or "").lower()
+        self._meanings[text] = meaning
+        
+        texts = self._exact.setdefault(key, set())
+        if not texts:
+            # 同一个小写单词只在有序列表中出现一次
+            for table, value in ((self._by_length, key), (self._reversed_by_length, key[::-1])):
+                keys = table.setdefault(len(key), [])
+                if keep_sorted:
+                    bisect.insort(keys, value)
+                else:
+                    keys.append(value)
+        texts.add(text)
+        
+        for gram in self._meaning_grams(meaning):
+            self._grams.setdefault(gram, set()).add(text)
+    
+    def remove(self, text: str):
+        """从索引中移除单词"""
+        meaning = self._meanings.pop(text, None)
+        if meaning is None:
+            return
+        key = text.lower()
+        texts = self._exact.get(key)
+        if texts is not None:
+            texts.discard(text)
+            if not texts:
+                del self._exact[key]
+                for table, value in ((self._by_length, key), (self._reversed_by_length, key[::-1])):
+                    keys = table[len(key)]
+                    del keys[bisect.bisect_left(keys, value)]
+        for gram in self._meaning_grams(meaning):
+            postings = self._grams.get(gram)
+            if postings is not None:
+                postings.discard(text)
+                if not postings:
+                    del self._grams[gram]
+    
+    def update(self, text: str, meaning: str):
+        """新增单词或更新释义（释义未变时不做任何事）"""
+        old = self._meanings.get(text)
+        if old is not None:
+            if old == (meaning or "").lower():
+                return
+            self.remove(text)
+        self._add(text, meaning)
+    
+    # 以下查询的allowed参数：只在这些单词文本中查找（先筛选再取前limit个），None表示不限
+    
+    def exact(self, query: str, allowed: Optional[AbstractSet[str]] = None) -> List[str]:
+        """不区分大小写的精确匹配"""
+        texts = self._exact.get(query.strip().lower(), ())
+        return sorted(texts if allowed is None else (text for text in texts if text in allowed))
+    
+    def _expand(self, keys: Iterable[str], allowed: Optional[AbstractSet[str]] = None) -> List[str]:
+        """小写单词 -> 单词文本"""
+        texts = []
+        for key in keys:
+            texts.extend(sorted(self._exact[key] if allowed is None else self._exact[key] & allowed))
+        return texts
+    
+    def prefix(self, query: str, limit: int = 50, allowed: Optional[AbstractSet[str]] = None) -> List[str]:
+        """以query开头的单词，先短后长、同长度按字母顺序"""
+        query = query.strip().lower()
+        if not query:
+            return []
+        texts: List[str] = []
+        for length in sorted(length for length in self._by_length if length >= len(query)):
+            sorted_keys = self._by_length[length]
+            start, end = _prefix_range(sorted_keys, query)
+            if allowed is None:
+                texts.extend(self._expand(sorted_keys[start:min(end, start + limit - len(texts))]))
+            else:
+                for key in sorted_keys[start:end]:
+                    texts.extend(self._expand((key,), allowed))
+                    if len(texts) >= limit:
+                        break
+            if len(texts) >= limit:
+                break
+        return texts[:limit]
+    
+    def meaning(self, query: str, limit: int = 50, allowed: Optional[AbstractSet[str]] = None) -> List[str]:
+        """释义中包含query的单词"""
+        chars = [c for c in query.lower() if not c.isspace()]
+        if not chars:
+            return []
+        grams = [a + b for a, b in zip(chars, chars[1:])] or chars
+        postings = [self._grams.get(gram) for gram in set(grams)]
+        if not all(postings):
+            return []
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+        
+        needle = query.strip().lower()
+        meanings = self._meanings
+        return heapq.nsmallest(limit, (text for text in candidates
+                                       if needle in meanings[text] and (allowed is None or text in allowed)))
+    
+    def fuzzy(self, query: str, limit: int = 50, allowed: Optional[AbstractSet[str]] = None) -> List[str]:
+        """与query相差一次编辑（插入/删除/替换/相邻交换）以内的单词"""
+        query = query.strip().lower()
+        if len(query) < self.MIN_FUZZY_LENGTH:
+            return []
+        half = len(query) // 2
+        head, tail = query[:half], query[half + 1:][::-1]
+        
+        candidates: Set[str] = set()
+        for length in (len(query) - 1, len(query), len(query) + 1):
+            sorted_keys = self._by_length.get(length)
+            if sorted_keys:
+                start, end = _prefix_range(sorted_keys, head)
+                candidates.update(sorted_keys[start:end])
+            reversed_keys = self._reversed_by_length.get(length)
+            if reversed_keys:
+                start, end = _prefix_range(reversed_keys, tail)
+                candidates.update(key[::-1] for key in reversed_keys[start:end])
+        
+        candidates.discard(query)
+        return self._expand(sorted(key for key in candidates if within_one_edit(query, key)), allowed)[:limit]
+    
+    def search(self, query: str, limit: int = 50, allowed: Optional[AbstractSet[str]] = None) -> List[str]:
+        """综合搜索：精确 > 前缀 > 释义 > 拼写容错，结果去重"""
+        results: List[str] = []
+        seen: Set[str] = set()
+        
+        def extend(texts: List[str]):
+            for text in texts:
+                if text not in seen and len(results) < limit:
+                    seen.add(text)
+                    results.append(text)
+        
+        extend(self.exact(query, allowed))
+        extend(self.prefix(query, limit, allowed))
+        if len(results) < limit:
+            extend(self.meaning(query, limit, allowed))
+        if len(results) < limit:
+            extend(self.fuzzy(query, limit, allowed))
+        return results
+
+
+def scan_search(entries: Iterable[Tuple[str, str]], query: str, limit: int = 50,
+                allowed: Optional[AbstractSet[str]] = None) -> List[str]:
+    """
+    不用索引的综合搜索：逐个检查 (单词文本, 释义)，
+    结果与 WordSearchIndex.build(entries).search(query, limit, allowed) 相同
+    """
+    key_query = query.strip().lower()
+    if not key_query:
+        return []
+    fuzzy = len(key_query) >= WordSearchIndex.MIN_FUZZY_LENGTH
+    prefixed: Dict[str, List[str]] = {}  # 小写单词 -> 单词文本
+    near: Dict[str, List[str]] = {}
+    meaning_matches: List[str] = []
+    for text, meaning in entries:
+        if allowed is not None and text not in allowed:
+            continue
+        key = text.lower()
+        if key.startswith(key_query):
+            prefixed.setdefault(key, []).append(text)
+        if (fuzzy and key != key_query and abs(len(key) - len(key_query)) <= 1 and
+                within_one_edit(key_query, key)):
+            near.setdefault(key, []).append(text)
+        if key_query in (meaning or "").lower():
+            meaning_matches.append(text)
+    
+    results: List[str] = []
+    seen: Set[str] = set()
+    
+    def extend(texts: List[str]):
+        for text in texts:
+            if text not in seen and len(results) < limit:
+                seen.add(text)
+                results.append(text)
+    
+    extend(sorted(prefixed.get(key_query, ())))
+    extend([text for key in sorted(prefixed, key=lambda key: (len(key), key))
+             for text in sorted(prefixed[key])][:limit])
+    if len(results) < limit:
+        extend(heapq.nsmallest(limit, meaning_matches))
+    if len(results) < limit:
+        extend([text for key in sorted(near) for text in sorted(near[key])][:limit])
+    return results
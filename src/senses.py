@@ -0,0 +1,113 @@
+# src/senses.py
+"""
+释义解析模块
+
+把单词的中文释义拆成带词性的义项，例如
+    "v. 遗弃；离开；放弃；终止；陷入n. 放任，狂热"
+拆成 v.遗弃 / v.离开 / v.放弃 / v.终止 / v.陷入 / n.放任 / n.狂热。
+词性标记(n./v./adj.等)可以出现在任意位置，方括号中的领域标签([计]、【医】)
+作用于其后同一词性下的义项。解析结果按义项文本建立字典，评分时只需常数次查找。
+"""
+import re
+from typing import Dict, FrozenSet, List, NamedTuple, Tuple
+
+# 常见词性标记（前面不能紧跟英文字母，避免把单词中的字母当成标记）
+POS_PATTERN = re.compile(
+    r"(?<![a-z])(vt|vi|v|n|adj|adv|prep|conj|pron|num|art|int|interj|aux|abbr|pl)\.",
+    re.IGNORECASE)
+DOMAIN_PATTERN = re.compile(r"[\[【]([^\]】]*)[\]】]")
+SEPARATOR_PATTERN = re.compile(r"[；;，,、/]")
+# 义项中的括号注释，如 "放弃(权利)" 中的 "(权利)"
+NOTE_PATTERN = re.compile(r"[(（][^)）]*[)）]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class Sense(NamedTuple):
+    """一个义项"""
+    text: str        # 义项文本（已去掉词性和领域标签）
+    pos: str = ""    # 词性，如 "v"、"adj"
+    domain: str = ""  # 领域标签，如 "计"
+
+
+def normalize(text: str) -> str:
+    """比较用的形式：小写并去掉所有空白"""
+    return WHITESPACE_PATTERN.sub("", text).lower()
+
+
+def _split_senses(segment: str, pos: str) -> List[Sense]:
+    """拆分同一词性下的文本，领域标签作用于其后的义项"""
+    senses = []
+    domain = ""
+    position = 0
+    for match in list(DOMAIN_PATTERN.finditer(segment)) + [None]:
+        end = match.start() if match else len(segment)
+        for part in SEPARATOR_PATTERN.split(segment[position:end]):
+            part = part.strip()
+            if part:
+                senses.append(Sense(part, pos, domain))
+        if match:
+            domain = match.group(1).strip()
+            position = match.end()
+    return senses
+
+
+def parse_senses(meaning: str) -> List[Sense]:
+    """把释义字符串拆成义项列表（保持原顺序）"""
+    senses: List[Sense] = []
+    pos = ""
+    position = 0
+    for match in list(POS_PATTERN.finditer(meaning or "")) + [None]:
+        end = match.start() if match else len(meaning or "")
+        senses.extend(_split_senses(meaning[position:end], pos))
+        if match:
+            pos = match.group(1).lower()
+            position = match.end()
+    return senses
+
+
+class MeaningSenses:
+    """一条释义的解析结果，供评分时快速查找"""
+    
+    __slots__ = ("meaning", "full", "senses", "chars", "_lookup")
+    
+    # 答案包含义项时，义项至少要有这么多个字才算部分正确
+    MIN_CONTAINED_LENGTH = 2
+    
+    def __init__(self, meaning: str):
+        self.meaning = meaning
+        self.full = normalize(meaning or "")
+        self.senses: Tuple[Sense, ...] = tuple(parse_senses(meaning))
+        self.chars: FrozenSet[str] = frozenset(self.full)
+        # 规范化的义项文本 -> 义项；带括号注释的义项同时登记去掉注释后的形式
+        self._lookup: Dict[str, Sense] = {}
+        for sense in self.senses:
+            key = normalize(sense.text)
+            self._lookup.setdefault(key, sense)
+            bare = NOTE_PATTERN.sub("", key)
+            if bare:
+                self._lookup.setdefault(bare, sense)
+    
+    def __len__(self) -> int:
+        return len(self.senses)
+    
+    def match(self, answer: str) -> List[Sense]:
+        """
+        答案中每一部分都恰好是某个义项时返回对应的义项，否则返回空列表
+        answer可以包含多个用分隔符隔开的义项，也可以带词性标记
+        """
+        parts = [normalize(sense.text) for sense in parse_senses(answer)]
+        matched = [self._lookup.get(part) for part in parts]
+        if not matched or None in matched:
+            return []
+        return matched
+    
+    def contains(self, answer: str) -> bool:
+        """
+        答案是某个义项的一部分，或包含某个不短于MIN_CONTAINED_LENGTH的义项
+        单字义项（如"书"）不算：几乎任何答案都可能碰巧含有这个字
+        """
+        answer = normalize(answer)
+        if not answer:
+            return False
+        return any(answer in key or (len(key) >= self.MIN_CONTAINED_LENGTH and key in answer)
+                   for key in self._lookup)
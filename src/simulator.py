@@ -0,0 +1,187 @@
+# src/simulator.py
+"""
+复习负荷模拟模块
+
+从当前词库出发，按SM2Scheduler的规则逐日向前模拟：每天先复习到期单词
+（受每日复习数上限限制，最逾期的优先），再学习新单词（受每日新单词数上限限制），
+答对与否由回忆概率模型随机决定。所有单词的状态保存在NumPy数组中，
+每一天只需若干次数组运算，10万单词模拟一年只需几秒。需要numpy。
+"""
+import datetime
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from .load_leveler import LoadLeveler
+from .sm2_algorithm import SM2Scheduler, NUMPY_AVAILABLE, np
+
+STUDY_SETTINGS_FILE = "data/study_settings.json"
+
+
+def load_study_settings(settings_file: str = STUDY_SETTINGS_FILE) -> Dict[str, int]:
+    """读取学习设置中的每日新单词数和每日复习单词数（与界面使用同一个文件）"""
+    settings = {"每日新单词数": 20, "每日复习单词数": 50}
+    if os.path.exists(settings_file):
+        try:
+            with open(settings_file, 'r', encoding='utf-8') as f:
+                settings.update(json.load(f))
+        except Exception as e:
+            print(f"加载设置失败: {e}")
+    return settings
+
+
+class ExponentialRecallModel:
+    """默认的回忆概率模型
+    
+    已学单词：p = retention ** (距上次复习天数 / 记忆稳定度)，
+    稳定度为复习间隔按易度因子缩放（易度2.5时等于间隔），按时复习时约为retention。
+    复习次数为0的单词（新单词或答错后重置的单词）按new_word_recall计算。
+    """
+    
+    def __init__(self, retention: float = 0.9, new_word_recall: float = 0.7):
+        self.retention = retention
+        self.new_word_recall = new_word_recall
+    
+    def __call__(self, repetitions, interval, ease_factor, elapsed):
+        stability = np.maximum(interval, 1) * ease_factor / 2.5
+        recall = self.retention ** (np.maximum(elapsed, 0) / stability)
+        return np.where(repetitions == 0, self.new_word_recall, recall)
+
+
+class ReviewSimulator:
+    """逐日模拟复习负荷
+    
+    recall_model(repetitions, interval, ease_factor, elapsed) 返回每个单词答对的概率，
+    答对时按pass_quality、答错时按fail_quality更新（与界面评分一致的0-5分）。
+    """
+    
+    def __init__(self, scheduler: Optional[SM2Scheduler] = None,
+                 recall_model: Optional[Callable] = None,
+                 pass_quality: int = 4, fail_quality: int = 2, seed: Optional[int] = None,
+                 load_leveler: Optional[LoadLeveler] = None):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("复习模拟需要numpy，请先安装: pip install numpy")
+        self.scheduler = scheduler or SM2Scheduler()
+        self.load_leveler = load_leveler
+        self.recall_model = recall_model or ExponentialRecallModel()
+        self.pass_quality = pass_quality
+        self.fail_quality = fail_quality
+        self.rng = np.random.default_rng(seed)
+    
+    def simulate(self, columns, days: int, daily_new: int, daily_review: int,
+                 added_per_day: int = 0, start_date: Optional[datetime.date] = None
+                 ) -> List[Dict[str, Any]]:
+        """
+        从columns（WordColumns）的状态开始模拟days天，返回每天的统计
+        
+        added_per_day: 每天新加入词库的单词数
+        start_date: 模拟的第一天，默认为今天
+        """
+        start = start_date or datetime.date.today()
+        count = len(columns)
+        size = count + added_per_day * days
+        
+        # 状态数组预留出模拟期间新加入单词的位置
+        repetitions = np.zeros(size, np.int64)
+        interval = np.ones(size, np.int64)
+        ease_factor = np.full(size, 2.5)
+        next_review = np.zeros(size, np.int64)
+        last_reviewed = np.zeros(size, np.int64)
+        repetitions[:count] = columns.repetitions
+        interval[:count] = columns.interval
+        ease_factor[:count] = columns.ease_factor
+        next_review[:count] = columns.next_review
+        last_reviewed[:count] = columns.last_reviewed
+        
+        leveler = self.load_leveler
+        if leveler is not None:
+            learned = repetitions[:count] > 0
+            days_due, day_counts = np.unique(next_review[:count][learned], return_counts=True)
+            leveler.seed({datetime.date.fromordinal(int(day)): int(n)
+                          for day, n in zip(days_due, day_counts)})
+        
+        results = []
+        active = count
+        for day in range(days):
+            today = start + datetime.timedelta(days=day)
+            ordinal = today.toordinal()
+            if added_per_day:
+                next_review[active:active + added_per_day] = ordinal
+                active += added_per_day
+            
+            # 到期单词：逾期最久的优先，超出上限的顺延到之后
+            due = np.flatnonzero((repetitions[:active] > 0) & (next_review[:active] <= ordinal))
+            backlog = max(len(due) - daily_review, 0)
+            if backlog:
+                due = due[np.argsort(next_review[due], kind="stable")[:daily_review]]
+            
+            # 新单词（复习次数为0，包括答错后重置的单词），按词库顺序
+            new = np.flatnonzero(repetitions[:active] == 0)[:daily_new]
+            
+            studied = np.concatenate([due, new])
+            if len(studied):
+                elapsed = ordinal - last_reviewed[studied]
+                probability = self.recall_model(repetitions[studied], interval[studied],
+                                                ease_factor[studied], elapsed)
+                passed = self.rng.random(len(studied)) < probability
+                quality = np.where(passed, self.pass_quality, self.fail_quality)
+                
+                new_reps, new_interval, new_ease = self.scheduler.update_arrays(
+                    repetitions[studied], interval[studied], ease_factor[studied], quality)
+                if leveler is not None:
+                    next_review[studied] = self._level(leveler, today, next_review[studied],
+                                                       repetitions[studied] > 0, new_reps, new_interval)
+                else:
+                    next_review[studied] = ordinal + new_interval
+                repetitions[studied] = new_reps
+                interval[studied] = new_interval
+                ease_factor[studied] = new_ease
+                last_reviewed[studied] = ordinal
+                lapses = int((~passed).sum())
+            else:
+                lapses = 0
+            
+            results.append({
+                "date": today.isoformat(),
+                "reviews": len(due),
+                "new": len(new),
+                "lapses": lapses,
+                "backlog": backlog,
+                "learned": int((repetitions[:active] > 0).sum()),
+                "total_words": active,
+            })
+        return results
+    
+    @staticmethod
+    def _level(leveler: LoadLeveler, today: datetime.date, previous_due, was_learned,
+               repetitions, interval):
+        """按SM2Scheduler启用负荷均衡时的规则逐个安排复习日期，返回日序号数组"""
+        ordinal = today.toordinal()
+        due = ordinal + interval
+        for i, (old_due, learned, reps, days) in enumerate(zip(
+                previous_due.tolist(), was_learned.tolist(), repetitions.tolist(), interval.tolist())):
+            if learned:
+                leveler.release(datetime.date.fromordinal(old_due))
+            if reps > 0:
+                due[i] = leveler.place(today, days).toordinal()
+        return due
+
+
+def simulate_deck(data_manager, days: int = 90, added_per_day: int = 0,
+                  daily_new: Optional[int] = None, daily_review: Optional[int] = None,
+                  settings_file: str = STUDY_SETTINGS_FILE,
+                  start_date: Optional[datetime.date] = None,
+                  seed: Optional[int] = None, level_load: bool = False) -> List[Dict[str, Any]]:
+    """用当前词库和学习设置模拟未来days天的复习负荷（未指定的上限取自学习设置）"""
+    settings = load_study_settings(settings_file)
+    if daily_new is None:
+        daily_new = int(settings["每日新单词数"])
+    if daily_review is None:
+        daily_review = int(settings["每日复习单词数"])
+    
+    columns = data_manager.columns()
+    if columns is None:
+        raise RuntimeError("复习模拟需要numpy，请先安装: pip install numpy")
+    simulator = ReviewSimulator(seed=seed, load_leveler=LoadLeveler() if level_load else None)
+    return simulator.simulate(columns, days, daily_new, daily_review,
+                              added_per_day=added_per_day, start_date=start_date)
@@ -3,10 +3,22 @@
 SM2间隔重复算法模块
 """
 import datetime
+import functools
 from dataclasses import dataclass, field
-from typing import Optional, List, Tuple
+from typing import Iterable, Optional, List, Tuple, Union
 import random
 
+from .metrics import timed
+from .senses import MeaningSenses, normalize
+
+# 尝试导入numpy（用于大批量单词的向量化计算）
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
 
 @dataclass
 class Word:
@@ -23,14 +35,23 @@ class Word:
     last_reviewed: Optional[datetime.date] = None  # 上次复习时间
     created_at: datetime.date = field(default_factory=datetime.date.today)  # 创建时间
     forget_risk: float = 0.0  # 遗忘风险系数 (0.0-1.0)
+    _senses: Optional[MeaningSenses] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def senses(self) -> MeaningSenses:
+        """释义拆分出的义项（第一次使用时解析并缓存，释义修改后重新解析）"""
+        cached = self._senses
+        if cached is None or cached.meaning != self.meaning:
+            cached = self._senses = MeaningSenses(self.meaning)
+        return cached
     
-    def calculate_forget_risk(self) -> float:
-        """计算遗忘风险系数"""
+    def calculate_forget_risk(self, today: Optional[datetime.date] = None) -> float:
+        """计算遗忘风险系数，today默认为当天"""
         if not self.last_reviewed or self.repetitions == 0:
             return 1.0  # 新单词遗忘风险最高
         
         # 基于艾宾浩斯遗忘曲线计算
-        days_since_last_review = (datetime.date.today() - self.last_reviewed).days
+        days_since_last_review = ((today or datetime.date.today()) - self.last_reviewed).days
         
         if self.repetitions <= 1:
             # 第1次复习后
@@ -60,10 +81,27 @@ class Word:
                 return 0.9
 
 
+def forget_risk_array(repetitions, interval, days_since, reviewed):
+    """
+    Word.calculate_forget_risk的向量化版本（需要numpy）
+    repetitions/interval/days_since: 整数数组
+    reviewed: 布尔数组，表示是否有上次复习时间
+    """
+    low = np.where(days_since <= 1, 0.1, np.where(days_since <= 7, 0.3, 0.7))
+    mid = np.where(days_since <= 7, 0.1, np.where(days_since <= 30, 0.3, 0.5))
+    high = np.where(days_since <= interval * 0.5, 0.1,
+                    np.where(days_since <= interval, 0.3,
+                             np.where(days_since <= interval * 2, 0.6, 0.9)))
+    risk = np.where(repetitions <= 1, low, np.where(repetitions <= 3, mid, high))
+    return np.where(reviewed & (repetitions != 0), risk, 1.0)
+
+
 class SM2Scheduler:
     """SM2间隔重复调度器"""
     
-    def __init__(self):
+    def __init__(self, load_leveler=None):
+        # 可选的复习负荷均衡器（LoadLeveler），为None时严格按 今天+间隔 安排
+        self.load_leveler = load_leveler
         self.quality_to_ease_change = {
             0: -0.8,  # 完全忘记
             1: -0.5,  # 很难回忆
@@ -73,13 +111,19 @@ class SM2Scheduler:
             5: 0.2,   # 完美回忆
         }
     
-    def update_review_schedule(self, word: Word, quality: int) -> Word:
+    @timed()
+    def update_review_schedule(self, word: Word, quality: int,
+                               today: Optional[datetime.date] = None) -> Word:
         """
         根据复习质量更新单词的复习计划
         quality: 0-5，表示回忆质量
+        today: 复习日期，默认为当天
         """
+        today = today or datetime.date.today()
+        previous_due = word.next_review if word.repetitions > 0 else None
+        
         # 记录上次复习时间
-        word.last_reviewed = datetime.date.today()
+        word.last_reviewed = today
         word.repetitions += 1
         
         # 更新易度因子
@@ -100,65 +144,224 @@ class SM2Scheduler:
                 word.interval = int(word.interval * word.ease_factor)
         
         # 安排下次复习时间
-        word.next_review = datetime.date.today() + datetime.timedelta(days=word.interval)
+        word.next_review = self._next_review_date(today, word.interval,
+                                                  word.repetitions > 0, previous_due)
         
         # 重新计算遗忘风险
-        word.forget_risk = word.calculate_forget_risk()
+        word.forget_risk = word.calculate_forget_risk(today)
         
         return word
     
+    def _next_review_date(self, today: datetime.date, interval: int, learned: bool,
+                          previous_due: Optional[datetime.date]) -> datetime.date:
+        """下次复习日期；启用负荷均衡时在目标日期附近选择到期单词最少的一天"""
+        if self.load_leveler is None:
+            return today + datetime.timedelta(days=interval)
+        self.load_leveler.release(previous_due)
+        if not learned:
+            # 答错重置的单词回到新单词池，不计入到期直方图
+            return today + datetime.timedelta(days=interval)
+        return self.load_leveler.place(today, interval)
+    
+    def update_arrays(self, repetitions, interval, ease_factor, quality):
+        """
+        update_review_schedule的数组版本（需要numpy），一次处理多个单词
+        返回新的 (repetitions, interval, ease_factor)，逐元素结果与标量版本完全一致
+        """
+        quality = np.asarray(quality, np.int64)
+        table = np.array([self.quality_to_ease_change.get(q, 0.0) for q in range(6)])
+        known = (quality >= 0) & (quality <= 5)
+        ease_change = np.where(known, table[np.clip(quality, 0, 5)], 0.0)
+        
+        repetitions = np.asarray(repetitions, np.int64) + 1
+        ease_factor = np.maximum(1.3, np.minimum(2.5, np.asarray(ease_factor, np.float64) + ease_change))
+        
+        grown = (np.asarray(interval, np.int64) * ease_factor).astype(np.int64)
+        interval = np.where(repetitions == 1, 1, np.where(repetitions == 2, 3, grown))
+        
+        # 回答不正确，重置间隔
+        failed = quality < 3
+        interval = np.where(failed, 1, interval)
+        repetitions = np.where(failed, 0, repetitions)
+        return repetitions, interval, ease_factor
+    
+    @timed()
+    def update_many(self, reviews: List[Tuple[Word, int]],
+                    today: Optional[datetime.date] = None) -> List[Word]:
+        """
+        批量应用复习结果，例如整轮学习结束后或重放复习记录
+        reviews: [(单词, 质量)]，同一单词出现多次时按顺序依次应用
+        today: 复习日期，默认为当天（整批只读取一次时钟）
+        """
+        today = today or datetime.date.today()
+        # 负荷均衡的结果取决于安排的先后顺序，为与逐个复习保持一致，此时也逐个处理
+        if not NUMPY_AVAILABLE or self.load_leveler is not None:
+            return [self.update_review_schedule(word, quality, today) for word, quality in reviews]
+        
+        # 同一单词的多次复习互相依赖，按出现次序分轮，每轮内的单词各不相同
+        rounds: List[List[Tuple[Word, int]]] = []
+        seen_count = {}
+        for word, quality in reviews:
+            n = seen_count.get(id(word), 0)
+            seen_count[id(word)] = n + 1
+            if n == len(rounds):
+                rounds.append([])
+            rounds[n].append((word, quality))
+        
+        today_ord = today.toordinal()
+        for batch in rounds:
+            words = [word for word, _ in batch]
+            repetitions, interval, ease_factor = self.update_arrays(
+                [w.repetitions for w in words],
+                [w.interval for w in words],
+                [w.ease_factor for w in words],
+                [quality for _, quality in batch])
+            forget_risk = forget_risk_array(repetitions, interval, 0, True)
+            
+            for word, reps, days, ease, risk in zip(words, repetitions.tolist(), interval.tolist(),
+                                                    ease_factor.tolist(), forget_risk.tolist()):
+                word.last_reviewed = today
+                word.repetitions = reps
+                word.interval = days
+                word.ease_factor = ease
+                word.next_review = datetime.date.fromordinal(today_ord + days)
+                word.forget_risk = risk
+        
+        return [word for word, _ in reviews]
+    
+    def forget_risks(self, words: List[Word], today: Optional[datetime.date] = None) -> List[float]:
+        """
+        单词在today（默认为当天）的遗忘风险，与Word.calculate_forget_risk一致
+        只计算不修改Word对象，后台线程查询时不会改动界面线程正在使用的单词
+        """
+        today = today or datetime.date.today()
+        if not NUMPY_AVAILABLE:
+            return [word.calculate_forget_risk(today) for word in words]
+        
+        count = len(words)
+        repetitions = np.fromiter((w.repetitions for w in words), np.int64, count)
+        interval = np.fromiter((w.interval for w in words), np.int64, count)
+        last_reviewed = np.fromiter(
+            (w.last_reviewed.toordinal() if w.last_reviewed else 0 for w in words), np.int64, count)
+        risk = forget_risk_array(repetitions, interval, today.toordinal() - last_reviewed,
+                                 last_reviewed > 0)
+        return risk.tolist()
+    
+    @timed()
     def get_forgetting_curve_words(self, words: List[Word], threshold: float = 0.7) -> List[Word]:
         """
-        获取遗忘风险高的单词
+        获取遗忘风险高的单词，按当前遗忘风险从高到低排序
         threshold: 遗忘风险阈值，默认0.7
         """
-        high_risk_words = []
-        for word in words:
-            if word.repetitions > 0:  # 只考虑已学习过的单词
-                word.forget_risk = word.calculate_forget_risk()
-                if word.forget_risk >= threshold and word.next_review > datetime.date.today():
-                    high_risk_words.append(word)
+        today = datetime.date.today()
+        learned = [w for w in words if w.repetitions > 0]  # 只考虑已学习过的单词
+        high_risk = [(risk, word) for word, risk in zip(learned, self.forget_risks(learned, today))
+                     if risk >= threshold and word.next_review > today]
         
         # 按遗忘风险排序
-        high_risk_words.sort(key=lambda w: w.forget_risk, reverse=True)
-        return high_risk_words
+        high_risk.sort(key=lambda item: item[0], reverse=True)
+        return [word for _, word in high_risk]
+
+
+def bounded_damerau_levenshtein(a: str, b: str, max_distance: int = 2) -> int:
+    """
+    限定上界的Damerau-Levenshtein距离（相邻字母交换算一次编辑）
+    先去掉公共前后缀，只计算对角线附近宽为max_distance的带状区域，
+    某一行全部超过上界时提前结束。距离大于max_distance时返回max_distance + 1
+    """
+    if a == b:
+        return 0
+    limit = max_distance + 1
+    
+    # 公共前缀和后缀不影响距离
+    start = 0
+    shorter = min(len(a), len(b))
+    while start < shorter and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < shorter - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    
+    if abs(len(a) - len(b)) > max_distance:
+        return limit
+    if not a or not b:
+        return min(max(len(a), len(b)), limit)
+    
+    before_previous: List[int] = []
+    previous = [min(j, limit) for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [limit] * (len(b) + 1)
+        current[0] = min(i, limit)
+        row_min = current[0]
+        char = a[i - 1]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1,
+                        previous[j - 1] + (char != b[j - 1]))
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before_previous[j - 2] + 1)
+            value = min(value, limit)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min >= limit:
+            return limit
+        before_previous, previous = previous, current
+    return previous[len(b)]
+
+
+@functools.lru_cache(maxsize=4096)
+def meaning_senses(meaning: str) -> MeaningSenses:
+    """按释义字符串缓存的解析结果（没有Word对象时使用）"""
+    return MeaningSenses(meaning)
+
+
+@functools.lru_cache(maxsize=8192)
+def spelling_distance(user_input: str, target: str) -> int:
+    """拼写评分用的编辑距离（只区分0/1/2/超过2），按(输入, 目标)缓存"""
+    return bounded_damerau_levenshtein(user_input, target, 2)
 
 
 class AIEvaluator:
     """AI自动评分器"""
     
-    def evaluate_meaning(self, user_input: str, correct_meaning: str, word_text: str) -> int:
+    # 拼写编辑距离 -> 评分（距离超过2时为1分）
+    SPELLING_SCORES = {0: 5, 1: 3, 2: 2}
+    
+    @timed()
+    def evaluate_meaning(self, user_input: str, correct_meaning: Union[str, MeaningSenses],
+                         word_text: str) -> int:
         """
         评估中文释义准确性
+        correct_meaning: 释义字符串，或预先解析好的义项（Word.senses）
         返回评分 0-5
         """
-        # 简单实现：基于字符串相似度
-        user_input = user_input.strip().lower()
-        correct_meaning = correct_meaning.strip().lower()
+        senses = correct_meaning if isinstance(correct_meaning, MeaningSenses) else meaning_senses(correct_meaning)
+        answer = normalize(user_input)
         
-        if not user_input:
+        if not answer:
             return 0
         
-        # 完全匹配
-        if user_input == correct_meaning:
+        # 与完整释义或其中的义项完全一致（可以同时回答多个义项）
+        if answer == senses.full or senses.match(user_input):
             return 5
         
         # 包含关系
-        if user_input in correct_meaning or correct_meaning in user_input:
+        if answer in senses.full or senses.full in answer or senses.contains(answer):
             return 4
         
         # 长度相似
-        len_diff = abs(len(user_input) - len(correct_meaning))
+        len_diff = abs(len(answer) - len(senses.full))
         if len_diff <= 2:
             return 3
         
         # 部分匹配
-        common_chars = set(user_input) & set(correct_meaning)
-        if len(common_chars) >= 2:
+        if len(senses.chars.intersection(answer)) >= 2:
             return 2
         
         return 1
     
+    @timed()
     def evaluate_spelling(self, user_input: str, correct_spelling: str, word_meaning: str) -> int:
         """
         评估英文拼写准确性
@@ -178,16 +381,24 @@ class AIEvaluator:
         if user_input.lower() == correct_spelling.lower():
             return 4
         
-        # 常见的拼写错误容错
-        if len(user_input) == len(correct_spelling):
-            # 计算编辑距离
-            diff_count = sum(1 for a, b in zip(user_input, correct_spelling) if a != b)
-            if diff_count == 1:
-                return 3
-            elif diff_count == 2:
-                return 2
-        
-        return 1
+        # 常见的拼写错误容错：多字母、少字母、错字母、相邻字母颠倒都算一次编辑
+        return self.SPELLING_SCORES.get(spelling_distance(user_input, correct_spelling), 1)
+    
+    @timed()
+    def evaluate_spelling_batch(self, answers: Iterable[Tuple[str, str]]) -> List[int]:
+        """
+        批量评估英文拼写
+        answers: [(用户输入, 正确拼写)]，返回与之对应的评分列表
+        """
+        scores = []
+        for user_input, correct_spelling in answers:
+            user_input = user_input.strip().lower()
+            if not user_input:
+                scores.append(0)
+                continue
+            distance = spelling_distance(user_input, correct_spelling.strip().lower())
+            scores.append(self.SPELLING_SCORES.get(distance, 1))
+        return scores
 
 
 def test_sm2_algorithm():
@@ -0,0 +1,812 @@
+# src/storage.py
+"""
+单词存储后端模块
+
+WordDataManager通过WordStore接口读写单词记录，记录是与word_data.json中
+格式相同的字典。目前有两种后端：
+- JsonWordStore：JSON快照 + 追加写日志（默认）
+- BinaryWordStore：二进制快照（见binary_deck）+ 追加写日志，加载更快、文件更小
+- MappedWordStore：内存映射同一种二进制快照，只解码被访问的单词（大词库默认使用）
+- SQLiteWordStore：标准库sqlite3，按复习字段建索引，查询直接走SQL
+"""
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .sm2_algorithm import Word
+from .columnar import WordColumns
+from .indexes import DueDateIndex
+from .mapped_deck import ColumnKeys, MappedRecords
+from .background import GroupCommitter
+from . import binary_deck, metrics
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+BINARY_EXTENSIONS = (".deck", ".bin")
+# 不小于该大小的二进制词库默认用内存映射打开
+MAPPED_DECK_THRESHOLD = 32 * 1024 * 1024
+
+
+
+def fsync_directory(path: str):
+    """把目录项（重命名结果）刷到磁盘；不支持打开目录的平台（Windows）直接跳过"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# 单词记录的字段顺序（也是SQLite表的列顺序）
+RECORD_FIELDS = (
+    "text", "meaning", "example", "repetitions", "interval", "ease_factor",
+    "next_review", "last_reviewed", "created_at", "forget_risk"
+)
+
+# 记录中缺失字段的默认值（日期字段缺失时由record_to_word按当天推算）
+RECORD_DEFAULTS = {
+    "meaning": "", "example": "", "repetitions": 0, "interval": 1,
+    "ease_factor": 2.5, "forget_risk": 0.0
+}
+
+
+def parse_date(value: Optional[str], default: Optional[datetime.date]) -> Optional[datetime.date]:
+    """解析ISO格式日期，缺失或格式错误时返回默认值"""
+    if not value:
+        return default
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def word_to_record(word: Word) -> Dict[str, Any]:
+    """Word对象序列化为存储用的字典"""
+    return {
+        "text": word.text,
+        "meaning": word.meaning,
+        "example": word.example,
+        "repetitions": word.repetitions,
+        "interval": word.interval,
+        "ease_factor": word.ease_factor,
+        "next_review": word.next_review.isoformat(),
+        "last_reviewed": word.last_reviewed.isoformat() if word.last_reviewed else None,
+        "created_at": word.created_at.isoformat(),
+        "forget_risk": word.forget_risk
+    }
+
+
+def record_to_word(word_text: str, record: Dict[str, Any]) -> Word:
+    """从存储字典构建Word对象"""
+    today = datetime.date.today()
+    return Word(
+        text=record.get("text", word_text),
+        meaning=record.get("meaning", ""),
+        example=record.get("example", ""),
+        repetitions=record.get("repetitions", 0),
+        interval=record.get("interval", 1),
+        ease_factor=record.get("ease_factor", 2.5),
+        next_review=parse_date(record.get("next_review"), today + datetime.timedelta(days=1)),
+        last_reviewed=parse_date(record.get("last_reviewed"), None),
+        created_at=parse_date(record.get("created_at"), today),
+        forget_risk=record.get("forget_risk", 0.0)
+    )
+
+
+class WordStore:
+    """单词存储后端接口"""
+    
+    # 后端自身能否用索引完成高遗忘风险查询（否则由调用方在内存中计算）
+    indexed_risk_query = False
+    
+    def __len__(self) -> int:
+        raise NotImplementedError
+    
+    def __contains__(self, word_text: str) -> bool:
+        return self.get(word_text) is not None
+    
+    def keys(self) -> List[str]:
+        """所有单词文本，按加入顺序"""
+        raise NotImplementedError
+    
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """遍历所有 (单词文本, 记录)"""
+        raise NotImplementedError
+    
+    def get(self, word_text: str) -> Optional[Dict[str, Any]]:
+        """获取一条单词记录，不存在时返回None"""
+        raise NotImplementedError
+    
+    def put_many(self, records: List[Dict[str, Any]]) -> bool:
+        """插入或更新多条记录"""
+        raise NotImplementedError
+    
+    def due_keys(self, day: datetime.date) -> List[str]:
+        """复习日期不晚于day的已学习单词"""
+        raise NotImplementedError
+    
+    def count_due(self, day: datetime.date) -> int:
+        """复习日期不晚于day的已学习单词数量"""
+        return len(self.due_keys(day))
+    
+    def due_histogram(self) -> Dict[datetime.date, int]:
+        """已学习单词按复习日期的数量分布"""
+        histogram: Dict[datetime.date, int] = {}
+        for text, record in self.items():
+            if record.get("repetitions", 0) > 0:
+                due = parse_date(record.get("next_review"), None)
+                if due is not None:
+                    histogram[due] = histogram.get(due, 0) + 1
+        return histogram
+    
+    def new_keys(self) -> List[str]:
+        """从未复习过的单词"""
+        return [text for text, record in self.items() if record.get("repetitions", 0) == 0]
+    
+    def high_risk_keys(self, day: datetime.date, threshold: float) -> List[str]:
+        """遗忘风险不低于threshold且尚未到复习日期的已学习单词"""
+        keys = []
+        for text, record in self.items():
+            if record.get("repetitions", 0) > 0:
+                word = record_to_word(text, record)
+                if word.next_review > day and word.calculate_forget_risk(day) >= threshold:
+                    keys.append(text)
+        return keys
+    
+    def columns(self) -> WordColumns:
+        """全部记录的列式视图（需要numpy）"""
+        return WordColumns.from_records(self.items())
+    
+    def flush(self) -> bool:
+        """把缓冲的写入落盘"""
+        return True
+    
+    def close(self):
+        """关闭存储，释放资源"""
+        self.flush()
+
+
+class JsonWordStore(WordStore):
+    """JSON快照 + 追加写日志
+    
+    - 快照文件 (word_data.json)：完整数据，仅在压缩时重写（临时文件 + fsync + 替换）
+    - 日志文件 (word_data.journal)：每次保存追加一行紧凑JSON，加载时重放
+    
+    put_many在调用线程中把修改追加到日志（写入操作系统缓冲）后返回，写入失败返回False；
+    fsync由后台写入线程组提交：一个窗口（GROUP_COMMIT_WINDOW秒）内的追加合并成一次fsync，
+    压缩也在写入线程中进行。flush()等待已追加的修改落盘，close()会先flush。
+    GROUP_COMMIT_WINDOW为None时在调用线程中同步fsync。
+    """
+    
+    # 日志累计到这么多条后自动压缩进快照
+    JOURNAL_COMPACT_THRESHOLD = 500
+    # 组提交的收集窗口（秒）
+    GROUP_COMMIT_WINDOW: Optional[float] = 0.05
+    # 日志够长时是否在写入线程中自动压缩（需要能在加锁时廉价地复制出一致的快照），
+    # 为False时只在close()和显式调用compact()时压缩
+    COMPACT_IN_BACKGROUND = True
+    
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.journal_path = self._journal_path(file_path)
+        self._journal_entries = 0
+        # _lock保护内存中的数据和日志文件，日志的追加顺序与内存中的修改顺序一致
+        self._lock = threading.RLock()
+        self._journal_file = None  # 追加模式打开的日志文件，第一次写入时打开
+        self._committer: Optional[GroupCommitter] = None  # 第一次写入时启动
+        self._closed = False
+        self.data = self._load_data()
+        self._replay_journal()
+        self._due_index = self._build_due_index()
+    
+    def _build_due_index(self) -> DueDateIndex:
+        """复习日期索引：只收录已学习过的单词（repetitions > 0）"""
+        index = DueDateIndex()
+        tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+        for word_text, record in self.data["words"].items():
+            if record.get("repetitions", 0) > 0:
+                index.update(word_text, parse_date(record.get("next_review"), tomorrow))
+        return index
+    
+    @staticmethod
+    def _journal_path(file_path: str) -> str:
+        return os.path.splitext(file_path)[0] + ".journal"
+    
+    def _load_data(self) -> Dict[str, Any]:
+        """从JSON文件加载数据"""
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                data.setdefault("words", {})
+                return data
+            except json.JSONDecodeError:
+                print(f"警告: {self.file_path} 格式错误，将使用空数据")
+                return {"words": {}, "version": "3.1"}
+            except Exception as e:
+                print(f"加载数据文件时出错: {e}")
+                return {"words": {}, "version": "3.1"}
+        return {"words": {}, "version": "3.1"}
+    
+    def _replay_journal(self):
+        """将日志中的单词变更重放到快照数据上"""
+        if not os.path.exists(self.journal_path):
+            return
+        
+        words = self.data["words"]
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line_num, line in enumerate(f, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                        words[record["text"]] = record
+                        self._journal_entries += 1
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        # 崩溃时可能留下写了一半的最后一行，跳过即可
+                        print(f"警告: 跳过日志第{line_num}行（格式错误）")
+        except Exception as e:
+            print(f"读取日志文件时出错: {e}")
+    
+    def _append_journal(self, records: List[Dict[str, Any]]) -> bool:
+        """
+        追加单词变更到日志（每个单词一行紧凑JSON），写入操作系统缓冲后返回
+        fsync由写入线程成批完成（见_sync），调用方需持有_lock
+        """
+        try:
+            payload = "".join(
+                json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+                for record in records
+            ).encode('utf-8')
+            if self._journal_file is None:
+                is_new = not os.path.exists(self.journal_path)
+                self._journal_file = open(self.journal_path, 'ab')
+                if is_new:
+                    fsync_directory(self.journal_path)
+            self._journal_file.write(payload)
+            self._journal_file.flush()
+            self._journal_entries += len(records)
+            if metrics.is_enabled():
+                metrics.add_bytes("journal", len(payload))
+            return True
+        except Exception as e:
+            print(f"写入日志时出错: {e}")
+            return False
+    
+    def _close_journal(self):
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+    
+    def _snapshot(self) -> Dict[str, Any]:
+        """当前数据的一致副本（只复制单词字典，记录在写入时整条替换，不会被原地修改）"""
+        with self._lock:
+            return dict(self.data, words=dict(self.data["words"]))
+    
+    def _save_to_file(self, data: Dict[str, Any]) -> bool:
+        """保存完整快照到文件（先写临时文件并fsync，再替换）"""
+        try:
+            tmp_path = self.file_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            if metrics.is_enabled():
+                metrics.add_bytes("snapshot", os.path.getsize(tmp_path))
+            os.replace(tmp_path, self.file_path)
+            fsync_directory(self.file_path)
+            return True
+        except Exception as e:
+            print(f"保存数据时出错: {e}")
+            return False
+    
+    def _compact(self) -> bool:
+        """
+        压缩：记下日志当前长度并复制数据，写出快照，再从日志中去掉已写进快照的部分
+        写快照时不持有锁，期间的写入照常追加到日志末尾，压缩后保留下来。
+        任何时刻崩溃，重放 快照 + 日志 都能得到最后一次写入后的数据
+        """
+        with self._lock:
+            if self._journal_file is not None:
+                self._journal_file.flush()
+            journal_size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+            entries = self._journal_entries
+            data = self._snapshot()
+        if not self._save_to_file(data):
+            return False
+        
+        with self._lock:
+            try:
+                self._close_journal()
+                if os.path.exists(self.journal_path):
+                    with open(self.journal_path, 'rb') as f:
+                        f.seek(journal_size)
+                        tail = f.read()
+                    if tail:
+                        tmp_path = self.journal_path + ".tmp"
+                        with open(tmp_path, 'wb') as f:
+                            f.write(tail)
+                            f.flush()
+                            os.fsync(f.fileno())
+                        os.replace(tmp_path, self.journal_path)
+                    else:
+                        os.remove(self.journal_path)
+                    fsync_directory(self.journal_path)
+                self._journal_entries = max(self._journal_entries - entries, 0)
+                return True
+            except Exception as e:
+                print(f"清理日志文件时出错: {e}")
+                return False
+    
+    @metrics.timed()
+    def compact(self) -> bool:
+        """把日志合并进快照文件并清空日志"""
+        self.flush()
+        return self._compact()
+    
+    def _sync(self, batch: Optional[List[Any]] = None) -> bool:
+        """把已追加的日志fsync到磁盘，日志够长时压缩（在写入线程中调用）"""
+        with self._lock:
+            # 复制文件描述符，fsync时不持有锁，也不怕压缩期间关闭日志文件
+            fd = os.dup(self._journal_file.fileno()) if self._journal_file is not None else None
+        if fd is not None:
+            try:
+                os.fsync(fd)
+            except OSError as e:
+                print(f"写入日志时出错: {e}")
+                return False
+            finally:
+                os.close(fd)
+        if self.COMPACT_IN_BACKGROUND and self._journal_entries >= self.JOURNAL_COMPACT_THRESHOLD:
+            # 压缩失败时日志已经落盘，不影响这批写入，下一批再试
+            self._compact()
+        return True
+    
+    def __len__(self) -> int:
+        return len(self.data["words"])
+    
+    def __contains__(self, word_text: str) -> bool:
+        return word_text in self.data["words"]
+    
+    def keys(self) -> List[str]:
+        return list(self.data["words"])
+    
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return iter(list(self.data["words"].items()))
+    
+    def get(self, word_text: str) -> Optional[Dict[str, Any]]:
+        return self.data["words"].get(word_text)
+    
+    @metrics.timed()
+    def put_many(self, records: List[Dict[str, Any]]) -> bool:
+        with self._lock:
+            # 先写日志：写入失败时内存中的数据保持不变
+            if not self._append_journal(records):
+                return False
+            words = self.data["words"]
+            for record in records:
+                words[record["text"]] = record
+                if record.get("repetitions", 0) > 0:
+                    self._due_index.update(record["text"], parse_date(record.get("next_review"), None))
+                else:
+                    self._due_index.remove(record["text"])
+        
+        if self.GROUP_COMMIT_WINDOW is None or self._closed:
+            self._sync()
+        else:
+            if self._committer is None:
+                self._committer = GroupCommitter(self._sync, self.GROUP_COMMIT_WINDOW,
+                                                 name=f"group-commit:{os.path.basename(self.file_path)}")
+            self._committer.submit(records)
+        return True
+    
+    def due_keys(self, day: datetime.date) -> List[str]:
+        return self._due_index.due_on_or_before(day)
+    
+    def count_due(self, day: datetime.date) -> int:
+        return self._due_index.count_on_or_before(day)
+    
+    def due_histogram(self) -> Dict[datetime.date, int]:
+        return self._due_index.histogram()
+    
+    def flush(self) -> bool:
+        """等待已追加的修改fsync到磁盘"""
+        return self._committer.flush() if self._committer is not None else True
+    
+    def close(self):
+        """等待日志落盘，停止写入线程，退出前压缩日志"""
+        self._stop_committer()
+        if self._journal_entries > 0:
+            self.compact()
+        self._close_journal()
+    
+    def _stop_committer(self) -> bool:
+        """停止写入线程（之后的写入在调用线程中同步fsync），返回日志是否都已落盘"""
+        self._closed = True
+        committer, self._committer = self._committer, None
+        return committer.close() if committer is not None else True
+
+
+class BinaryWordStore(JsonWordStore):
+    """二进制快照 + 追加写日志
+    
+    与JsonWordStore相同，只是快照文件使用binary_deck格式。
+    日志文件名为 快照文件名 + ".journal"，不会与同名的JSON词库共用日志。
+    """
+    
+    @staticmethod
+    def _journal_path(file_path: str) -> str:
+        return file_path + ".journal"
+    
+    def _load_data(self) -> Dict[str, Any]:
+        """从二进制快照加载数据"""
+        if os.path.exists(self.file_path):
+            try:
+                data = binary_deck.read_deck(self.file_path)
+                data.setdefault("words", {})
+                return data
+            except ValueError as e:
+                print(f"警告: {self.file_path} 格式错误（{e}），将使用空数据")
+                return {"words": {}, "version": "3.1"}
+            except Exception as e:
+                print(f"加载数据文件时出错: {e}")
+                return {"words": {}, "version": "3.1"}
+        return {"words": {}, "version": "3.1"}
+    
+    def _save_to_file(self, data: Dict[str, Any]) -> bool:
+        """保存完整的二进制快照（先写临时文件并fsync，再替换）"""
+        try:
+            size = binary_deck.write_deck(self.file_path, data)
+            if metrics.is_enabled():
+                metrics.add_bytes("snapshot", size)
+            return True
+        except Exception as e:
+            print(f"保存数据时出错: {e}")
+            return False
+
+
+class MappedWordStore(BinaryWordStore):
+    """内存映射的二进制快照 + 追加写日志
+    
+    文件和日志与BinaryWordStore完全相同，两者可以互换。记录只在被访问时解码，
+    到期、新单词和高遗忘风险查询只扫描记录中的数值字段。
+    压缩要在锁内重写整个文件并重新映射，不能与其他线程的读写并发，因此保存时从不压缩：
+    只在关闭时日志超过JOURNAL_COMPACT_THRESHOLD条，或显式调用compact()时压缩，
+    其余情况日志留到下次打开时重放。
+    """
+    
+    indexed_risk_query = True
+    JOURNAL_COMPACT_THRESHOLD = 5000
+    COMPACT_IN_BACKGROUND = False
+    
+    def _load_data(self) -> Dict[str, Any]:
+        """映射二进制快照（不解码记录）"""
+        try:
+            records = MappedRecords(self.file_path)
+        except ValueError as e:
+            print(f"警告: {self.file_path} 格式错误（{e}），将使用空数据")
+            records = MappedRecords(None)
+        except Exception as e:
+            print(f"加载数据文件时出错: {e}")
+            records = MappedRecords(None)
+        return dict(records.metadata, words=records)
+    
+    def _build_due_index(self) -> DueDateIndex:
+        """只读数值字段，并且只解码已学习单词的文本"""
+        index = DueDateIndex()
+        records = self.data["words"]
+        for slot, text, repetitions, _, _, next_review, _ in records.scan():
+            if repetitions > 0:
+                index.update(text if text is not None else records.text_at(slot),
+                             datetime.date.fromordinal(next_review))
+        return index
+    
+    def _snapshot(self) -> Dict[str, Any]:
+        """不复制：写快照时一直持有锁（见_save_to_file）"""
+        return self.data
+    
+    def _save_to_file(self, data: Dict[str, Any]) -> bool:
+        """写出完整快照并重新映射（持有锁，重新映射期间不能有写入）"""
+        with self._lock:
+            return self._rewrite_mapped_file()
+    
+    def _rewrite_mapped_file(self) -> bool:
+        records = self.data["words"]
+        tmp_path = self.file_path + ".tmp"
+        try:
+            payload = binary_deck.encode_deck(self.data)
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            if metrics.is_enabled():
+                metrics.add_bytes("snapshot", len(payload))
+        except Exception as e:
+            print(f"保存数据时出错: {e}")
+            return False
+        
+        # 仍被映射的文件在Windows下不能替换，先解除映射
+        records.close()
+        replaced = False
+        try:
+            os.replace(tmp_path, self.file_path)
+            fsync_directory(self.file_path)
+            replaced = True
+        except Exception as e:
+            print(f"保存数据时出错: {e}")
+        finally:
+            # 替换成功后覆盖层中的修改都已写入新文件，可以清空
+            records.reload(self.file_path, keep_changes=not replaced)
+        return replaced
+    
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return self.data["words"].items()
+    
+    def new_keys(self) -> List[str]:
+        records = self.data["words"]
+        return [text if text is not None else records.text_at(slot)
+                for slot, text, repetitions, _, _, _, _ in records.scan() if repetitions == 0]
+    
+    def high_risk_keys(self, day: datetime.date, threshold: float) -> List[str]:
+        records = self.data["words"]
+        keys = []
+        for slot, text, repetitions, interval, _, next_review, last_reviewed in records.scan():
+            if repetitions > 0 and next_review > day.toordinal():
+                word = Word(text="", meaning="", repetitions=repetitions, interval=interval,
+                            last_reviewed=datetime.date.fromordinal(last_reviewed) if last_reviewed else None)
+                if word.calculate_forget_risk(day) >= threshold:
+                    keys.append(text if text is not None else records.text_at(slot))
+        return keys
+    
+    def columns(self) -> WordColumns:
+        """数值列直接从映射复制，单词列按需解码"""
+        records = self.data["words"]
+        arrays = records.numeric_arrays()
+        if arrays is None:
+            return super().columns()
+        keys = ColumnKeys(records)
+        columns = WordColumns.from_arrays(keys, keys, arrays)
+        # 手工编辑过的不规整记录和打开后修改过的记录按完整记录写入
+        for slot in arrays["irregular"].tolist():
+            columns.set_word(record_to_word(*records.record_at(slot)))
+        for text, record in records.changes():
+            columns.set_word(record_to_word(text, record))
+        return columns
+    
+    def close(self):
+        """等待日志落盘，日志较长时压缩，然后释放内存映射"""
+        self._stop_committer()
+        if self._journal_entries >= self.JOURNAL_COMPACT_THRESHOLD:
+            self.compact()
+        self._close_journal()
+        self.data["words"].close()
+
+
+class SQLiteWordStore(WordStore):
+    """SQLite存储后端
+    
+    每个单词一行，next_review / repetitions / last_reviewed 上建索引，
+    保存是单行upsert，到期/新词/高风险查询都在SQL中完成。
+    """
+    
+    indexed_risk_query = True
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS words (
+            text TEXT PRIMARY KEY,
+            meaning TEXT NOT NULL DEFAULT '',
+            example TEXT NOT NULL DEFAULT '',
+            repetitions INTEGER NOT NULL DEFAULT 0,
+            interval INTEGER NOT NULL DEFAULT 1,
+            ease_factor REAL NOT NULL DEFAULT 2.5,
+            next_review TEXT,
+            last_reviewed TEXT,
+            created_at TEXT,
+            forget_risk REAL NOT NULL DEFAULT 0.0
+        );
+        CREATE INDEX IF NOT EXISTS idx_words_next_review ON words(next_review);
+        CREATE INDEX IF NOT EXISTS idx_words_repetitions ON words(repetitions);
+        CREATE INDEX IF NOT EXISTS idx_words_last_reviewed ON words(last_reviewed);
+    """
+    
+    # 与Word.calculate_forget_risk相同的分段规则，d为距上次复习的天数
+    RISK_SQL = """
+        SELECT text FROM (
+            SELECT text, CASE
+                WHEN last_reviewed IS NULL THEN 1.0
+                WHEN repetitions <= 1 THEN
+                    CASE WHEN d <= 1 THEN 0.1 WHEN d <= 7 THEN 0.3 ELSE 0.7 END
+                WHEN repetitions <= 3 THEN
+                    CASE WHEN d <= 7 THEN 0.1 WHEN d <= 30 THEN 0.3 ELSE 0.5 END
+                ELSE
+                    CASE WHEN d <= interval * 0.5 THEN 0.1
+                         WHEN d <= interval THEN 0.3
+                         WHEN d <= interval * 2 THEN 0.6
+                         ELSE 0.9 END
+            END AS risk
+            FROM (
+                SELECT text, repetitions, interval, last_reviewed,
+                       CAST(julianday(:day) - julianday(last_reviewed) AS INTEGER) AS d
+                FROM words
+                WHERE repetitions > 0 AND next_review > :day
+            )
+        )
+        WHERE risk >= :threshold
+    """
+    
+    UPSERT_SQL = f"""
+        INSERT INTO words ({", ".join(RECORD_FIELDS)})
+        VALUES ({", ".join("?" for _ in RECORD_FIELDS)})
+        ON CONFLICT(text) DO UPDATE SET
+        {", ".join(f"{name} = excluded.{name}" for name in RECORD_FIELDS[1:])}
+    """
+    
+    def __init__(self, db_path: str):
+        self.file_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+    
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        """SQLite行转为记录字典，空的日期列不写入（与JSON记录缺字段等价）"""
+        record = dict(row)
+        for name in ("next_review", "created_at"):
+            if record[name] is None:
+                del record[name]
+        return record
+    
+    def _query_keys(self, sql: str, params=()) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+    
+    def __contains__(self, word_text: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM words WHERE text = ?", (word_text,)).fetchone() is not None
+    
+    def keys(self) -> List[str]:
+        return self._query_keys("SELECT text FROM words ORDER BY rowid")
+    
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM words ORDER BY rowid").fetchall()
+        return ((row["text"], self._row_to_record(row)) for row in rows)
+    
+    def get(self, word_text: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM words WHERE text = ?", (word_text,)).fetchone()
+        return self._row_to_record(row) if row is not None else None
+    
+    @metrics.timed()
+    def put_many(self, records: List[Dict[str, Any]]) -> bool:
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(self.UPSERT_SQL, [
+                    tuple(record.get(name) if record.get(name) is not None
+                          else RECORD_DEFAULTS.get(name) for name in RECORD_FIELDS)
+                    for record in records
+                ])
+            return True
+        except sqlite3.Error as e:
+            print(f"写入数据库时出错: {e}")
+            return False
+    
+    def due_keys(self, day: datetime.date) -> List[str]:
+        return self._query_keys(
+            "SELECT text FROM words WHERE repetitions > 0 AND next_review <= ? ORDER BY rowid",
+            (day.isoformat(),))
+    
+    def count_due(self, day: datetime.date) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM words WHERE repetitions > 0 AND next_review <= ?",
+                (day.isoformat(),)).fetchone()[0]
+    
+    def due_histogram(self) -> Dict[datetime.date, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT next_review, COUNT(*) FROM words WHERE repetitions > 0 GROUP BY next_review"
+            ).fetchall()
+        histogram = {}
+        for value, count in rows:
+            due = parse_date(value, None)
+            if due is not None:
+                histogram[due] = histogram.get(due, 0) + count
+        return histogram
+    
+    def new_keys(self) -> List[str]:
+        return self._query_keys("SELECT text FROM words WHERE repetitions = 0 ORDER BY rowid")
+    
+    def high_risk_keys(self, day: datetime.date, threshold: float) -> List[str]:
+        return self._query_keys(self.RISK_SQL, {"day": day.isoformat(), "threshold": threshold})
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _remove_files(paths: List[str]):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> int:
+    """
+    把JSON词库（含未压缩的日志）一次性导入SQLite，返回导入的单词数
+    先导入临时数据库，提交并关闭后再替换为db_path。open_store只在数据库不存在时迁移，
+    中途失败若留下空的或不完整的数据库，之后就会一直打开它，所以失败时删除临时文件
+    """
+    source = JsonWordStore(json_path)
+    tmp_path = db_path + ".tmp"
+    tmp_files = [tmp_path + suffix for suffix in ("", "-wal", "-shm", "-journal")]
+    _remove_files(tmp_files)  # 上次迁移失败留下的临时文件
+    try:
+        target = SQLiteWordStore(tmp_path)
+        try:
+            records = [dict(record, text=text) for text, record in source.items()]
+            if not target.put_many(records):
+                raise sqlite3.DatabaseError(f"迁移到 {db_path} 失败")
+        finally:
+            # 最后一个连接关闭时WAL被合并回数据库并删除，临时数据库成为单个完整的文件
+            target.close()
+        os.replace(tmp_path, db_path)
+        fsync_directory(db_path)
+    except Exception:
+        _remove_files(tmp_files)
+        raise
+    return len(records)
+
+
+def migrate_json_to_binary(json_path: str, binary_path: str) -> int:
+    """
+    把JSON词库（含未压缩的日志）转换为二进制快照，返回单词数
+    write_deck先写临时文件再替换，失败时不会留下不完整的二进制词库
+    """
+    source = JsonWordStore(json_path)
+    words = {text: record for text, record in source.items()}
+    binary_deck.write_deck(binary_path, dict(source.data, words=words))
+    return len(words)
+
+
+def open_store(file_path: str, mapped: Optional[bool] = None) -> WordStore:
+    """根据文件扩展名选择存储后端
+    
+    首次打开SQLite或二进制词库时，如果同名的JSON词库存在，会自动迁移过来。
+    mapped: 二进制词库是否用内存映射打开，默认按文件大小（MAPPED_DECK_THRESHOLD）决定
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in BINARY_EXTENSIONS:
+        json_path = os.path.splitext(file_path)[0] + ".json"
+        if not os.path.exists(file_path) and os.path.exists(json_path):
+            count = migrate_json_to_binary(json_path, file_path)
+            print(f"已将 {json_path} 中的 {count} 个单词转换到 {file_path}")
+        if mapped is None:
+            mapped = os.path.exists(file_path) and os.path.getsize(file_path) >= MAPPED_DECK_THRESHOLD
+        return MappedWordStore(file_path) if mapped else BinaryWordStore(file_path)
+    if extension in SQLITE_EXTENSIONS:
+        json_path = os.path.splitext(file_path)[0] + ".json"
+        if not os.path.exists(file_path) and os.path.exists(json_path):
+            count = migrate_json_to_sqlite(json_path, file_path)
+            print(f"已将 {json_path} 中的 {count} 个单词迁移到 {file_path}")
+        return SQLiteWordStore(file_path)
+    return JsonWordStore(file_path)
@@ -0,0 +1,158 @@
+# src/word_list.py
+"""
+虚拟化单词列表模块
+
+Treeview里只保留可见窗口那么多行，滚动时复用这些行并换上对应单词的内容。
+行内容按需计算并缓存，刷新时只更新值发生变化的行。
+"""
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .metrics import timed
+
+
+class VirtualWordList:
+    """虚拟化的单词列表
+    
+    tree: 用于显示的Treeview（show='headings'）
+    scrollbar: 纵向滚动条，由本类接管
+    """
+    
+    DEFAULT_ROW_HEIGHT = 20
+    
+    def __init__(self, tree: ttk.Treeview, scrollbar: ttk.Scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.keys: List[str] = []
+        self.offset = 0
+        self._row_fn: Callable[[str], Tuple] = lambda key: (key,)
+        self._row_cache: Dict[str, Tuple] = {}
+        self._slots: List[str] = []  # Treeview中实际存在的行id
+        self._slot_values: List[Optional[Tuple]] = []
+        self._visible_rows = max(int(tree.cget("height")), 1)
+        
+        self.scrollbar.configure(command=self.yview)
+        self.tree.configure(yscrollcommand="")
+        self.tree.bind("<Configure>", self._on_configure, add="+")
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        self.tree.bind("<Up>", lambda e: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda e: self._on_arrow(1))
+    
+    def set_items(self, keys: List[str], row_fn: Callable[[str], Tuple]):
+        """设置要显示的单词（按显示顺序）及行内容函数，保持当前滚动位置"""
+        self.keys = keys
+        self._row_fn = row_fn
+        self._row_cache.clear()
+        self._render()
+    
+    def refresh_keys(self, keys: List[str]):
+        """重新计算指定单词的行内容（只影响可见行）"""
+        for key in keys:
+            self._row_cache.pop(key, None)
+        self._render()
+    
+    def key_of(self, item_id: str) -> Optional[str]:
+        """行id对应的单词"""
+        try:
+            index = self.offset + self._slots.index(item_id)
+        except ValueError:
+            return None
+        return self.keys[index] if index < len(self.keys) else None
+    
+    def selected_key(self) -> Optional[str]:
+        """当前选中行对应的单词"""
+        selection = self.tree.selection()
+        return self.key_of(selection[0]) if selection else None
+    
+    def yview(self, *args):
+        """滚动条回调，参数格式与Tk的yview命令相同"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.keys)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self._visible_rows
+            self._scroll_by(step)
+    
+    def _scroll_by(self, rows: int):
+        self._scroll_to(self.offset + rows)
+        return "break"
+    
+    def _scroll_to(self, offset: int):
+        offset = max(0, min(offset, len(self.keys) - self._visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+    
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+    
+    def _on_arrow(self, step: int):
+        """方向键移动选中行，到达可见窗口边缘时滚动"""
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self._slots:
+            return None
+        index = self.offset + self._slots.index(selection[0]) + step
+        if not 0 <= index < len(self.keys):
+            return "break"
+        if index < self.offset:
+            self._scroll_to(index)
+        elif index >= self.offset + self._visible_rows:
+            self._scroll_to(index - self._visible_rows + 1)
+        slot = self._slots[index - self.offset]
+        self.tree.selection_set(slot)
+        self.tree.focus(slot)
+        return "break"
+    
+    def _on_configure(self, event):
+        """窗口尺寸变化时重新计算可见行数"""
+        row_height = ttk.Style().lookup("Treeview", "rowheight")
+        try:
+            row_height = int(row_height)
+        except (TypeError, ValueError):
+            row_height = self.DEFAULT_ROW_HEIGHT
+        # 减去表头一行
+        visible = max(event.height // max(row_height, 1) - 1, 1)
+        if visible != self._visible_rows:
+            self._visible_rows = visible
+            self._scroll_to(self.offset)
+            self._render()
+    
+    def _row(self, key: str) -> Tuple:
+        row = self._row_cache.get(key)
+        if row is None:
+            row = self._row_cache[key] = tuple(self._row_fn(key))
+        return row
+    
+    @timed()
+    def _render(self):
+        """把可见窗口内的单词写入Treeview，只更新变化过的行"""
+        self.offset = max(0, min(self.offset, len(self.keys) - self._visible_rows))
+        window = self.keys[self.offset:self.offset + self._visible_rows]
+        
+        # 行数与可见单词数对齐
+        while len(self._slots) < len(window):
+            self._slots.append(self.tree.insert('', tk.END, values=()))
+            self._slot_values.append(None)
+        while len(self._slots) > len(window):
+            self.tree.delete(self._slots.pop())
+            self._slot_values.pop()
+        
+        for i, key in enumerate(window):
+            values = self._row(key)
+            if values != self._slot_values[i]:
+                self.tree.item(self._slots[i], values=values)
+                self._slot_values[i] = values
+        
+        # 更新滚动条位置
+        total = len(self.keys)
+        if total:
+            self.scrollbar.set(self.offset / total,
+                               min(self.offset + len(window), total) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,6 @@
+# tests/conftest.py
+"""让测试可以直接用 pytest 运行（把项目根目录加入导入路径）"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
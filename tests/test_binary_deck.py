@@ -0,0 +1,44 @@
+# tests/test_binary_deck.py
+"""二进制词库格式测试：与JSON之间无损往返"""
+import os
+
+from src import binary_deck
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DECK = os.path.join(ROOT, "data", "word_data.json")
+
+# 手工编辑过的不规整记录：缺字段、多余字段、非ISO日期、超出范围的数值、非ASCII单词
+ODD_WORDS = {
+    "naïve": {"meaning": "天真的", "repetitions": 2, "interval": 3, "ease_factor": 2.36,
+              "next_review": "2030-01-02", "last_reviewed": "2029-12-30", "created_at": "2029-01-01",
+              "forget_risk": 0.25},
+    "bare": {"meaning": ""},
+    "extra": {"meaning": "额外", "example": "e.g.", "tags": ["a", "b"], "note": {"x": 1}},
+    "odd-date": {"meaning": "日期", "next_review": "明天", "last_reviewed": None},
+    "huge": {"meaning": "大", "repetitions": 2 ** 40, "interval": -5, "ease_factor": "2.5"},
+    "空格 word": {"meaning": "n. 带空格", "created_at": "2029-02-30"},
+}
+
+
+def test_sample_deck_round_trips_byte_for_byte(tmp_path):
+    binary_path = str(tmp_path / "deck.deck")
+    json_path = str(tmp_path / "deck.json")
+    count = binary_deck.json_to_binary(SAMPLE_DECK, binary_path)
+    assert binary_deck.is_binary_deck(binary_path)
+    assert binary_deck.binary_to_json(binary_path, json_path) == count
+    with open(SAMPLE_DECK, 'rb') as original, open(json_path, 'rb') as restored:
+        assert restored.read() == original.read()
+    assert os.path.getsize(binary_path) < os.path.getsize(SAMPLE_DECK)
+
+
+def test_odd_records_are_lossless():
+    data = {"version": "3.1", "words": dict(ODD_WORDS), "settings": {"daily_new": 20}}
+    decoded = binary_deck.decode_deck(binary_deck.encode_deck(data))
+    assert decoded == data
+    assert list(decoded) == list(data)
+    assert list(decoded["words"]) == list(data["words"])
+
+
+def test_empty_deck():
+    data = {"words": {}, "version": "3.1"}
+    assert binary_deck.decode_deck(binary_deck.encode_deck(data)) == data
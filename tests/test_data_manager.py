@@ -0,0 +1,112 @@
+# tests/test_data_manager.py
+"""WordDataManager测试：增量统计与全量重算一致，写入失败不会重复计数，导入保持行顺序，搜索索引在锁外构建"""
+import os
+import random
+import shutil
+
+import pytest
+
+from src import data_manager
+from src.data_manager import WordDataManager
+from src.sm2_algorithm import Word
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DECK = os.path.join(ROOT, "data", "word_data.json")
+
+
+@pytest.fixture(params=["deck.json", "deck.db"])
+def deck_path(request, tmp_path):
+    """示例词库的副本（.db会在第一次打开时从同名JSON迁移）"""
+    shutil.copy(SAMPLE_DECK, tmp_path / "deck.json")
+    return str(tmp_path / request.param)
+
+
+def _full_statistics(path):
+    """重新打开词库，全量计算的统计"""
+    manager = WordDataManager(path)
+    try:
+        return manager.get_learning_statistics()
+    finally:
+        manager.close()
+
+
+def test_incremental_statistics_match_full_recompute(deck_path):
+    manager = WordDataManager(deck_path)
+    manager.get_learning_statistics()  # 全量计算一次，之后增量维护
+    rng = random.Random(5)
+    words = manager.load_words()
+    for word in rng.sample(words, 200):
+        for _ in range(rng.randint(1, 4)):
+            manager.scheduler.update_review_schedule(word, rng.randint(0, 5))
+        assert manager.save_word(word)
+    
+    incremental = manager.get_learning_statistics()
+    manager.close()
+    assert incremental == _full_statistics(deck_path)
+
+
+def test_failed_save_is_not_counted_twice(deck_path, monkeypatch):
+    manager = WordDataManager(deck_path)
+    manager.get_learning_statistics()
+    manager.search_index()
+    words = [word for word in manager.load_words() if word.repetitions == 0][:3]
+    
+    put_many = manager.store.put_many
+    monkeypatch.setattr(manager.store, "put_many", lambda records: False)
+    for word in words:
+        manager.scheduler.update_review_schedule(word, 5)
+        manager.scheduler.update_review_schedule(word, 5)
+        manager.scheduler.update_review_schedule(word, 5)
+        assert not manager.save_word(word)
+    
+    monkeypatch.setattr(manager.store, "put_many", put_many)
+    assert manager.flush()
+    incremental = manager.get_learning_statistics()
+    assert [w.text for w in manager.search_words(words[0].text, 5)][0] == words[0].text
+    manager.close()
+    assert incremental == _full_statistics(deck_path)
+
+
+def test_excel_import_keeps_row_order(deck_path, tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("openpyxl")
+    rows = ["zz-apple", "zz-banana", "123", "aa-zebra", "mm-cherry"]
+    excel_path = str(tmp_path / "import.xlsx")
+    pd.DataFrame({"单词": rows, "释义": ["含义"] * len(rows)}).to_excel(excel_path, index=False)
+    
+    manager = WordDataManager(deck_path)
+    existing = [word.text for word in manager.load_words()]
+    result = manager.import_from_excel(excel_path)
+    assert result["success"] and result["new_count"] == len(rows)
+    assert [word.text for word in manager.load_words()] == existing + rows
+    manager.close()
+    
+    reopened = WordDataManager(deck_path)
+    try:
+        assert [word.text for word in reopened.load_words()] == existing + rows
+        imported = [word.text for word in reopened.get_today_new_words() if word.text in rows]
+        assert imported == rows
+    finally:
+        reopened.close()
+
+
+def test_search_before_and_during_index_build(deck_path, monkeypatch):
+    manager = WordDataManager(deck_path)
+    queries = ["ab", "book", "书", "abandn"]
+    # 索引建好之前逐个扫描，结果与索引相同
+    scanned = [[w.text for w in manager.search_words(query, 20)] for query in queries]
+    assert manager._search_index is None
+    
+    build = data_manager.WordSearchIndex.build
+    
+    def build_while_saving(entries):
+        # 构建索引期间（不持有锁）保存的单词要补进索引
+        assert manager.save_word(Word("zzsearchnew", "构建期间新增"))
+        return build(entries)
+    
+    monkeypatch.setattr(data_manager.WordSearchIndex, "build", build_while_saving)
+    manager.search_index()
+    assert [[w.text for w in manager.search_words(query, 20)] for query in queries] == scanned
+    assert [w.text for w in manager.search_words("构建期间", 5)] == ["zzsearchnew"]
+    manager.close()
+
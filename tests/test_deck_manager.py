@@ -0,0 +1,55 @@
+# tests/test_deck_manager.py
+"""多词库管理测试：重建摘要时不阻塞词库列表、切换和新建"""
+import json
+import os
+import shutil
+import threading
+
+from src.deck_manager import DeckManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DECK = os.path.join(ROOT, "data", "word_data.json")
+
+
+def test_summaries_are_built_outside_the_lock(tmp_path, monkeypatch):
+    decks_dir = tmp_path / "decks"
+    decks_dir.mkdir()
+    shutil.copy(SAMPLE_DECK, decks_dir / "sample.json")
+    registry = tmp_path / "decks.json"
+    registry.write_text(json.dumps({"decks": {"默认词库": str(tmp_path / "default.json")}}),
+                        encoding="utf-8")
+    decks = DeckManager(str(registry), str(decks_dir))
+    
+    started, release = threading.Event(), threading.Event()
+    built = []
+    build_summary = DeckManager._build_summary
+    
+    def slow_build(manager):
+        built.append(os.path.basename(manager.file_path))
+        if manager.file_path.endswith("sample.json"):
+            started.set()
+            assert release.wait(10)
+        return build_summary(manager)
+    
+    monkeypatch.setattr(DeckManager, "_build_summary", staticmethod(slow_build))
+    results = []
+    worker = threading.Thread(target=lambda: results.append(decks.total_statistics()))
+    worker.start()
+    try:
+        assert started.wait(10)
+        # sample词库的摘要正在重建（临时打开了词库），其他操作不需要等它
+        assert decks.deck_names() == ["默认词库", "sample"]
+        decks.switch_to("默认词库")
+        decks.add_deck("新词库")
+        assert not decks.is_open("sample")
+    finally:
+        release.set()
+        worker.join(10)
+    
+    totals, per_deck = results[0]
+    assert per_deck["sample"]["total_words"] == totals["total_words"] > 0
+    # 重建好的摘要已保存，之后直接使用
+    assert built.count("sample.json") == 1
+    assert decks.summary("sample")["statistics"]["total_words"] == totals["total_words"]
+    assert built.count("sample.json") == 1
+    decks.close()
@@ -0,0 +1,112 @@
+# tests/test_mapped_deck.py
+"""内存映射词库测试：查询结果与完整加载的二进制词库一致"""
+import datetime
+import os
+import random
+
+import pytest
+
+from src import binary_deck
+from src.sm2_algorithm import NUMPY_AVAILABLE
+from src.storage import BinaryWordStore, MappedWordStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DECK = os.path.join(ROOT, "data", "word_data.json")
+
+
+def _changes(store, rng, count):
+    """随机修改一些已有单词并新增一些单词"""
+    today = datetime.date.today()
+    texts = store.keys()
+    records = []
+    for text in rng.sample(texts, count):
+        interval = rng.randint(1, 30)
+        last = today - datetime.timedelta(days=rng.randint(0, 40))
+        records.append(dict(store.get(text), text=text, repetitions=rng.randint(0, 6), interval=interval,
+                            ease_factor=round(rng.uniform(1.3, 2.8), 2), last_reviewed=last.isoformat(),
+                            next_review=(last + datetime.timedelta(days=interval)).isoformat()))
+    records += [{"text": f"added{i}", "meaning": "新增", "repetitions": i % 2, "interval": 2,
+                 "next_review": today.isoformat()} for i in range(count // 4)]
+    return records
+
+
+def _assert_same_answers(mapped, eager):
+    today = datetime.date.today()
+    assert len(mapped) == len(eager)
+    assert dict(mapped.items()) == dict(eager.items())
+    for day in (today - datetime.timedelta(days=3), today, today + datetime.timedelta(days=10)):
+        assert sorted(mapped.due_keys(day)) == sorted(eager.due_keys(day))
+        assert mapped.count_due(day) == eager.count_due(day)
+    assert mapped.due_histogram() == eager.due_histogram()
+    assert sorted(mapped.new_keys()) == sorted(eager.new_keys())
+    assert sorted(mapped.high_risk_keys(today, 0.6)) == sorted(eager.high_risk_keys(today, 0.6))
+    assert mapped.get("no-such-word") is None
+    if NUMPY_AVAILABLE:
+        mapped_columns, eager_columns = mapped.columns(), eager.columns()
+        assert mapped_columns.summary(today, 0.6) == eager_columns.summary(today, 0.6)
+        assert sorted(mapped_columns.select(mapped_columns.due_mask(today))) == \
+            sorted(eager_columns.select(eager_columns.due_mask(today)))
+
+
+@pytest.fixture
+def deck_paths(tmp_path):
+    """同一份二进制快照的两个副本：一个用映射打开，一个完整加载"""
+    mapped_path, eager_path = str(tmp_path / "mapped.deck"), str(tmp_path / "eager.deck")
+    binary_deck.json_to_binary(SAMPLE_DECK, mapped_path)
+    binary_deck.json_to_binary(SAMPLE_DECK, eager_path)
+    return mapped_path, eager_path
+
+
+def test_mapped_store_matches_eager_store(deck_paths):
+    mapped_path, eager_path = deck_paths
+    mapped, eager = MappedWordStore(mapped_path), BinaryWordStore(eager_path)
+    _assert_same_answers(mapped, eager)
+    
+    changes = _changes(eager, random.Random(6), 400)
+    assert mapped.put_many(changes) and eager.put_many(changes)
+    _assert_same_answers(mapped, eager)
+    
+    # 关闭后重新打开：映射的词库重放日志，完整加载的词库已压缩进快照
+    mapped.close()
+    eager.close()
+    mapped, eager = MappedWordStore(mapped_path), BinaryWordStore(eager_path)
+    assert os.path.exists(mapped.journal_path)
+    _assert_same_answers(mapped, eager)
+    mapped.close()
+    eager.close()
+
+
+def test_mapped_compaction_remaps_file(deck_paths, monkeypatch):
+    mapped_path, eager_path = deck_paths
+    monkeypatch.setattr(MappedWordStore, "JOURNAL_COMPACT_THRESHOLD", 100)
+    mapped, eager = MappedWordStore(mapped_path), BinaryWordStore(eager_path)
+    rng = random.Random(9)
+    for _ in range(5):
+        changes = _changes(eager, rng, 60)
+        assert mapped.put_many(changes) and eager.put_many(changes)
+    # 保存时不压缩（压缩要在锁内重写整个文件），日志超过阈值也保留到显式压缩或关闭
+    assert mapped.flush() and os.path.getsize(mapped.journal_path) > 0
+    _assert_same_answers(mapped, eager)
+    assert mapped.compact()
+    assert not os.path.exists(mapped.journal_path)
+    _assert_same_answers(mapped, eager)
+    mapped.close()
+    eager.close()
+    
+    # 压缩后的文件可以被完整加载
+    reloaded = BinaryWordStore(mapped_path)
+    assert dict(reloaded.items()) == dict(BinaryWordStore(eager_path).items())
+
+
+def test_mapped_close_compacts_long_journal(deck_paths, monkeypatch):
+    mapped_path, eager_path = deck_paths
+    monkeypatch.setattr(MappedWordStore, "JOURNAL_COMPACT_THRESHOLD", 100)
+    mapped, eager = MappedWordStore(mapped_path), BinaryWordStore(eager_path)
+    changes = _changes(eager, random.Random(12), 200)
+    assert mapped.put_many(changes) and eager.put_many(changes)
+    mapped.close()
+    eager.close()
+    
+    assert not os.path.exists(mapped.journal_path)
+    reloaded = BinaryWordStore(mapped_path)
+    assert dict(reloaded.items()) == dict(BinaryWordStore(eager_path).items())
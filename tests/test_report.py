@@ -0,0 +1,47 @@
+# tests/test_report.py
+"""报告渲染测试：窗口显示和导出共用同一份排好版的图表"""
+import os
+import shutil
+import struct
+
+import pytest
+
+from src import report
+from src.data_manager import WordDataManager
+from src.lazy_imports import get_matplotlib
+from src.report import EXPORT_DPI, SCREEN_DPI, ReportRenderer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DECK = os.path.join(ROOT, "data", "word_data.json")
+
+pytestmark = pytest.mark.skipif(get_matplotlib() is None, reason="报告需要matplotlib")
+
+
+def _png_width(png):
+    return struct.unpack(">I", png[16:20])[0]
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_export_reuses_cached_figure(tmp_path, monkeypatch):
+    shutil.copy(SAMPLE_DECK, tmp_path / "deck.json")
+    manager = WordDataManager(str(tmp_path / "deck.json"))
+    builds = []
+    build_report_figure = report.build_report_figure
+    monkeypatch.setattr(report, "build_report_figure",
+                        lambda mpl, data: builds.append(data["revision"]) or build_report_figure(mpl, data))
+    renderer = ReportRenderer(manager)
+    
+    screen = renderer.render(SCREEN_DPI)
+    assert renderer.cached(EXPORT_DPI) is None
+    export = renderer.render(EXPORT_DPI)
+    assert builds == [manager.revision]
+    assert _png_width(export) > _png_width(screen) * 3
+    assert renderer.cached(SCREEN_DPI) is screen and renderer.render(EXPORT_DPI) is export
+    
+    # 保存单词后词库版本变化，重新构建图表
+    word = manager.load_words()[0]
+    assert manager.review_word(word, 5)
+    assert renderer.cached(SCREEN_DPI) is None
+    renderer.render(SCREEN_DPI)
+    assert builds == [manager.revision - 1, manager.revision]
+    manager.close()
@@ -0,0 +1,50 @@
+# tests/test_review_log.py
+"""复习事件日志测试"""
+import datetime
+
+from src.review_log import MAX_WORD_BYTES, ReviewLog, log_path_for
+
+
+def test_each_deck_file_has_its_own_log():
+    paths = {log_path_for(f"data/deck{extension}") for extension in (".json", ".deck", ".db")}
+    assert len(paths) == 3
+
+
+def test_append_and_query(tmp_path):
+    path = str(tmp_path / "deck.json.reviews")
+    log = ReviewLog(path)
+    day = datetime.datetime(2030, 5, 1, 9, 0)
+    assert log.append("apple", "meaning", 3, 1, 1.5, "苹果树", timestamp=day)
+    assert log.append("apple", "meaning", 5, 2, 0.8, "苹果", timestamp=day + datetime.timedelta(minutes=1))
+    assert log.append("book", "spelling", 5, 1, 2.0, "book", timestamp=day + datetime.timedelta(days=1))
+    log.close()
+    
+    reopened = ReviewLog(path)
+    assert len(reopened) == 3
+    assert [event.answer for event in reopened.for_word("apple")] == ["苹果树", "苹果"]
+    assert [event.word for event in reopened.on_date(day.date())] == ["apple", "apple"]
+    assert reopened.count_between(day.date() + datetime.timedelta(days=1)) == 1
+    reopened.close()
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    path = str(tmp_path / "deck.json.reviews")
+    log = ReviewLog(path)
+    assert log.append("apple", "meaning", 4)
+    log.close()
+    with open(path, 'ab') as f:
+        f.write(b"E\x01\x02")
+    reopened = ReviewLog(path)
+    assert len(reopened) == 1
+    assert reopened.append("book", "meaning", 5)
+    reopened.close()
+    assert len(ReviewLog(path)) == 2
+
+
+def test_invalid_entries_are_rejected(tmp_path):
+    log = ReviewLog(str(tmp_path / "deck.json.reviews"))
+    assert not log.append("a" * (MAX_WORD_BYTES + 1), "spelling", 1)
+    assert not log.append("apple", "listening", 1)
+    assert len(log) == 0
+    assert log.append("apple", "meaning", 4)
+    log.close()
@@ -0,0 +1,103 @@
+# tests/test_search.py
+"""搜索索引测试：与逐个比较的暴力搜索结果一致"""
+import random
+import string
+
+from src.search import WordSearchIndex, scan_search, within_one_edit
+
+
+def _osa_distance(a, b):
+    """参考实现：完整动态规划的Damerau-Levenshtein（相邻交换）距离"""
+    rows = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) + 1):
+        rows[i][0] = i
+    for j in range(len(b) + 1):
+        rows[0][j] = j
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            rows[i][j] = min(rows[i - 1][j] + 1, rows[i][j - 1] + 1, rows[i - 1][j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                rows[i][j] = min(rows[i][j], rows[i - 2][j - 2] + 1)
+    return rows[-1][-1]
+
+
+def _random_deck(count=3000, seed=3):
+    rng = random.Random(seed)
+    meanings = ["放弃", "书", "预订", "离开", "狂热", "计算", "方法", "学习", "记忆", "单词"]
+    deck = {}
+    while len(deck) < count:
+        text = "".join(rng.choice("abcde") for _ in range(rng.randint(3, 7)))
+        deck[text] = "；".join(rng.sample(meanings, 2))
+    return deck
+
+
+def test_within_one_edit_matches_reference():
+    rng = random.Random(1)
+    for _ in range(5000):
+        a = "".join(rng.choice("abc") for _ in range(rng.randint(0, 6)))
+        b = "".join(rng.choice("abc") for _ in range(rng.randint(0, 6)))
+        assert within_one_edit(a, b) == (_osa_distance(a, b) <= 1), (a, b)
+
+
+def test_queries_match_brute_force():
+    deck = _random_deck()
+    index = WordSearchIndex.build(deck.items())
+    rng = random.Random(2)
+    for _ in range(40):
+        query = "".join(rng.choice("abcde") for _ in range(rng.randint(4, 6)))
+        expected_fuzzy = sorted(text for text in deck if text != query and _osa_distance(query, text) <= 1)
+        assert index.fuzzy(query, limit=len(deck)) == expected_fuzzy
+        
+        prefix = query[:2]
+        expected_prefix = sorted((text for text in deck if text.startswith(prefix)), key=lambda t: (len(t), t))
+        assert index.prefix(prefix, limit=len(deck)) == expected_prefix
+        assert index.prefix(prefix, limit=10) == expected_prefix[:10]
+    
+    for needle in ("书", "预订", "放弃；书"):
+        assert index.meaning(needle, limit=len(deck)) == sorted(t for t, m in deck.items() if needle in m)
+
+
+def test_allowed_filters_before_limit():
+    deck = _random_deck()
+    index = WordSearchIndex.build(deck.items())
+    # 只允许排在全局前几百名之后的单词：先取前limit个再筛选会得到空结果
+    prefix_matches = index.prefix("a", limit=len(deck))
+    allowed = set(prefix_matches[-50:])
+    results = index.search("a", limit=20, allowed=allowed)
+    assert results == [text for text in prefix_matches if text in allowed][:20]
+    
+    meaning_matches = index.meaning("书", limit=len(deck))
+    allowed = set(meaning_matches[-30:])
+    assert index.search("书", limit=10, allowed=allowed) == sorted(allowed)[:10]
+    assert all(text in allowed for text in index.search("abcd", limit=50, allowed=allowed))
+
+
+def test_incremental_update_matches_rebuild():
+    deck = _random_deck(500)
+    index = WordSearchIndex.build(deck.items())
+    rng = random.Random(4)
+    for text in rng.sample(sorted(deck), 100):
+        deck[text] = "新释义" + text
+        index.update(text, deck[text])
+    for _ in range(50):
+        text = "".join(rng.choice(string.ascii_lowercase) for _ in range(6))
+        deck[text] = "新增"
+        index.update(text, "新增")
+    rebuilt = WordSearchIndex.build(deck.items())
+    for query in ("ab", "新释义", "新增", "abcd", "bcde"):
+        assert index.search(query, 1000) == rebuilt.search(query, 1000)
+
+
+def test_scan_search_matches_index():
+    deck = _random_deck()
+    index = WordSearchIndex.build(deck.items())
+    rng = random.Random(5)
+    allowed = set(rng.sample(sorted(deck), 300))
+    queries = ["书", "预订", "放弃；书", " AB ", "ab c", "  "]
+    queries += ["".join(rng.choice("abcde") for _ in range(rng.randint(1, 7))) for _ in range(40)]
+    for query in queries:
+        for limit in (5, 50, len(deck)):
+            assert scan_search(deck.items(), query, limit) == index.search(query, limit), query
+            assert scan_search(deck.items(), query, limit, allowed) == index.search(query, limit, allowed)
+
@@ -0,0 +1,34 @@
+# tests/test_senses.py
+"""释义解析与释义评分测试"""
+from src.senses import MeaningSenses, Sense, parse_senses
+from src.sm2_algorithm import AIEvaluator
+
+
+def test_parse_senses_with_pos_and_domain():
+    assert parse_senses("v. 遗弃；离开n. 放任，狂热") == [
+        Sense("遗弃", "v"), Sense("离开", "v"), Sense("放任", "n"), Sense("狂热", "n")]
+    assert parse_senses("n. 程序；[计] 指令") == [Sense("程序", "n"), Sense("指令", "n", "计")]
+
+
+def test_match_requires_whole_senses():
+    senses = MeaningSenses("n. 书；v. 预订")
+    assert senses.match("预订")
+    assert senses.match("v. 预订；书")
+    assert not senses.match("预订了")
+    assert not senses.match("书的")
+
+
+def test_contains_ignores_single_character_senses():
+    senses = MeaningSenses("n. 书；v. 预订")
+    assert senses.contains("订")  # 义项的一部分
+    assert senses.contains("预订的书")  # 包含完整的双字义项
+    assert not senses.contains("书的")
+
+
+def test_evaluate_meaning_scores():
+    evaluator = AIEvaluator()
+    meaning = "n. 书；v. 预订"
+    assert evaluator.evaluate_meaning("预订", meaning, "book") == 5
+    assert evaluator.evaluate_meaning("预订的书", meaning, "book") == 4
+    assert evaluator.evaluate_meaning("书的", meaning, "book") < 4
+    assert evaluator.evaluate_meaning("", meaning, "book") == 0
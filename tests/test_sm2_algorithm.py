@@ -0,0 +1,98 @@
+# tests/test_sm2_algorithm.py
+"""SM2调度与评分测试"""
+import copy
+import datetime
+import random
+
+import pytest
+
+from src.sm2_algorithm import NUMPY_AVAILABLE, AIEvaluator, SM2Scheduler, Word, bounded_damerau_levenshtein
+
+FIELDS = ("repetitions", "interval", "ease_factor", "next_review", "last_reviewed", "forget_risk")
+
+
+def _random_words(count, rng, today):
+    words = []
+    for i in range(count):
+        word = Word(f"w{i}", "释义")
+        if rng.random() < 0.7:
+            word.repetitions = rng.randint(1, 8)
+            word.interval = rng.randint(1, 120)
+            word.ease_factor = round(rng.uniform(1.3, 3.0), 2)
+            word.last_reviewed = today - datetime.timedelta(days=rng.randint(0, 60))
+            word.next_review = word.last_reviewed + datetime.timedelta(days=word.interval)
+        words.append(word)
+    return words
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="update_many的批量路径需要numpy")
+def test_update_many_matches_scalar_updates():
+    rng = random.Random(8)
+    today = datetime.date(2030, 3, 1)
+    words = _random_words(300, rng, today)
+    # 部分单词在同一批中出现多次，按顺序依次应用
+    reviews = [(i, rng.randint(0, 5)) for i in range(len(words))]
+    reviews += [(rng.randrange(len(words)), rng.randint(0, 5)) for _ in range(200)]
+    rng.shuffle(reviews)
+    
+    scalar_words = copy.deepcopy(words)
+    scheduler = SM2Scheduler()
+    for i, quality in reviews:
+        scheduler.update_review_schedule(scalar_words[i], quality, today)
+    batch_result = scheduler.update_many([(words[i], quality) for i, quality in reviews], today)
+    
+    assert [word.text for word in batch_result] == [words[i].text for i, _ in reviews]
+    for expected, actual in zip(scalar_words, words):
+        for name in FIELDS:
+            assert getattr(actual, name) == getattr(expected, name), (actual.text, name)
+
+
+def test_forgetting_curve_words_do_not_modify_words():
+    rng = random.Random(11)
+    today = datetime.date.today()
+    words = _random_words(400, rng, today)
+    before = copy.deepcopy(words)
+    scheduler = SM2Scheduler()
+    
+    assert scheduler.forget_risks(words, today) == [word.calculate_forget_risk(today) for word in words]
+    expected = sorted((word for word in words if word.repetitions > 0 and word.next_review > today
+                       and word.calculate_forget_risk(today) >= 0.5),
+                      key=lambda word: word.calculate_forget_risk(today), reverse=True)
+    assert scheduler.get_forgetting_curve_words(words, 0.5) == expected
+    # 查询只计算风险，不写回共享的Word对象
+    assert words == before
+
+
+def _osa_distance(a, b):
+    """参考实现：完整动态规划的Damerau-Levenshtein（相邻交换）距离"""
+    rows = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) + 1):
+        rows[i][0] = i
+    for j in range(len(b) + 1):
+        rows[0][j] = j
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            rows[i][j] = min(rows[i - 1][j] + 1, rows[i][j - 1] + 1, rows[i - 1][j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                rows[i][j] = min(rows[i][j], rows[i - 2][j - 2] + 1)
+    return rows[-1][-1]
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2, 3])
+def test_bounded_damerau_levenshtein_matches_reference(max_distance):
+    rng = random.Random(max_distance)
+    for _ in range(3000):
+        a = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 8)))
+        b = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 8)))
+        expected = min(_osa_distance(a, b), max_distance + 1)
+        assert bounded_damerau_levenshtein(a, b, max_distance) == expected, (a, b)
+
+
+def test_evaluate_spelling_scores():
+    evaluator = AIEvaluator()
+    assert evaluator.evaluate_spelling("abandon", "abandon", "放弃") == 5
+    assert evaluator.evaluate_spelling("abadnon", "abandon", "放弃") == 3  # 相邻交换
+    assert evaluator.evaluate_spelling("abndn", "abandon", "放弃") == 2
+    assert evaluator.evaluate_spelling("xyz", "abandon", "放弃") < 2
+    assert evaluator.evaluate_spelling_batch([("abandon", "abandon"), ("abadnon", "abandon")]) == [5, 3]
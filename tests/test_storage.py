@@ -0,0 +1,167 @@
+# tests/test_storage.py
+"""存储后端测试：日志重放、崩溃恢复、组提交与压缩"""
+import datetime
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from src.storage import BinaryWordStore, JsonWordStore, MappedWordStore, SQLiteWordStore, open_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _record(text, repetitions=0, **fields):
+    record = {"text": text, "meaning": "释义" + text, "repetitions": repetitions}
+    record.update(fields)
+    return record
+
+
+@pytest.fixture(params=["json", "binary", "mapped"])
+def store_path(request, tmp_path):
+    """(路径, open_store的参数)"""
+    if request.param == "json":
+        return str(tmp_path / "deck.json"), {}
+    if request.param == "binary":
+        return str(tmp_path / "deck.deck"), {"mapped": False}
+    return str(tmp_path / "deck.deck"), {"mapped": True}
+
+
+def test_journal_replay_without_close(store_path):
+    path, options = store_path
+    store = open_store(path, **options)
+    store.put_many([_record("apple"), _record("book", 2, next_review="2030-01-01")])
+    store.put_many([_record("apple", 3, next_review="2030-01-02")])
+    assert store.flush()
+    
+    # 不关闭、不压缩，直接重新打开：快照不存在，数据全部来自日志
+    reopened = open_store(path, **options)
+    assert len(reopened) == 2
+    assert reopened.get("apple")["repetitions"] == 3
+    assert reopened.get("book")["next_review"] == "2030-01-01"
+    assert reopened.count_due(datetime.date(2030, 1, 5)) == 2
+    del reopened
+    store.close()
+
+
+def test_close_compacts_journal(tmp_path):
+    path = str(tmp_path / "deck.json")
+    store = JsonWordStore(path)
+    store.put_many([_record("apple", 1)])
+    store.close()
+    assert not os.path.exists(store.journal_path)
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)["words"]["apple"]["repetitions"] == 1
+
+
+def test_torn_journal_line_is_skipped(tmp_path):
+    path = str(tmp_path / "deck.json")
+    store = JsonWordStore(path)
+    store.put_many([_record("apple", 1)])
+    store.close()
+    # 崩溃时最后一行只写了一半
+    with open(store.journal_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(_record("book", 1)) + "\n" + '{"text": "cut')
+    reopened = JsonWordStore(path)
+    assert sorted(reopened.keys()) == ["apple", "book"]
+    reopened.close()
+
+
+@pytest.mark.parametrize("file_name", ["deck.json", "deck.deck"])
+def test_hard_kill_right_after_put_keeps_record(tmp_path, file_name):
+    """put_many返回后进程立即被杀死（没有flush、close或atexit），修改仍然保留"""
+    path = str(tmp_path / file_name)
+    code = (
+        "import os, sys\n"
+        f"sys.path.insert(0, {ROOT!r})\n"
+        "from src.storage import open_store\n"
+        f"store = open_store({path!r})\n"
+        "assert store.put_many([{'text': 'apple', 'meaning': 'm', 'repetitions': 4}])\n"
+        "os._exit(0)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+    store = open_store(path)
+    assert store.get("apple")["repetitions"] == 4
+    store.close()
+
+
+def test_failed_journal_write_is_reported(tmp_path):
+    path = str(tmp_path / "deck.json")
+    store = JsonWordStore(path)
+    store.put_many([_record("apple", 1)])
+    store.flush()
+    # 让日志无法写入
+    store._close_journal()
+    os.remove(store.journal_path)
+    os.mkdir(store.journal_path)
+    
+    assert not store.put_many([_record("apple", 2), _record("book", 1)])
+    # 写入失败时内存中的数据不变
+    assert store.get("apple")["repetitions"] == 1
+    assert "book" not in store
+    os.rmdir(store.journal_path)
+    assert store.put_many([_record("book", 1)])
+    store.close()
+    assert sorted(JsonWordStore(path).keys()) == ["apple", "book"]
+
+
+@pytest.mark.parametrize("store_class", [JsonWordStore, BinaryWordStore, MappedWordStore])
+def test_compaction_during_concurrent_writes(tmp_path, monkeypatch, store_class):
+    path = str(tmp_path / ("deck.json" if store_class is JsonWordStore else "deck.deck"))
+    monkeypatch.setattr(store_class, "JOURNAL_COMPACT_THRESHOLD", 25)
+    store = store_class(path)
+    expected = {}
+    lock = threading.Lock()
+    
+    def writer(worker):
+        for i in range(200):
+            text = f"w{(worker * 7 + i) % 60}"
+            # 调用方（WordDataManager）会把写入串行化
+            with lock:
+                expected[text] = worker * 1000 + i
+                assert store.put_many([_record(text, worker * 1000 + i)])
+    
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # 关闭前重新打开（模拟崩溃）和关闭后重新打开，结果都一致
+    assert store.flush()
+    crashed = store_class(path)
+    assert {text: record["repetitions"] for text, record in crashed.items()} == expected
+    del crashed
+    store.close()
+    reopened = store_class(path)
+    assert {text: record["repetitions"] for text, record in reopened.items()} == expected
+    reopened.close()
+
+
+@pytest.mark.parametrize("file_name", ["deck.db", "deck.deck"])
+def test_failed_migration_leaves_no_partial_deck(tmp_path, monkeypatch, file_name):
+    json_path, path = str(tmp_path / "deck.json"), str(tmp_path / file_name)
+    source = JsonWordStore(json_path)
+    source.put_many([_record(f"word{i}", i % 3, next_review="2030-01-01") for i in range(50)])
+    source.close()
+    
+    def fail(*args, **kwargs):
+        raise OSError("磁盘已满")
+    
+    # 在写临时文件的途中失败
+    if file_name.endswith(".db"):
+        monkeypatch.setattr(SQLiteWordStore, "put_many", lambda self, records: False)
+    else:
+        monkeypatch.setattr(os, "fsync", fail)
+    with pytest.raises(Exception):
+        open_store(path, mapped=False)
+    assert sorted(os.listdir(tmp_path)) == ["deck.json"]
+    
+    # 下次打开时重新迁移
+    monkeypatch.undo()
+    store = open_store(path, mapped=False)
+    assert len(store) == 50 and store.get("word4")["repetitions"] == 1
+    store.close()